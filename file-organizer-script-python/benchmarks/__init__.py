@@ -0,0 +1,11 @@
+"""
+Benchmark suite for the File Organizer.
+
+- treegen.py – builds synthetic trees with a realistic extension mix.
+- harness.py – runs organizer modes against fresh trees and reports
+  files/sec, syscalls per file, peak RSS and wall time as JSON.
+
+Run from the project root, e.g.::
+
+    python -m benchmarks.harness --files 100000 --root /dev/shm/bench -o bench.json
+"""
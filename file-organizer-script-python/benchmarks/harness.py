@@ -0,0 +1,268 @@
+"""
+Benchmark harness: run organizer modes against freshly generated trees.
+
+Each mode runs in its own child process on its own copy of the tree, so
+peak RSS is per mode. Syscalls are counted by wrapping the os-level
+filesystem functions the engine uses (Python-level calls, not strace).
+Results are printed/written as JSON; pass ``--baseline`` with an earlier
+report to get per-mode speedups.
+
+Besides plain organizing there is a mode per optional feature: index,
+sniff, dedupe, journal, budget-1000 (one 1000-move slice), the suffix and
+hash collision strategies, fd-relative, view and stats. ``*-rerun`` and
+``view-resync`` time a second run over a tree already handled, compare
+them with ``rerun``.
+
+Modes that keep state (caches, indexes, journals, the view) keep it beside
+the tree and lose it with the tree; untimed preparation such as a first
+run or priming a cache runs from SETUP. ``find`` is no organizer mode but
+the GNU find baseline ``stats`` is compared with (its syscalls are not
+counted).
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import click
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LEGACY_ROOT = PROJECT_ROOT / "legacy" / "file_organizer"
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.treegen import TreeSpec, generate_tree  # noqa: E402
+
+COUNTED_CALLS = ("stat", "lstat", "fstat", "listdir", "scandir", "open", "mkdir", "makedirs",
+                 "rename", "replace", "link", "unlink", "copy_file_range", "sendfile", "pread")
+
+
+def _organize(recursive: bool = False, **state) -> Callable[[str, Dict], int]:
+    """Organize the tree; ``state`` options name a state file kept beside it (see _state)."""
+    def run(root: str, mapping: Dict, **kwargs) -> int:
+        from main import organize_directory
+        options = {key: _state(root, name) for key, name in state.items()}
+        return organize_directory(Path(root), mapping, recursive=recursive, **options, **kwargs)
+    return run
+
+
+def _recursive(**kwargs) -> Callable[[str, Dict], int]:
+    state = {key: kwargs.pop(key) for key in STATE_OPTIONS if key in kwargs}
+    run = _organize(recursive=True, **state)
+    return lambda root, mapping: run(root, mapping, **kwargs)
+
+
+# Options whose value is a state file name, resolved per tree.
+STATE_OPTIONS = ("index_path", "sniff_cache", "hash_cache", "journal_path", "view_root")
+
+
+def _state(root: str, name: str) -> str:
+    """A mode's state file: beside its tree, not in it, and removed with it."""
+    os.makedirs(f"{root}.state", exist_ok=True)
+    return os.path.join(f"{root}.state", name)
+
+
+def _settle(root: str) -> None:
+    # A freshly generated tree's directories are too new for an mtime cache
+    # to trust (index.RACY_WINDOW_NS); age them as on any tree at rest.
+    past = time.time() - 60
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (past, past))
+
+
+def _rerun(mode: Callable[[str, Dict], int]) -> Callable[[str, Dict], int]:
+    """Setup for a re-run: run ``mode`` once, let the tree settle, run it again to record that."""
+    def prepare(root: str, mapping: Dict) -> int:
+        mode(root, mapping)
+        _settle(root)
+        return mode(root, mapping)
+    return prepare
+
+
+def _stats(cached: bool = False) -> Callable[[str, Dict], int]:
+    def run(root: str, mapping: Dict) -> int:
+        from organizer.rules import RuleSet
+        from organizer.stats import collect_stats
+        cache = _state(root, "stats.sqlite3") if cached else None
+        return collect_stats(root, RuleSet.from_mapping(mapping), cache_path=cache).files
+    return run
+
+
+def _settled_stats(root: str, mapping: Dict) -> int:
+    _settle(root)
+    return _stats(cached=True)(root, mapping)
+
+
+def _find(root: str, mapping: Dict) -> int:
+    """What ``stats`` is measured against: size and mtime of every file via GNU find and awk."""
+    script = 'find "$1" -type f -printf "%s %T@\\n" | awk \'{n++; b+=$1} END {print n+0}\''
+    return int(subprocess.run(["sh", "-c", script, "sh", root], capture_output=True, text=True,
+                              check=True).stdout)
+
+
+def _legacy(root: str, mapping: Dict) -> int:
+    if str(LEGACY_ROOT) not in sys.path:
+        sys.path.append(str(LEGACY_ROOT))
+    from core.file_operations import Organizer
+    return Organizer(base_path=root, config={"paths": {"default_folder": root}}).organize_files()
+
+
+MODES: Dict[str, Callable[[str, Dict], int]] = {
+    "organize": _organize(),
+    "organize-recursive": _recursive(),
+    "organize-recursive-workers8": _recursive(workers=8),
+    "organize-recursive-inplace": _recursive(flatten=False),
+    "legacy": _legacy,
+    "rerun": _recursive(),
+    "index": _recursive(index_path="index.sqlite3"),
+    "index-rerun": _recursive(index_path="index.sqlite3"),
+    "sniff": _recursive(sniff_cache="sniff.sqlite3"),
+    "dedupe": _recursive(duplicates="report", hash_cache="hashes.sqlite3"),
+    "journal": _recursive(journal_path="journal"),
+    "budget-1000": _recursive(journal_path="journal", max_files=1000),
+    "collisions-suffix": _recursive(collisions="suffix"),
+    "collisions-hash": _recursive(collisions="hash"),
+    "fd-relative": _recursive(fd_relative=True),
+    "view": _recursive(view_root="view"),
+    "view-resync": _recursive(view_root="view"),
+    "stats": _stats(),
+    "stats-cached": _stats(cached=True),
+    "find": _find,
+}
+
+# Untimed preparation in the child before a mode runs.
+SETUP: Dict[str, Callable[[str, Dict], int]] = {
+    "rerun": _rerun(MODES["rerun"]),
+    "index-rerun": _rerun(MODES["index-rerun"]),
+    "view-resync": _rerun(MODES["view-resync"]),
+    "stats-cached": _settled_stats,
+}
+
+
+class SyscallCounter:
+    """Count calls to os-level filesystem functions for the lifetime of the process."""
+
+    def __init__(self) -> None:
+        self.total = 0
+        for name in COUNTED_CALLS:
+            func = getattr(os, name, None)
+            if func is not None:
+                wrapped = self._wrap(func)
+                setattr(os, name, wrapped)
+                # Keep dir_fd/follow_symlinks capability checks working (fdops, stats).
+                for supports in (os.supports_dir_fd, os.supports_fd, os.supports_follow_symlinks,
+                                 os.supports_effective_ids):
+                    if func in supports:
+                        supports.add(wrapped)
+        from organizer import fdops
+        renameat2 = fdops._load_renameat2()
+        if renameat2 is not None:
+            fdops._renameat2 = self._wrap(renameat2)  # called through ctypes, not os
+
+    def _wrap(self, func: Callable) -> Callable:
+        def counted(*args, **kwargs):
+            self.total += 1
+            return func(*args, **kwargs)
+        return counted
+
+
+def _run_child(mode: str, root: str, mapping: Dict, results: multiprocessing.Queue) -> None:
+    import logging
+    logging.disable(logging.CRITICAL)  # measure the engine, not console output
+    if mode in SETUP:
+        SETUP[mode](root, mapping)
+    counter = SyscallCounter()
+    start = time.perf_counter()
+    count = MODES[mode](root, mapping)
+    wall = time.perf_counter() - start
+    results.put({
+        "mode": mode,
+        "files": count,
+        "wall_s": round(wall, 4),
+        "files_per_sec": round(count / wall, 1) if wall else None,
+        "syscalls": counter.total,
+        "syscalls_per_file": round(counter.total / count, 3) if count else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    })
+
+
+def run_benchmarks(root: str, spec: TreeSpec, modes: List[str], extension_groups: Dict) -> Dict:
+    """Generate a fresh tree per mode, run the mode in a child process, collect results."""
+    from main import build_extension_map
+    mapping = build_extension_map({"extension_groups": extension_groups})
+    ctx = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    report: Dict = {"python": platform.python_version(), "platform": platform.platform(),
+                    "results": []}
+
+    for mode in modes:
+        tree = os.path.join(root, mode)
+        shutil.rmtree(tree, ignore_errors=True)
+        start = time.perf_counter()
+        report["tree"] = generate_tree(tree, extension_groups, spec)
+        generated = time.perf_counter() - start
+
+        results: multiprocessing.Queue = ctx.Queue()
+        child = ctx.Process(target=_run_child, args=(mode, tree, mapping, results))
+        child.start()
+        result = results.get()
+        child.join()
+        result["generate_s"] = round(generated, 2)
+        report["results"].append(result)
+        shutil.rmtree(tree, ignore_errors=True)
+        shutil.rmtree(f"{tree}.state", ignore_errors=True)
+    return report
+
+
+def compare(report: Dict, baseline: Dict) -> Dict[str, Optional[float]]:
+    """files/sec speedup of ``report`` over ``baseline`` per mode."""
+    before = {r["mode"]: r.get("files_per_sec") for r in baseline.get("results", [])}
+    return {r["mode"]: round(r["files_per_sec"] / before[r["mode"]], 2)
+            if before.get(r["mode"]) and r.get("files_per_sec") else None
+            for r in report["results"]}
+
+
+@click.command()
+@click.option("--root", default="/dev/shm/file-organizer-bench", show_default=True,
+              help="Where trees are generated (tmpfs or a real disk)")
+@click.option("--files", type=click.IntRange(min=1), default=10_000, show_default=True)
+@click.option("--depth", type=click.IntRange(min=0), default=3, show_default=True)
+@click.option("--fanout", type=click.IntRange(min=1), default=8, show_default=True)
+@click.option("--collision-rate", type=click.FloatRange(0.0, 1.0), default=0.02, show_default=True)
+@click.option("--median-size", type=click.IntRange(min=0), default=64 * 1024, show_default=True)
+@click.option("--write-data", is_flag=True, help="Write real bytes instead of sparse files")
+@click.option("--seed", type=int, default=42, show_default=True)
+@click.option("-m", "--mode", "modes", multiple=True, type=click.Choice(sorted(MODES)),
+              help="Modes to run (default: all)")
+@click.option("-c", "--config", default=str(PROJECT_ROOT / "config.yaml"), show_default=True)
+@click.option("-o", "--output", default=None, help="Write the JSON report here as well")
+@click.option("--baseline", default=None, help="Earlier JSON report to compare against")
+def main(root: str, files: int, depth: int, fanout: int, collision_rate: float, median_size: int,
+         write_data: bool, seed: int, modes: List[str], config: str, output: Optional[str],
+         baseline: Optional[str]) -> None:
+    """Benchmark organizer modes on synthetic trees and report JSON."""
+    from main import load_config
+    groups = load_config(Path(config)).get("extension_groups", {})
+    spec = TreeSpec(files=files, depth=depth, fanout=fanout, collision_rate=collision_rate,
+                    median_size=median_size, write_data=write_data, seed=seed)
+    report = run_benchmarks(root, spec, list(modes) or list(MODES), groups)
+    if baseline:
+        report["speedup_vs_baseline"] = compare(report, json.loads(Path(baseline).read_text()))
+
+    text = json.dumps(report, indent=2)
+    click.echo(text)
+    if output:
+        Path(output).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Startup benchmark: time from process spawn to the first filesystem
+operation on the target directory.
+
+Each sample runs ``main.py`` in a fresh interpreter on a tiny target. The
+child wraps ``os.scandir`` and exits the moment the target is first
+listed, so the measured wall time is interpreter start-up, imports, CLI
+parsing and config loading – the fixed cost a cron or watch job pays on
+every small batch. Samples alternate between a cold config cache (removed
+before the run) and a warm one; ``in_process`` is the part spent after the
+interpreter itself is up (imports onwards).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import click
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TARGET_MS = 60.0
+
+# Runs main.py as __main__ and exits on the first scandir of the target.
+CHILD = """
+import os, runpy, sys, time
+start = time.perf_counter()
+target = os.path.realpath(sys.argv[1])
+scandir = os.scandir
+def first_scandir(path=".", *a, **k):
+    if os.path.realpath(path) == target:
+        sys.stdout.flush()
+        os.write(2, b"\\nstartup_ms=%f\\n" % ((time.perf_counter() - start) * 1000))
+        os._exit(0)
+    return scandir(path, *a, **k)
+os.scandir = first_scandir
+sys.argv = [sys.argv[2]] + sys.argv[3:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name="__main__")
+os._exit(3)
+"""
+
+
+def sample(target: str, config: str, cache_dir: str, cold: bool) -> Tuple[float, float]:
+    """Milliseconds from spawn, and from the child's first line, to the first listing of ``target``."""
+    if cold:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    env = dict(os.environ, FILE_ORGANIZER_CACHE_DIR=cache_dir)
+    # Measure an ordinary install, where imported modules' bytecode is cached.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    args = [sys.executable, "-c", CHILD, target, str(PROJECT_ROOT / "main.py"),
+            "-d", target, "-c", config, "--dry-run"]
+    start = time.perf_counter()
+    result = subprocess.run(args, env=env, cwd=os.path.dirname(target), capture_output=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    marker = result.stderr.rpartition(b"startup_ms=")[2]
+    if result.returncode != 0 or not marker:
+        raise RuntimeError(f"main.py did not reach the target: {result.stderr.decode()[-2000:]}")
+    return elapsed, float(marker)
+
+
+def run_startup(runs: int, config: str) -> Dict[str, Dict[str, float]]:
+    """Median/min/max milliseconds to first filesystem operation, cold and warm."""
+    samples: Dict[str, List[float]] = {"cold_cache": [], "warm_cache": [],
+                                       "cold_cache_in_process": [], "warm_cache_in_process": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, "target")
+        os.mkdir(target)
+        cache_dir = os.path.join(tmp, "cache")
+        sample(target, config, cache_dir, cold=True)  # warm the OS page cache
+        for _ in range(runs):
+            for kind in ("cold_cache", "warm_cache"):
+                total, in_process = sample(target, config, cache_dir, cold=kind == "cold_cache")
+                samples[kind].append(total)
+                samples[f"{kind}_in_process"].append(in_process)
+    return {kind: {"median_ms": round(statistics.median(values), 2),
+                   "min_ms": round(min(values), 2), "max_ms": round(max(values), 2)}
+            for kind, values in samples.items()}
+
+
+@click.command()
+@click.option("-c", "--config", default=str(PROJECT_ROOT / "config.yaml"), show_default=True)
+@click.option("--runs", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option("--target-ms", type=click.FloatRange(min=0.0), default=DEFAULT_TARGET_MS, show_default=True,
+              help="Exit with status 1 if the warm-cache median is slower")
+def main(config: str, runs: int, target_ms: float) -> None:
+    """Print start-up time to first filesystem operation as JSON."""
+    report = run_startup(runs, os.path.abspath(config))
+    report["target_ms"] = target_ms
+    click.echo(json.dumps(report, indent=2))
+    if report["warm_cache"]["median_ms"] > target_ms:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
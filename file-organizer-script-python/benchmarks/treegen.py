@@ -0,0 +1,107 @@
+"""
+Synthetic tree generator for benchmarks.
+
+Files are spread over a directory tree of configurable depth, extensions are
+drawn from config.yaml ``extension_groups`` with realistic weights, sizes
+follow a log-normal distribution (sparse by default, so 5M files fit on
+tmpfs) and a fraction of names collide – both across directories and with
+files already sitting in the root category folders.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+# Share of files per config group; the remainder get unknown or no extension.
+DEFAULT_MIX: Dict[str, float] = {
+    "Images": 0.35,
+    "Documents": 0.22,
+    "Code": 0.10,
+    "Audio": 0.08,
+    "Archives": 0.07,
+    "Videos": 0.05,
+    "Executables": 0.02,
+}
+UNKNOWN_EXTENSIONS = ["", "dat", "bak", "tmp", "log"]
+
+
+@dataclass
+class TreeSpec:
+    """Parameters of a generated tree (also written into benchmark reports)."""
+
+    files: int = 10_000
+    depth: int = 3
+    fanout: int = 8
+    collision_rate: float = 0.02
+    median_size: int = 64 * 1024
+    size_sigma: float = 2.0
+    write_data: bool = False
+    seed: int = 42
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+
+
+def _directories(root: str, depth: int, fanout: int) -> List[str]:
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f"d{d}_{i}") for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    for path in dirs[1:]:
+        os.makedirs(path, exist_ok=True)
+    return dirs
+
+
+def generate_tree(root: str, extension_groups: Dict[str, List[str]],
+                  spec: Optional[TreeSpec] = None) -> Dict:
+    """Create the tree under ``root`` and return a summary of what was written."""
+    spec = spec or TreeSpec()
+    rng = random.Random(spec.seed)
+    os.makedirs(root, exist_ok=True)
+    dirs = _directories(root, spec.depth, spec.fanout)
+
+    groups = [g for g in spec.mix if extension_groups.get(g)]
+    weights = [spec.mix[g] for g in groups]
+    unknown_weight = max(0.0, 1.0 - sum(weights))
+    names: List[str] = []
+    total_bytes = 0
+    written = 0
+    collisions = 0
+    mu = math.log(max(1, spec.median_size))
+
+    for i in range(spec.files):
+        if names and rng.random() < spec.collision_rate:
+            name = rng.choice(names)
+            collisions += 1
+        else:
+            group = rng.choices(groups + [None], weights + [unknown_weight])[0]
+            ext = rng.choice(extension_groups[group]) if group else rng.choice(UNKNOWN_EXTENSIONS)
+            name = f"file_{i:07d}.{ext}" if ext else f"file_{i:07d}"
+            names.append(name)
+
+        path = os.path.join(rng.choice(dirs), name)
+        if os.path.exists(path):
+            continue
+        size = int(rng.lognormvariate(mu, spec.size_sigma))
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            if spec.write_data:
+                os.write(fd, os.urandom(min(size, 1024 * 1024)))
+            os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+        total_bytes += size
+        written += 1
+
+    # Seed the root category folders with a few names that will collide.
+    for name in names[: max(1, int(len(names) * spec.collision_rate / 2))]:
+        ext = os.path.splitext(name)[1][1:].lower()
+        folder = next((g for g, exts in extension_groups.items() if ext in map(str.lower, exts)), "Others")
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+        open(os.path.join(root, folder, name), "w").close()
+
+    return {"spec": asdict(spec), "files": written, "directories": len(dirs), "bytes": total_bytes,
+            "collisions": collisions}
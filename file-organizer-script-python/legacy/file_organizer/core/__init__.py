@@ -1 +1,10 @@
-# Marks this folder as a Python package.
\ No newline at end of file
+# Marks this folder as a Python package.
+
+import os
+import sys
+
+# The scanning engine lives in the top-level ``organizer`` package shared
+# with the modern main.py; make it importable when running from this folder.
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
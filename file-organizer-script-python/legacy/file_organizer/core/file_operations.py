@@ -2,7 +2,7 @@
 Core module for File Organizer Script.
 
 Handles:
-- Scanning folders
+- Scanning folders (via the shared os.scandir-based scanner)
 - Categorizing files by extension
 - Creating folders if missing
 - Moving files
@@ -12,18 +12,72 @@ Handles:
 """
 
 import os
-import shutil
+from typing import Callable, List, Optional
+
 from core.logger import get_logger
+from organizer.api import OrganizeResult, Organizer as Engine, OrganizerConfig
+from organizer.metrics import metrics_for
+from organizer.rules import RuleSet
 from utils.helper import load_config
 
 logger = get_logger()
 
+
+def extension_folder(name: str) -> str:
+    """
+    The legacy "<EXT> Files" folder of a file name.
+
+    The last dot-separated part is the extension, so a name without a dot
+    goes to its own folder ("README" → "README Files").
+
+    Args:
+        name (str): File name.
+
+    Returns:
+        str: Destination folder name.
+    """
+    return f"{name.split('.')[-1].upper()} Files"
+
+
+class ExtensionFolders(RuleSet):
+    """
+    Rules for the shared engine that classify every name with extension_folder.
+
+    The folder is derived from each name as the engine scans it, so the
+    directory is listed once and any extension gets its folder.
+    """
+
+    def __init__(self):
+        super().__init__([])
+
+    def signature(self) -> List:
+        return [["legacy", "<EXT> Files"]]
+
+    def classify_name(self, name: str) -> str:
+        return extension_folder(name)
+
+    def classify(self, entry: os.DirEntry) -> str:
+        return extension_folder(entry.name)
+
+    def name_classifier(self) -> Callable[[str], str]:
+        return extension_folder
+
+    def entry_classifier(self) -> Callable[[os.DirEntry], str]:
+        return lambda entry: extension_folder(entry.name)
+
+
 class Organizer:
     """
     Organizer class handles file organization based on extensions.
+
+    The work is done by the shared engine (organizer.api); this class keeps
+    the legacy "<EXT> Files" layout (see extension_folder), logging and
+    error handling. A file whose name is already taken in its folder
+    replaces the existing one, as the legacy move did.
     """
 
-    def __init__(self, base_path: str | None = None, dry_run: bool = False, config: dict | None = None):
+    def __init__(self, base_path: str | None = None, dry_run: bool = False, config: dict | None = None,
+                 metrics=None):
         """
         Initialize the Organizer with folder path, dry run flag, and config.
 
@@ -31,12 +85,16 @@ class Organizer:
             base_path (str | None): Path to scan and organize files. If None, use default from config.
             dry_run (bool): If True, simulate operations without making changes.
             config (dict | None): Configuration dictionary.
+            metrics (RunMetrics | None): Collector for phase timings; a no-op
+                collector is used unless one is passed or a hook is registered.
         """
         if config is None:
             config = load_config()
         self.base_path = base_path or config["paths"]["default_folder"]
         self.dry_run = dry_run
         self.config = config
+        self.metrics = metrics_for("legacy", metrics)
+        self.result: Optional[OrganizeResult] = None
 
     def organize_files(self) -> int:
         """
@@ -45,45 +103,32 @@ class Organizer:
         Returns:
             int: Number of files organized.
         """
+        metrics = self.metrics
+        engine = None
         try:
-            file_names = os.listdir(self.base_path)
-            organized_count = 0
             logger.info(f"Scanning folder: {self.base_path}")
-
-            for file in file_names:
-                full_path = os.path.join(self.base_path, file)
-
-                if os.path.isfile(full_path):
-                    ext = file.split('.')[-1].upper()
-                    target_folder = os.path.join(self.base_path, f"{ext} Files")
-
-                    if not os.path.exists(target_folder):
-                        if not self.dry_run:
-                            os.makedirs(target_folder)
-                        logger.info(f"Created folder: {target_folder}")
-
-                    if not self.dry_run:
-                        shutil.move(full_path, os.path.join(target_folder, file))
-                    logger.info(f"Moved {file} to {target_folder}")
-                    organized_count += 1
-
-            if organized_count == 0:
-                logger.warning("No files found to organize.")
-            else:
-                logger.info(f"{organized_count} file(s) organized successfully.")
-
-            return organized_count
-
-        except PermissionError as pe:
-            logger.error(f"Permission denied: {pe}")
-            return 0
-        except FileNotFoundError as fe:
-            logger.error(f"Folder not found: {fe}")
-            return 0
+            engine = Engine(OrganizerConfig(ExtensionFolders(), dry_run=self.dry_run, collisions="overwrite"))
+            self.result = engine.run(self.base_path, metrics=metrics)
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            # Once the engine runs it records its own errors and finishes the metrics.
+            if engine is None:
+                metrics.error(e)
+                metrics.finish()
+            if isinstance(e, PermissionError):
+                logger.error(f"Permission denied: {e}")
+            elif isinstance(e, (FileNotFoundError, NotADirectoryError)):
+                logger.error(f"Folder not found: {e}")
+            else:
+                logger.error(f"Unexpected error: {e}")
             return 0
 
+        organized_count = self.result.files
+        if organized_count == 0:
+            logger.warning("No files found to organize.")
+        else:
+            logger.info(f"{organized_count} file(s) organized successfully.")
+        return organized_count
+
     def run(self):
         """
         Run the file organization process.
@@ -1,22 +1,30 @@
 """
 This module sets up and manages application-wide logging using Python's 
 built-in `logging` module. It ensures that all logs are consistently 
-formatted, rotated, and safely written to disk.
+formatted, rotated, and safely written to disk from a background thread.
 """
 
 import logging
-from logging.handlers import RotatingFileHandler
 import os
 
+from organizer.logsetup import BatchRotatingFileHandler, BatchStreamHandler, JsonLinesFormatter, LogPipeline
 
-def setup_logger(log_level: int = logging.INFO, verbose: bool = False, log_file: str = "file_organizer.log") -> logging.Logger:
+
+def setup_logger(log_level: int = logging.INFO, verbose: bool = False, log_file: str = "file_organizer.log",
+                 json_format: bool = False, summary_only: bool = False) -> logging.Logger:
     """
     Configure and return a logger instance with rotating log file support.
 
+    Records are queued and written by a background listener thread, so
+    logging does not block file operations. The listener is flushed and
+    stopped automatically when the interpreter exits.
+
     Args:
         log_level (int): The logging level (e.g., logging.INFO).
         verbose (bool): If True, enable console logging.
         log_file (str): The filename (with path) where logs will be written.
+        json_format (bool): If True, write the log file as JSON lines.
+        summary_only (bool): If True, log per-folder totals instead of one line per file.
 
     Returns:
         logging.Logger: Configured logger instance.
@@ -35,22 +43,29 @@ def setup_logger(log_level: int = logging.INFO, verbose: bool = False, log_file:
         logger.setLevel(log_level)
 
         # Create rotating file handler (5 files, 1MB each)
-        handler = RotatingFileHandler(log_file, maxBytes=1_000_000, backupCount=5)
+        handler = BatchRotatingFileHandler(log_file, maxBytes=1_000_000, backupCount=5)
 
         # Set formatter for detailed logs
         formatter = logging.Formatter(
             "%(asctime)s — %(name)s — %(levelname)s — %(message)s"
         )
-        handler.setFormatter(formatter)
-
-        # Add handler to logger
-        logger.addHandler(handler)
+        handler.setFormatter(JsonLinesFormatter() if json_format else formatter)
+        handlers = [handler]
 
         # Add console handler if verbose
         if verbose:
-            console_handler = logging.StreamHandler()
+            console_handler = BatchStreamHandler()
             console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        # Route records through a background queue listener
+        pipeline = LogPipeline(handlers, summary_only=summary_only).start()
+        logger.addHandler(pipeline.handler)
+
+        # The shared engine logs per-file moves under "organizer.*".
+        engine_logger = logging.getLogger("organizer")
+        engine_logger.setLevel(log_level)
+        engine_logger.addHandler(pipeline.handler)
 
         logger.info("Logger initialized successfully.")
 
@@ -0,0 +1,29 @@
+"""
+Shared setup: run against this package's main.py.
+
+``python -m pytest`` from the repository root also collects the top-level
+suite, which has a ``main`` of its own; these tests always get the legacy one.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if sys.path[0] != ROOT:
+    sys.path.insert(0, ROOT)
+loaded = getattr(sys.modules.get("main"), "__file__", None)
+if loaded and os.path.dirname(os.path.abspath(loaded)) != ROOT:
+    del sys.modules["main"]
+
+import main  # noqa: E402
+
+
+def pytest_pycollect_makemodule(module_path, parent):
+    sys.modules["main"] = main  # for module-level imports; then default collection
+
+
+@pytest.fixture(autouse=True)
+def legacy_main(monkeypatch):
+    monkeypatch.setitem(sys.modules, "main", main)
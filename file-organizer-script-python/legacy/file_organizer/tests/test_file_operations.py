@@ -47,3 +47,24 @@ def test_organize_files_dry_run_does_not_move_files(mock_folder):
     organizer.organize_files()
     assert os.path.exists(mock_folder / "test1.txt")
     assert os.path.exists(mock_folder / "test2.jpg")
+
+def test_organize_files_uses_shared_engine_result(mock_folder):
+    """Test that the structured engine result is kept and extensionless names get their own folder."""
+    (mock_folder / "README").write_text("no extension")
+    config = {"paths": {"default_folder": str(mock_folder)}}
+    organizer = Organizer(base_path=str(mock_folder), dry_run=False, config=config)
+
+    assert organizer.organize_files() == 3
+    assert organizer.result.moved == 3
+    assert os.path.exists(mock_folder / "README Files" / "README")
+
+def test_organize_files_overwrites_existing_names(mock_folder):
+    """Test that a file whose name is taken replaces the existing one, as the legacy move did."""
+    (mock_folder / "TXT Files").mkdir()
+    (mock_folder / "TXT Files" / "test1.txt").write_text("old")
+    config = {"paths": {"default_folder": str(mock_folder)}}
+    organizer = Organizer(base_path=str(mock_folder), dry_run=False, config=config)
+
+    assert organizer.organize_files() == 2
+    assert (mock_folder / "TXT Files" / "test1.txt").read_text() == "File 1 content"
+    assert not (mock_folder / "test1.txt").exists()
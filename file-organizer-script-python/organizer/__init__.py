@@ -0,0 +1,23 @@
+"""
+Shared file organization engine used by main.py and the legacy Organizer.
+
+Embedding applications use the in-process API (organizer.api)::
+
+    from organizer import Organizer, OrganizerConfig
+"""
+
+__all__ = ["DirectoryCache", "OrganizeResult", "Organizer", "OrganizerConfig", "move_file", "scan_files"]
+
+_LAZY = {"DirectoryCache": "scanner", "move_file": "scanner", "scan_files": "scanner",
+         "OrganizeResult": "api", "Organizer": "api", "OrganizerConfig": "api"}
+
+
+def __getattr__(name: str):
+    # Resolved on first use so that importing a light submodule such as
+    # organizer.defaults does not pull in the scanner and its thread pools.
+    module = _LAZY.get(name)
+    if module is not None:
+        import importlib
+
+        return getattr(importlib.import_module(f"organizer.{module}"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
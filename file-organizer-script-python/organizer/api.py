@@ -0,0 +1,155 @@
+"""
+In-process Python API for embedding the organizer in a long-running service.
+
+    from organizer.api import Organizer, OrganizerConfig
+
+    organizer = Organizer(OrganizerConfig.from_file("config.yaml", workers=4))
+    for result in organizer.run_many(batch_dirs):
+        if not result.ok:
+            log.warning("%s: %s", result.target, result.error)
+
+Unlike the command line, nothing here configures logging, creates a
+``logs/`` directory, changes the process priority (``ionice``/``nice``
+settings apply only through ``config.throttle.apply_priority()``) or
+calls ``sys.exit``:
+records go to the ``organizer.*`` loggers and failures come back as
+exceptions (``run``) or as failed results (``run_many``). One I/O budget
+is shared by every run of an Organizer, so a throttled service stays
+within its limits across batches.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
+
+from organizer.defaults import (DEFAULT_COLLISION_STRATEGY, DEFAULT_COPY_WORKERS, DEFAULT_RUN_ORDER,
+                                DEFAULT_SCAN_WORKERS)
+from organizer.engine import (OrganizeResult, build_shard_layout, collision_strategy, load_compiled_config,
+                              organize_target, throttle_settings)
+
+if TYPE_CHECKING:
+    from organizer.metrics import RunMetrics
+    from organizer.rules import RuleSet
+    from organizer.shard import ShardLayout
+    from organizer.throttle import IOBudget, ThrottleSettings
+
+__all__ = ["OrganizeResult", "Organizer", "OrganizerConfig"]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OrganizerConfig:
+    """Everything one organize run needs besides the target directory.
+
+    ``rules`` is a compiled RuleSet or a plain ``extension → folder`` dict.
+    The remaining fields mirror the organize command's options; relative
+    state-file paths (index, journal, caches) are resolved against the
+    current directory at run time.
+    """
+
+    rules: Union[RuleSet, Dict[str, str]]
+    dry_run: bool = False
+    recursive: bool = False
+    max_depth: Optional[int] = None
+    flatten: bool = True
+    scan_workers: int = DEFAULT_SCAN_WORKERS
+    workers: int = 1
+    copy_workers: int = DEFAULT_COPY_WORKERS
+    index_path: Optional[str] = None
+    full: bool = False
+    sniff_cache: Optional[str] = None
+    duplicates: Optional[str] = None
+    hash_cache: Optional[str] = None
+    journal_path: Optional[str] = None
+    sharding: Optional[ShardLayout] = None
+    collisions: str = DEFAULT_COLLISION_STRATEGY
+    throttle: Optional[ThrottleSettings] = None
+    fd_relative: bool = False
+    max_files: Optional[int] = None
+    max_seconds: Optional[float] = None
+    order: str = DEFAULT_RUN_ORDER
+    view_root: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, config: Dict, **options) -> "OrganizerConfig":
+        """Build from a parsed config dict (the layout of ``config.yaml``); ``options`` override fields.
+
+        Raises:
+            ValueError: If the rules or throttle settings are invalid.
+        """
+        from organizer.rules import RuleSet
+
+        return cls._from_config(config, RuleSet.from_config(config), options)
+
+    @classmethod
+    def from_file(cls, path: str, **options) -> "OrganizerConfig":
+        """Build from a YAML config file, using the compiled-config cache."""
+        config, rules = load_compiled_config(path)
+        return cls._from_config(config, rules, options)
+
+    @classmethod
+    def _from_config(cls, config: Dict, rules: RuleSet, options: Dict) -> "OrganizerConfig":
+        values = {"rules": rules, "sharding": build_shard_layout(config),
+                  "collisions": collision_strategy(config), "throttle": throttle_settings(config)}
+        values.update(options)
+        return cls(**values)
+
+
+class Organizer:
+    """Organizes directories in-process with one OrganizerConfig."""
+
+    def __init__(self, config: OrganizerConfig) -> None:
+        self.config = config
+        self.budget: Optional[IOBudget] = None if config.throttle is None else config.throttle.budget()
+
+    def run(self, path: str, metrics: Optional[RunMetrics] = None, **options) -> OrganizeResult:
+        """Organize ``path``; ``options`` override config fields for this run only.
+
+        ``metrics`` collects this run's timings; the result carries their
+        summary either way.
+
+        With ``max_files``/``max_seconds`` set, call ``run`` again while
+        ``result.stopped``: each call continues from the journal cursor.
+
+        With ``view_root`` set, ``path`` is left untouched and the link view
+        under ``view_root`` is synced instead (``result.linked``/``pruned``).
+
+        Raises:
+            NotADirectoryError: If ``path`` is not a directory.
+            ValueError: If ``view_root`` overlaps ``path``.
+            OSError: If a move fails; earlier moves are kept (use a
+                journal to resume or undo).
+        """
+        from organizer.metrics import RunMetrics
+
+        config = dataclasses.replace(self.config, **options) if options else self.config
+        metrics = metrics if metrics is not None else RunMetrics("api")
+        result = organize_target(
+            path, config.rules, config.dry_run, recursive=config.recursive, max_depth=config.max_depth,
+            flatten=config.flatten, scan_workers=config.scan_workers, workers=config.workers,
+            copy_workers=config.copy_workers, index_path=config.index_path, full=config.full,
+            sniff_cache=config.sniff_cache, duplicates=config.duplicates, hash_cache=config.hash_cache,
+            metrics=metrics, journal_path=config.journal_path, sharding=config.sharding,
+            collisions=config.collisions, budget=self.budget,
+            fd_relative=config.fd_relative, max_files=config.max_files, max_seconds=config.max_seconds,
+            order=config.order, view_root=config.view_root)
+        result.metrics = metrics.summary()
+        return result
+
+    def run_many(self, paths: Iterable[str], **options) -> List[OrganizeResult]:
+        """Organize each of ``paths`` in turn; a failing path is reported, not raised."""
+        results = []
+        for path in paths:
+            try:
+                results.append(self.run(path, **options))
+            except Exception as exc:
+                logger.warning(f"Organizing {path} failed: {exc}")
+                results.append(OrganizeResult(os.path.realpath(os.path.expanduser(path)), ok=False,
+                                              dry_run=options.get("dry_run", self.config.dry_run),
+                                              error=str(exc)))
+        return results
@@ -0,0 +1,469 @@
+"""
+File Organizer command line.
+
+The organize logic itself lives in organizer.engine. main.py is only a
+thin entry point that re-exports ``__all__`` – the command and the engine
+functions scripts import from it: a script is compiled on every run, while
+this module's bytecode is cached.
+"""
+
+from __future__ import annotations
+
+import os
+import logging
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+import click
+
+from organizer.defaults import (COLLISION_STRATEGIES, DEFAULT_COPY_WORKERS,
+                                DEFAULT_DEBOUNCE, DEFAULT_INDEX_PATH, DEFAULT_JOURNAL_PATH,
+                                DEFAULT_MAX_DELAY, DEFAULT_RUN_ORDER, DEFAULT_SCAN_WORKERS,
+                                DEFAULT_SHARD_PATTERN, DEFAULT_SNIFF_CACHE, DEFAULT_STATS_CACHE,
+                                DEFAULT_STATS_TOP, DUPLICATE_ACTIONS, DUPLICATES_FOLDER, OUTPUT_FORMATS,
+                                RUN_ORDERS, STATS_FORMATS)
+from organizer.engine import (build_extension_map, build_rules, build_shard_layout, collision_strategy,
+                              load_compiled_config, load_config, organize_directory, organize_target,
+                              run_job, run_journal, start_throttle)
+
+# Engine modules are imported where they are used, so that a short run
+# only pays for what it touches (see benchmarks/startup_bench.py).
+if TYPE_CHECKING:
+    from organizer.logsetup import LogPipeline
+
+__all__ = ["build_extension_map", "build_rules", "cli", "load_config", "organize_directory", "organize_target",
+           "run_job", "setup_logging"]
+
+
+def env_log_level(verbose: bool = False) -> str:
+    """Log level: DEBUG with ``verbose``, else ``LOG_LEVEL`` from the environment or ``.env``.
+
+    python-dotenv is only imported when a ``.env`` file is actually found
+    (searched from the project directory upwards, as load_dotenv does).
+    """
+    if verbose:
+        return "DEBUG"
+    if "LOG_LEVEL" not in os.environ:
+        directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        while True:
+            candidate = os.path.join(directory, ".env")
+            if os.path.isfile(candidate):
+                from dotenv import load_dotenv
+
+                load_dotenv(candidate)
+                break
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+    return os.getenv("LOG_LEVEL", "INFO")
+
+
+def setup_logging(level: str = "INFO", log_file: str = "logs/file_organizer.log",
+                  log_format: str = "text", summary_only: bool = False) -> LogPipeline:
+    """Configure structured logging with console + rotating file output.
+
+    Records are written by a background listener; call ``stop()`` on the
+    returned pipeline to flush it. ``log_format="json"`` writes the log file
+    as JSON lines, and ``summary_only`` replaces per-file lines with
+    per-folder totals.
+    """
+    from organizer.logsetup import (BatchRotatingFileHandler, BatchStreamHandler,
+                                    JsonLinesFormatter, LogPipeline)
+
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    logger = logging.getLogger()
+    logger.setLevel(getattr(logging, level.upper()))
+    logger.handlers.clear()  # prevent duplicate handlers in reloads
+
+    # Rotating file handler – 5 MB per file, keep 5 backups
+    file_handler = BatchRotatingFileHandler(log_file, maxBytes=5_000_000, backupCount=5)
+    if log_format == "json":
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(
+            "%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s | %(message)s"
+        ))
+
+    # Clean console output
+    console_handler = BatchStreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(levelname)-8s | %(message)s"))
+
+    pipeline = LogPipeline([file_handler, console_handler], summary_only=summary_only)
+    logger.addHandler(pipeline.handler)
+    return pipeline.start()
+
+
+class DefaultCommandGroup(click.Group):
+    """Click group that falls back to ``default_command`` when no subcommand is given.
+
+    Keeps ``python main.py -d ~/Downloads`` working alongside subcommands.
+    """
+
+    default_command = "organize"
+
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ("--help", "-h")):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+def throttle_options(command: Callable) -> Callable:
+    """Add the I/O budget and priority options (see organizer.throttle) to ``command``."""
+    options = [
+        click.option("--max-bytes-per-sec", default=None,
+                     help="Cap cross-device copy bandwidth, e.g. 50MB (default: from config)"),
+        click.option("--max-ops-per-sec", type=click.FloatRange(min=0.0, min_open=True), default=None,
+                     help="Cap mkdir/rename operations per second (default: from config)"),
+        click.option("--adaptive/--no-adaptive", default=None,
+                     help="Back off when operation latency rises (default: from config)"),
+        click.option("--ionice", type=click.Choice(["idle", "best-effort"]), default=None,
+                     help="Linux I/O scheduling class for the run"),
+        click.option("--nice", type=int, default=None, help="Raise the process niceness to this value"),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+@click.group(cls=DefaultCommandGroup)
+def cli() -> None:
+    """File Organizer – organize files by extension (default command: organize)."""
+
+
+@cli.command("organize")
+@click.option("-d", "--directory", default=".", help="Directory to organize")
+@click.option("-c", "--config", default="config.yaml", help="Path to config file")
+@click.option("--dry-run", is_flag=True, help="Preview changes without moving files")
+@click.option("-v", "--verbose", is_flag=True, help="Enable detailed DEBUG output")
+@click.option("-r", "--recursive", is_flag=True, help="Organize files in subdirectories too")
+@click.option("--max-depth", type=click.IntRange(min=0), default=None,
+              help="Deepest subdirectory level to visit with --recursive")
+@click.option("--layout", type=click.Choice(["flatten", "in-place"]), default="flatten",
+              help="flatten: root category folders; in-place: category folders per subdirectory")
+@click.option("--scan-workers", type=click.IntRange(min=1), default=DEFAULT_SCAN_WORKERS,
+              help="Parallel directory reads with --recursive")
+@click.option("-w", "--workers", type=click.IntRange(min=1), default=1,
+              help="Concurrent mkdir/rename operations (helps on NFS/SMB)")
+@click.option("--copy-workers", type=click.IntRange(min=1), default=DEFAULT_COPY_WORKERS,
+              help="Parallel copies when category folders are on another mount")
+@click.option("--log-format", type=click.Choice(["text", "json"]), default="text",
+              help="Log file format (json writes one JSON object per line)")
+@click.option("--summary-only", is_flag=True, help="Log per-folder totals instead of one line per file")
+@click.option("--index", "index_path", is_flag=False, flag_value=DEFAULT_INDEX_PATH, default=None,
+              help=f"Incremental mode: skip unchanged directories using an index (default: {DEFAULT_INDEX_PATH})")
+@click.option("--full", is_flag=True, help="With --index, rescan everything and rebuild the index")
+@click.option("--duplicates", type=click.Choice(DUPLICATE_ACTIONS), default=None,
+              help=f"Detect identical files among name collisions; move puts them in {DUPLICATES_FOLDER}/")
+@click.option("--hash-cache", default=None, help="sqlite file to persist duplicate-detection hashes")
+@click.option("--metrics-json", default=None, help="Write a JSON run summary with per-phase timings")
+@click.option("--metrics-prom", default=None,
+              help="Write metrics as a Prometheus textfile-collector .prom file")
+@click.option("--profile", "profile_path", default=None, help="Dump cProfile/pstats data for the run")
+@click.option("--sniff", "sniff_cache", is_flag=False, flag_value=DEFAULT_SNIFF_CACHE, default=None,
+              help=f"Classify unknown extensions by file content (cache default: {DEFAULT_SNIFF_CACHE})")
+@click.option("--journal", "journal_path", is_flag=False, flag_value=DEFAULT_JOURNAL_PATH, default=None,
+              help=f"Record moves in a crash-safe journal (default: {DEFAULT_JOURNAL_PATH})")
+@click.option("--resume", is_flag=True, help="Finish the run recorded in the journal without rescanning")
+@click.option("--undo", is_flag=True, help="Move every file recorded in the journal back")
+@click.option("--collisions", type=click.Choice(COLLISION_STRATEGIES), default=None,
+              help="What to do when a destination name is taken (default: from config, else skip)")
+@click.option("--output", "output_format", type=click.Choice(OUTPUT_FORMATS), default=None,
+              help="Stream one record per file (source, destination, rule, size, action, reason)")
+@click.option("--output-file", default="-", show_default=True,
+              help="Where --output records go ('-' for stdout)")
+@click.option("--fd-relative", is_flag=True,
+              help="Move with renameat relative to directory fds; never replace files created meanwhile")
+@click.option("--max-files", type=click.IntRange(min=1), default=None,
+              help="Stop after this many moves; the journal keeps the rest for the next run")
+@click.option("--max-seconds", type=click.FloatRange(min=0, min_open=True), default=None,
+              help="Stop starting moves after this many seconds; the next run continues")
+@click.option("--order", type=click.Choice(RUN_ORDERS), default=DEFAULT_RUN_ORDER, show_default=True,
+              help="Move order, so budgeted runs clear the oldest or largest files first")
+@click.option("--view", "view_root", default=None,
+              help="Leave the directory untouched; sync a view of links to its files under this root")
+@throttle_options
+def main(directory: str, config: str, dry_run: bool, verbose: bool, recursive: bool,
+         max_depth: Optional[int], layout: str, scan_workers: int, workers: int,
+         copy_workers: int, log_format: str, summary_only: bool, index_path: Optional[str],
+         full: bool, duplicates: Optional[str], hash_cache: Optional[str],
+         sniff_cache: Optional[str], metrics_json: Optional[str], metrics_prom: Optional[str],
+         profile_path: Optional[str], journal_path: Optional[str], resume: bool,
+         undo: bool, collisions: Optional[str], output_format: Optional[str], output_file: str,
+         fd_relative: bool, max_files: Optional[int], max_seconds: Optional[float], order: str,
+         view_root: Optional[str], max_bytes_per_sec: Optional[str], max_ops_per_sec: Optional[float], adaptive: Optional[bool],
+         ionice: Optional[str], nice: Optional[int]) -> None:
+    """Organize files into category folders (default command)."""
+    if resume and undo:
+        raise click.UsageError("--resume and --undo are mutually exclusive")
+    if (resume or undo) and dry_run:
+        raise click.UsageError("--dry-run cannot be combined with --resume or --undo")
+    if (resume or undo) and output_format:
+        raise click.UsageError("--output cannot be combined with --resume or --undo")
+    if (resume or undo) and (max_files or max_seconds):
+        raise click.UsageError("--max-files/--max-seconds cannot be combined with --resume or --undo; "
+                               "a budgeted run continues from its journal by itself")
+    if view_root and (resume or undo or journal_path or index_path or duplicates or output_format
+                      or max_files or max_seconds):
+        raise click.UsageError("--view cannot be combined with --journal/--resume/--undo, --index, "
+                               "--duplicates, --output or --max-files/--max-seconds")
+    log_level = env_log_level(verbose)
+    pipeline = setup_logging(log_level, log_format=log_format, summary_only=summary_only)
+
+    try:
+        logging.info("File Organizer v2025 – starting")
+        metrics = profiler = output = None
+        if metrics_json or metrics_prom or profile_path:
+            from organizer.metrics import RunMetrics
+
+            metrics = RunMetrics()
+        if profile_path:
+            import cProfile
+
+            profiler = cProfile.Profile()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            cfg, rules = load_compiled_config(config)
+            budget = start_throttle(cfg, max_bytes_per_sec=max_bytes_per_sec, max_ops_per_sec=max_ops_per_sec,
+                                    adaptive=adaptive, ionice=ionice, nice=nice)
+            left = ""
+            if resume or undo:
+                count = run_journal(journal_path or DEFAULT_JOURNAL_PATH, undo, workers,
+                                    copy_workers, metrics, budget, fd_relative)
+            else:
+                if output_format:
+                    from organizer.output import open_output
+
+                    output = open_output(output_format, output_file)
+                result = organize_target(directory, rules, dry_run, recursive=recursive,
+                                         max_depth=max_depth, flatten=layout == "flatten",
+                                         scan_workers=scan_workers, workers=workers,
+                                         copy_workers=copy_workers, index_path=index_path,
+                                         full=full, sniff_cache=sniff_cache,
+                                         duplicates=duplicates, hash_cache=hash_cache,
+                                         metrics=metrics, journal_path=journal_path,
+                                         sharding=build_shard_layout(cfg),
+                                         collisions=collision_strategy(cfg, collisions),
+                                         output=output, budget=budget, fd_relative=fd_relative,
+                                         max_files=max_files, max_seconds=max_seconds, order=order,
+                                         view_root=view_root)
+                count = result.processed
+                if result.stopped:
+                    eta = "" if result.remaining_s is None else f", ~{result.remaining_s:g}s"
+                    left = f"; {result.remaining} move(s) left for the next run{eta}"
+                elif view_root:
+                    left = f"; {result.linked} linked, {result.pruned} pruned in {view_root}"
+            mode = " (dry-run)" if dry_run else ""
+            logging.info(f"Completed{mode} – {count} file(s) processed successfully{left}")
+        except Exception as exc:
+            logging.error(f"Operation failed: {exc}")
+            raise click.Abort() from exc
+        finally:
+            if output is not None:
+                output.close()
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile_path)
+            if metrics is not None:
+                metrics.add_time("logging", pipeline.listener.write_seconds)
+                if metrics_json:
+                    metrics.write_json(metrics_json)
+                if metrics_prom:
+                    metrics.write_prometheus(metrics_prom)
+    finally:
+        pipeline.stop()
+
+
+@cli.command()
+@click.option("-d", "--directory", default=".", help="Directory to watch")
+@click.option("-c", "--config", default="config.yaml", help="Path to config file")
+@click.option("-v", "--verbose", is_flag=True, help="Enable detailed DEBUG output")
+@click.option("--debounce", type=click.FloatRange(min=0.0), default=DEFAULT_DEBOUNCE,
+              help="Seconds of quiet before a batch is organized")
+@click.option("--max-delay", type=click.FloatRange(min=0.0), default=DEFAULT_MAX_DELAY,
+              help="Longest a busy batch may wait before it is organized")
+@click.option("-w", "--workers", type=click.IntRange(min=1), default=1,
+              help="Concurrent mkdir/rename operations (helps on NFS/SMB)")
+@click.option("--log-format", type=click.Choice(["text", "json"]), default="text",
+              help="Log file format (json writes one JSON object per line)")
+@click.option("--collisions", type=click.Choice(COLLISION_STRATEGIES), default=None,
+              help="What to do when a destination name is taken (default: from config, else skip)")
+@throttle_options
+def watch(directory: str, config: str, verbose: bool, debounce: float, max_delay: float,
+          workers: int, log_format: str, collisions: Optional[str], max_bytes_per_sec: Optional[str],
+          max_ops_per_sec: Optional[float], adaptive: Optional[bool], ionice: Optional[str],
+          nice: Optional[int]) -> None:
+    """Stay resident and organize files as they land (Linux inotify)."""
+    import signal
+    import threading
+
+    from organizer.watcher import watch_batches
+
+    log_level = env_log_level(verbose)
+    pipeline = setup_logging(log_level, log_format=log_format)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    try:
+        cfg, rules = load_compiled_config(config)
+        sharding = build_shard_layout(cfg)
+        collisions = collision_strategy(cfg, collisions)
+        budget = start_throttle(cfg, max_bytes_per_sec=max_bytes_per_sec, max_ops_per_sec=max_ops_per_sec,
+                                adaptive=adaptive, ionice=ionice, nice=nice)
+        target = os.path.realpath(os.path.expanduser(directory))
+        categories = {folder.split("/")[0] for folder in rules.folders} | {rules.default}
+        logging.info(f"Watching {target} (debounce {debounce}s)")
+
+        try:
+            for names in watch_batches(target, categories, debounce, max_delay, stop):
+                count = organize_directory(target, rules, workers=workers, only_names=names,
+                                           sharding=sharding, collisions=collisions, budget=budget)
+                logging.info(f"Batch done – {count} file(s) processed")
+        except KeyboardInterrupt:
+            pass
+        except Exception as exc:
+            logging.error(f"Watch failed: {exc}")
+            raise click.Abort() from exc
+        logging.info("Watcher stopped")
+    finally:
+        pipeline.stop()
+
+
+@cli.command()
+@click.option("-d", "--directory", default=".", help="Directory holding the category folders")
+@click.option("-c", "--config", default="config.yaml", help="Path to config file")
+@click.option("-f", "--folder", "folders", multiple=True,
+              help="Category folder to reshard (repeatable; default: all with a threshold)")
+@click.option("--pattern", default=None, help="Shard pattern (default: from config)")
+@click.option("--dry-run", is_flag=True, help="Preview changes without moving files")
+@click.option("-v", "--verbose", is_flag=True, help="Enable detailed DEBUG output")
+def reshard(directory: str, config: str, folders: Tuple[str, ...], pattern: Optional[str],
+            dry_run: bool, verbose: bool) -> None:
+    """Migrate flat category folders into the sharded layout, in place."""
+    from organizer.shard import reshard_folder
+
+    log_level = env_log_level(verbose)
+    pipeline = setup_logging(log_level)
+    try:
+        sharding = load_config(config).get("sharding") or {}
+        pattern = pattern or sharding.get("pattern", DEFAULT_SHARD_PATTERN)
+        folders = folders or tuple(sharding.get("thresholds") or ())
+        if not folders:
+            raise click.UsageError("No category folders given and none configured under sharding.thresholds")
+        target = os.path.realpath(os.path.expanduser(directory))
+        for folder in folders:
+            path = os.path.join(target, folder)
+            if not os.path.isdir(path):
+                logging.warning(f"Skipping {path}: not a directory")
+                continue
+            try:
+                moved, kept = reshard_folder(path, pattern, dry_run=dry_run)
+            except (OSError, ValueError) as exc:
+                logging.error(f"Reshard of {path} failed: {exc}")
+                raise click.Abort() from exc
+            mode = " (dry-run)" if dry_run else ""
+            logging.info(f"Resharded {folder}{mode}: {moved} file(s) moved, {kept} left in place")
+    finally:
+        pipeline.stop()
+
+
+@cli.command("jobs")
+@click.argument("jobs_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("-p", "--processes", type=click.IntRange(min=1), default=None,
+              help="Jobs running at once (default: CPU count)")
+@click.option("--per-device", type=click.IntRange(min=1), default=None,
+              help="Jobs running at once on the same device (default: no extra limit)")
+@click.option("--summary-json", default=None, help="Write the aggregated run summary here")
+@click.option("-v", "--verbose", is_flag=True, help="Enable detailed DEBUG output")
+@click.option("--log-format", type=click.Choice(["text", "json"]), default="text",
+              help="Log file format (json writes one JSON object per line)")
+@click.option("--summary-only", is_flag=True, help="Log per-folder totals instead of one line per file")
+def jobs_command(jobs_file: str, processes: Optional[int], per_device: Optional[int],
+                 summary_json: Optional[str], verbose: bool, log_format: str,
+                 summary_only: bool) -> None:
+    """Organize every target listed in a jobs file on a process pool."""
+    import json
+    import time
+
+    import yaml
+
+    from organizer.jobs import load_jobs, run_jobs, summarize
+
+    log_level = env_log_level(verbose)
+    pipeline = setup_logging(log_level, log_format=log_format, summary_only=summary_only)
+    try:
+        try:
+            jobs, device_limits = load_jobs(jobs_file)
+        except (OSError, ValueError, yaml.YAMLError) as exc:
+            logging.error(f"Invalid jobs file {jobs_file}: {exc}")
+            raise click.Abort() from exc
+        logging.info(f"Running {len(jobs)} job(s) from {jobs_file}")
+        start = time.perf_counter()
+        results = run_jobs(jobs, run_job, processes=processes, per_device=per_device,
+                           device_limits=device_limits, log_handler=pipeline.handler)
+        summary = summarize(results, time.perf_counter() - start)
+        logging.info(f"Jobs done – {summary['succeeded']} succeeded, {summary['failed']} failed, "
+                     f"{summary['files']} file(s) in {summary['wall_s']:.2f}s")
+        for failure in summary["failures"]:
+            logging.error(f"  {failure['name']}: {failure['error']}")
+        if summary_json:
+            with open(summary_json, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+    finally:
+        pipeline.stop()
+    if summary["failed"]:
+        raise click.exceptions.Exit(1)
+
+
+@cli.command()
+@click.option("-d", "--directory", default=".", help="Directory to inventory")
+@click.option("-c", "--config", default="config.yaml", help="Path to config file")
+@click.option("--max-depth", type=click.IntRange(min=0), default=None,
+              help="Deepest directory level to read (default: unlimited)")
+@click.option("--scan-workers", type=click.IntRange(min=1), default=DEFAULT_SCAN_WORKERS,
+              help="Parallel directory reads")
+@click.option("--top", type=click.IntRange(min=0), default=DEFAULT_STATS_TOP, show_default=True,
+              help="Number of largest files to list")
+@click.option("--format", "fmt", type=click.Choice(STATS_FORMATS), default="table", show_default=True)
+@click.option("--cache", "cache_path", default=DEFAULT_STATS_CACHE, show_default=True,
+              help="sqlite file with per-directory summaries of every inventoried tree; "
+                   "unchanged directories are not re-read")
+@click.option("--no-cache", is_flag=True, help="Scan everything and keep no summary")
+@click.option("--full", is_flag=True, help="Rescan everything and rebuild the cache")
+def stats(directory: str, config: str, max_depth: Optional[int], scan_workers: int, top: int,
+          fmt: str, cache_path: str, no_cache: bool, full: bool) -> None:
+    """Per-category counts and bytes, largest files and an age histogram."""
+    from organizer.stats import collect_stats
+
+    _, rules = load_compiled_config(config)
+    try:
+        inventory = collect_stats(directory, rules, max_depth=max_depth, workers=scan_workers, top=top,
+                                  cache_path=None if no_cache else cache_path, full=full)
+    except OSError as exc:
+        raise click.ClickException(str(exc)) from exc
+    if fmt == "json":
+        import json
+
+        click.echo(json.dumps(inventory.to_dict(), indent=2))
+    else:
+        click.echo(inventory.format_table())
+
+
+@cli.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path())
+@click.option("-c", "--config", default="config.yaml", help="Path to config file")
+def explain(paths: Tuple[str, ...], config: str) -> None:
+    """Show which folder and rule each file would be organized by."""
+    _, rules = load_compiled_config(config)
+    for path in paths:
+        name = os.path.basename(os.path.normpath(path))
+        rule = rules.match_name(name, lambda: os.lstat(path) if os.path.lexists(path) else None)
+        if rule is None:
+            click.echo(f"{path} → {rules.default}/ (no rule matched)")
+        else:
+            click.echo(f"{path} → {rule.folder}/ (rule: {rule.name})")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,126 @@
+"""
+Name-collision strategies for planned moves.
+
+A collision is resolved against the in-memory name sets the planner already
+keeps (organizer.scanner.DirectoryCache): every destination folder is listed
+once and each planned move reserves its name, so picking ``photo (3).jpg``
+is a few set lookups instead of one ``exists()`` probe per candidate. The
+next free counter is remembered per destination name, so a busy folder
+receiving many copies of one name does not rescan candidates it has
+already handed out.
+
+Strategies:
+
+* ``skip`` – leave the file where it is (the default);
+* ``overwrite`` – replace the existing file, as a plain ``mv`` would;
+* ``overwrite-newer`` – replace the existing file if the incoming one has a
+  newer mtime; this costs one stat of the existing file per collision;
+* ``suffix`` – ``name (1).ext``, ``name (2).ext``, …;
+* ``timestamp`` – ``name-YYYYmmdd-HHMMSS.ext`` from the file's mtime, with a
+  counter if that is taken too;
+* ``hash`` – ``name-<8 hex digits of content hash>.ext``; if that name is
+  taken the same content is already there and the file is skipped.
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from organizer.defaults import COLLISION_STRATEGIES, DEFAULT_COLLISION_STRATEGY, SKIP_STRATEGY
+
+HASH_CHUNK = 1024 * 1024
+
+# probe(name) -> (dest_dir, taken); reserves the name when it is free.
+Probe = Callable[[str], Tuple[str, bool]]
+# (dest_dir, dest_name, replace), or None to skip the file.
+Resolution = Optional[Tuple[str, str, bool]]
+
+
+def split_name(name: str) -> Tuple[str, str]:
+    """Split ``name`` into stem and extension, keeping dotfiles whole."""
+    dot = name.rfind(".")
+    if dot <= 0:
+        return name, ""
+    return name[:dot], name[dot:]
+
+
+def content_tag(path: str) -> str:
+    """Short blake2b digest of a file's content, used by the ``hash`` strategy."""
+    import hashlib
+
+    h = hashlib.blake2b(digest_size=4)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CollisionResolver:
+    """Picks what happens to a file whose destination name is already taken."""
+
+    def __init__(self, strategy: str = DEFAULT_COLLISION_STRATEGY) -> None:
+        if strategy not in COLLISION_STRATEGIES:
+            raise ValueError(f"Unknown collision strategy: {strategy!r} "
+                             f"(expected one of {', '.join(COLLISION_STRATEGIES)})")
+        self.strategy = strategy
+        self._next: Dict[Tuple[str, str], int] = {}
+        self._replaced: Set[str] = set()
+        self.renamed = 0
+        self.replaced = 0
+
+    def resolve(self, entry: os.DirEntry, dest_dir: str, category_dir: str, probe: Probe) -> Resolution:
+        """Resolve ``entry`` colliding in ``dest_dir``; ``probe`` checks other names."""
+        strategy = self.strategy
+        if strategy == SKIP_STRATEGY:
+            return None
+        if strategy in ("overwrite", "overwrite-newer"):
+            return self._overwrite(entry, dest_dir, newer_only=strategy == "overwrite-newer")
+        stem, ext = split_name(entry.name)
+        if strategy == "hash":
+            name = f"{stem}-{content_tag(entry.path)}{ext}"
+            dest_dir, taken = probe(name)
+            if taken:
+                return None
+            self.renamed += 1
+            return dest_dir, name, False
+        if strategy == "timestamp":
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(entry.stat(follow_symlinks=False).st_mtime))
+            stem = f"{stem}-{stamp}"
+            dest_dir, taken = probe(stem + ext)
+            if not taken:
+                self.renamed += 1
+                return dest_dir, stem + ext, False
+        return self._counter(category_dir, stem, ext, probe)
+
+    def _counter(self, category_dir: str, stem: str, ext: str, probe: Probe) -> Resolution:
+        key = (category_dir, stem + ext)
+        n = self._next.get(key, 1)
+        while True:
+            name = f"{stem} ({n}){ext}"
+            dest_dir, taken = probe(name)
+            n += 1
+            if not taken:
+                self._next[key] = n
+                self.renamed += 1
+                return dest_dir, name, False
+
+    def _overwrite(self, entry: os.DirEntry, dest_dir: str, newer_only: bool) -> Resolution:
+        dst = os.path.join(dest_dir, entry.name)
+        # Only files that existed before the run are replaced, each at most
+        # once: a name reserved by an earlier entry of this plan is not on disk.
+        if dst in self._replaced:
+            return None
+        try:
+            existing = os.lstat(dst)
+        except FileNotFoundError:
+            return None
+        if stat.S_ISDIR(existing.st_mode):
+            return None
+        if newer_only and entry.stat(follow_symlinks=False).st_mtime_ns <= existing.st_mtime_ns:
+            return None
+        self._replaced.add(dst)
+        self.replaced += 1
+        return dest_dir, entry.name, True
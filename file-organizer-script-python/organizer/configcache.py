@@ -0,0 +1,119 @@
+"""
+Binary cache of the parsed and compiled configuration.
+
+Parsing ``config.yaml`` means importing PyYAML and running its pure-Python
+loader, which dominates start-up for the short runs a cron or watch job
+makes. The parsed config dict and its compiled RuleSet are therefore
+pickled under the user's cache directory, keyed by the config file's
+path, mtime, size, inode and ctime (plus the rule engine's own mtime and
+a format version). A hit is one stat and one small read; yaml is not
+imported at all. Any miss or unreadable cache falls back to parsing and
+rewrites the cache atomically.
+
+The cache lives in ``$FILE_ORGANIZER_CACHE_DIR`` if set (an empty value
+disables caching), else ``$XDG_CACHE_HOME/file-organizer`` or
+``~/.cache/file-organizer``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import zlib
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from organizer import rules as rules_module
+from organizer.rules import RuleSet
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+CACHE_DIR_ENV = "FILE_ORGANIZER_CACHE_DIR"
+
+
+class CompiledConfig(NamedTuple):
+    """A parsed config and the RuleSet compiled from it."""
+
+    config: Dict
+    rules: RuleSet
+
+
+def cache_dir() -> Optional[str]:
+    """Directory holding cached configs, or None when caching is disabled."""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured is not None:
+        return configured or None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "file-organizer")
+
+
+def _cache_key(path: str, st: os.stat_result) -> Tuple:
+    engine = os.stat(rules_module.__file__).st_mtime_ns
+    return (CACHE_VERSION, path, st.st_mtime_ns, st.st_size, st.st_ino, st.st_ctime_ns, engine)
+
+
+def _cache_file(directory: str, path: str) -> str:
+    # The full path is part of the stored key, so a crc clash only costs a miss.
+    return os.path.join(directory, f"config-{zlib.crc32(os.fsencode(path)):08x}.pickle")
+
+
+def parse_config(path: str) -> Dict:
+    """Parse a YAML config file (missing file → empty config)."""
+    if not os.path.isfile(path):
+        logger.warning(f"Config not found: {path} → using defaults")
+        return {}
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_compiled(path: str) -> CompiledConfig:
+    """Return the config at ``path`` and its compiled rules, from cache when fresh.
+
+    Raises:
+        yaml.YAMLError: If the config cannot be parsed.
+        ValueError: If its rules are invalid.
+    """
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        config = parse_config(path)
+        return CompiledConfig(config, RuleSet.from_config(config))
+
+    directory = cache_dir()
+    key = _cache_key(path, st)
+    if directory is not None:
+        cache_file = _cache_file(directory, path)
+        try:
+            with open(cache_file, "rb") as f:
+                cached_key, compiled = pickle.load(f)
+            if cached_key == key:
+                return compiled
+        except FileNotFoundError:
+            pass
+        except Exception as exc:  # stale format, truncated file, …
+            logger.debug(f"Ignoring unreadable config cache {cache_file}: {exc}")
+
+    config = parse_config(path)
+    compiled = CompiledConfig(config, RuleSet.from_config(config))
+    if directory is not None:
+        _store(cache_file, key, compiled)
+    return compiled
+
+
+def _store(cache_file: str, key: Tuple, compiled: CompiledConfig) -> None:
+    tmp = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_file), mode=0o700, exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump((key, compiled), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+    except OSError as exc:
+        logger.debug(f"Could not write config cache {cache_file}: {exc}")
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
@@ -0,0 +1,286 @@
+"""
+Cross-device move engine.
+
+Used when os.rename fails with EXDEV because a category folder sits on a
+different mount. Data is copied in-kernel with os.copy_file_range or
+os.sendfile where available (large buffered copies otherwise) into a
+temporary name, verified, fsync'ed and atomically renamed into place. The
+source is only removed once the copy is committed, so a failure never leaves
+a half-written file under the final name or loses the original. Where the
+destination must not be replaced, the copy is hardlinked to its final name
+instead of renamed, which fails rather than overwrite a file that appeared
+there after the move was planned.
+"""
+
+from __future__ import annotations
+
+import errno
+import glob
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from organizer.defaults import DEFAULT_COPY_WORKERS
+from organizer.metrics import NULL_METRICS, RunMetrics
+
+if TYPE_CHECKING:
+    from organizer.throttle import IOBudget
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK = 8 * 1024 * 1024
+PROGRESS_EVERY = 256 * 1024 * 1024
+
+# errno values meaning "this filesystem has no hardlinks"
+_NO_LINKS = {errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+# errno values meaning "this copy primitive is not usable for these files"
+_UNSUPPORTED = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP,
+                errno.ENOTSUP, errno.EBADF, errno.EPERM}
+
+ProgressCallback = Callable[[int], None]
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, progress: ProgressCallback) -> int:
+    copied = 0
+    while True:
+        n = os.copy_file_range(src_fd, dst_fd, COPY_CHUNK)
+        if n == 0:
+            return copied
+        copied += n
+        progress(copied)
+
+
+def _sendfile(src_fd: int, dst_fd: int, progress: ProgressCallback) -> int:
+    copied = 0
+    while True:
+        n = os.sendfile(dst_fd, src_fd, copied, COPY_CHUNK)
+        if n == 0:
+            return copied
+        copied += n
+        progress(copied)
+
+
+def _buffered(src_fd: int, dst_fd: int, progress: ProgressCallback) -> int:
+    copied = 0
+    buf = bytearray(COPY_CHUNK)
+    view = memoryview(buf)
+    with open(src_fd, "rb", buffering=0, closefd=False) as src:
+        while True:
+            n = src.readinto(buf)
+            if not n:
+                return copied
+            written = 0
+            while written < n:
+                written += os.write(dst_fd, view[written:n])
+            copied += n
+            progress(copied)
+
+
+def _copy_data(src_fd: int, dst_fd: int, progress: ProgressCallback) -> int:
+    """Copy all data, trying zero-copy primitives before the buffered loop."""
+    strategies = []
+    if hasattr(os, "copy_file_range"):
+        strategies.append(_copy_file_range)
+    if hasattr(os, "sendfile"):
+        strategies.append(_sendfile)
+    for strategy in strategies:
+        try:
+            return strategy(src_fd, dst_fd, progress)
+        except OSError as exc:
+            # Only fall back if nothing was written yet.
+            if exc.errno not in _UNSUPPORTED or os.lseek(dst_fd, 0, os.SEEK_CUR) != 0:
+                raise
+            logger.debug(f"{strategy.__name__} unavailable ({exc}), falling back")
+    return _buffered(src_fd, dst_fd, progress)
+
+
+def fsync_dir(path: str) -> None:
+    """Make a rename or create in ``path`` durable."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _partial_name(dst: str, pid: object) -> str:
+    return os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.{pid}.part")
+
+
+def remove_partial_copies(dst: str) -> int:
+    """Delete temporary files left by interrupted copies to ``dst``. Returns how many."""
+    removed = 0
+    for path in glob.glob(_partial_name(glob.escape(dst), "*")):
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+            removed += 1
+    return removed
+
+
+def _commit(tmp: str, dst: str, replace: bool) -> None:
+    if replace:
+        os.rename(tmp, dst)
+        return
+    try:
+        os.link(tmp, dst)
+    except OSError as exc:
+        if exc.errno not in _NO_LINKS:
+            raise
+        # No hardlinks here: only a check, so a file appearing in between is lost.
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst) from None
+        os.rename(tmp, dst)
+        return
+    os.unlink(tmp)
+
+
+def move_across_devices(src: str, dst: str, progress: Optional[ProgressCallback] = None,
+                        replace: bool = True) -> int:
+    """Copy ``src`` to ``dst`` on another device, then remove ``src``. Returns bytes copied.
+
+    Unless ``replace`` is set an existing ``dst`` is not overwritten.
+
+    Raises:
+        FileExistsError: If ``dst`` exists and ``replace`` is not set; the
+            temporary file is removed and ``src`` is left untouched.
+        OSError: If the copy fails or its size does not match the source; the
+            temporary file is removed and ``src`` is left untouched.
+    """
+    if os.path.islink(src):
+        shutil.move(src, dst)
+        return 0
+
+    dst_dir = os.path.dirname(dst)
+    tmp = _partial_name(dst, os.getpid())
+    progress = progress or (lambda copied: None)
+
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        expected = os.fstat(src_fd).st_size
+        dst_fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            copied = _copy_data(src_fd, dst_fd, progress)
+            if copied != expected:
+                raise OSError(errno.EIO, f"Short copy ({copied} of {expected} bytes)", src)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+        shutil.copystat(src, tmp)
+        _commit(tmp, dst, replace)
+        fsync_dir(dst_dir)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+    finally:
+        os.close(src_fd)
+
+    os.unlink(src)
+    return copied
+
+
+class CopyPool:
+    """Runs cross-device moves on a bounded thread pool.
+
+    ``submit`` blocks once ``2 * workers`` copies are queued, so a run made
+    entirely of cross-device moves never buffers the whole plan. ``join``
+    waits for everything and re-raises the first failure. With a ``budget``
+    every copied chunk is charged to its bandwidth limit.
+    """
+
+    def __init__(self, workers: int = DEFAULT_COPY_WORKERS, metrics: RunMetrics = NULL_METRICS,
+                 budget: Optional[IOBudget] = None) -> None:
+        self.workers = max(1, workers)
+        self.metrics = metrics
+        self.budget = budget
+        self.bytes_copied = 0
+        self.skipped = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.workers * 2)
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+
+    def submit(self, src: str, dst: str, on_done: Optional[Callable[[], None]] = None,
+               replace: bool = True, on_skipped: Optional[Callable[[], None]] = None) -> None:
+        """Queue ``src`` to be moved to ``dst`` on another device.
+
+        ``on_done`` is called from the copier thread once the move is committed.
+        Unless ``replace`` is set a ``dst`` that exists by then is left alone:
+        the move is counted in ``skipped`` and ``on_skipped`` is called instead.
+        """
+        self._slots.acquire()
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="copier")
+            future = self._pool.submit(self._move, src, dst, on_done, replace, on_skipped)
+            future.add_done_callback(lambda _: self._slots.release())
+            self._futures.append(future)
+
+    def _move(self, src: str, dst: str, on_done: Optional[Callable[[], None]] = None, replace: bool = True,
+              on_skipped: Optional[Callable[[], None]] = None) -> int:
+        name = os.path.basename(dst)
+        folder = os.path.basename(os.path.dirname(dst))
+
+        next_report = PROGRESS_EVERY
+        charged = 0
+        budget = self.budget
+
+        def report(copied: int) -> None:
+            nonlocal next_report, charged
+            if budget is not None:
+                budget.copied(copied - charged)
+                charged = copied
+            if copied >= next_report:
+                logger.debug(f"Copying {name}: {copied // (1024 * 1024)} MiB")
+                next_report += PROGRESS_EVERY
+
+        try:
+            with self.metrics.phase("copy"):
+                size = move_across_devices(src, dst, report, replace)
+        except FileExistsError:
+            if replace:
+                raise
+            with self._lock:
+                self.skipped += 1
+            self.metrics.count("skipped")
+            if on_skipped is not None:
+                on_skipped()
+            else:
+                logger.warning("Skipped (appeared at destination): %s", name,
+                               extra={"event": "skipped", "file": name, "folder": folder})
+            return 0
+        with self._lock:
+            self.bytes_copied += size
+        self.metrics.count("bytes_copied", size)
+        self.metrics.count("copied")
+        if on_done is not None:
+            on_done()
+        logger.info("Moved: %s → %s/ (cross-device, %d bytes)", name, folder, size,
+                    extra={"event": "moved", "file": name, "folder": folder})
+        return size
+
+    def join(self) -> int:
+        """Wait for all queued copies. Returns how many completed."""
+        with self._lock:
+            futures, self._futures = self._futures, []
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        for future in futures:
+            future.result()
+        return len(futures)
+
+    def __enter__(self) -> "CopyPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.join()
+        except Exception:
+            if exc_type is None:
+                raise
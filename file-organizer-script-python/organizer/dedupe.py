@@ -0,0 +1,176 @@
+"""
+Staged duplicate detection for name collisions.
+
+When a file is skipped because its destination name already exists, the
+pair (source, existing destination) is checked in three cheap-to-expensive
+stages, each one only looking at candidates that survived the previous:
+
+1. size – from stat, no data read;
+2. partial hash – first and last PARTIAL_BLOCK bytes;
+3. full hash – only for pairs that still match.
+
+Hashing runs on a thread pool and every hash is cached by
+(device, inode, size, mtime), so a file is hashed at most once per stage.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from organizer.defaults import DUPLICATES_FOLDER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HASH_WORKERS = 4
+PARTIAL_BLOCK = 64 * 1024
+READ_CHUNK = 1024 * 1024
+
+Pair = Tuple[str, str]
+StatKey = Tuple[int, int, int, int]
+
+
+class HashCache:
+    """Partial/full hashes keyed by (device, inode, size, mtime), optionally persisted."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._hashes: Dict[Tuple[StatKey, str], str] = {}
+        self._fresh: Dict[Tuple[StatKey, str], str] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes (dev INTEGER, ino INTEGER, size INTEGER, "
+                "mtime_ns INTEGER, kind TEXT, digest TEXT NOT NULL, "
+                "PRIMARY KEY (dev, ino, size, mtime_ns, kind)) WITHOUT ROWID")
+            for *key, kind, digest in self._conn.execute("SELECT * FROM hashes"):
+                self._hashes[(tuple(key), kind)] = digest
+
+    def get(self, key: StatKey, kind: str) -> Optional[str]:
+        return self._hashes.get((key, kind))
+
+    def put(self, key: StatKey, kind: str, digest: str) -> None:
+        with self._lock:
+            self._hashes[(key, kind)] = digest
+            self._fresh[(key, kind)] = digest
+
+    def close(self) -> None:
+        """Persist new hashes (if backed by a file)."""
+        if self._conn is None:
+            return
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                                   (key + (kind, digest) for (key, kind), digest in self._fresh.items()))
+        self._conn.close()
+        self._conn = None
+
+
+class DuplicateFinder:
+    """Runs the size → partial hash → full hash stages over candidate pairs."""
+
+    def __init__(self, cache: Optional[HashCache] = None, workers: int = DEFAULT_HASH_WORKERS) -> None:
+        self.cache = cache or HashCache()
+        self.workers = max(1, workers)
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+    def _hash(self, path: str, key: StatKey, kind: str) -> str:
+        digest = self.cache.get(key, kind)
+        if digest is not None:
+            return digest
+        size = key[2]
+        h = hashlib.blake2b(digest_size=20)
+        read = 0
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            if kind == "partial":
+                h.update(os.pread(fd, PARTIAL_BLOCK, 0))
+                read = min(size, PARTIAL_BLOCK)
+                if size > PARTIAL_BLOCK:
+                    tail = max(PARTIAL_BLOCK, size - PARTIAL_BLOCK)
+                    h.update(os.pread(fd, PARTIAL_BLOCK, tail))
+                    read += size - tail
+            else:
+                while True:
+                    chunk = os.read(fd, READ_CHUNK)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    read += len(chunk)
+        finally:
+            os.close(fd)
+        digest = h.hexdigest()
+        self.cache.put(key, kind, digest)
+        with self._lock:
+            self.bytes_read += read
+        return digest
+
+    def _stage(self, pool: ThreadPoolExecutor, pairs: List[Tuple[Pair, StatKey, StatKey]],
+               kind: str) -> List[Tuple[Pair, StatKey, StatKey]]:
+        """Keep only pairs whose ``kind`` hashes match."""
+        jobs = {}
+        for (src, dst), src_key, dst_key in pairs:
+            for path, key in ((src, src_key), (dst, dst_key)):
+                if (key, kind) not in jobs:
+                    jobs[(key, kind)] = pool.submit(self._hash, path, key, kind)
+        return [p for p in pairs
+                if jobs[(p[1], kind)].result() == jobs[(p[2], kind)].result()]
+
+    def find(self, pairs: Iterable[Pair]) -> List[Pair]:
+        """Return the (source, destination) pairs that are byte-identical."""
+        candidates = []
+        for src, dst in pairs:
+            try:
+                s, d = os.stat(src), os.stat(dst)
+            except FileNotFoundError:
+                continue
+            if s.st_size != d.st_size or (s.st_dev, s.st_ino) == (d.st_dev, d.st_ino):
+                continue
+            candidates.append(((src, dst),
+                               (s.st_dev, s.st_ino, s.st_size, s.st_mtime_ns),
+                               (d.st_dev, d.st_ino, d.st_size, d.st_mtime_ns)))
+        if not candidates:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hasher") as pool:
+            candidates = self._stage(pool, candidates, "partial")
+            # Files no larger than the two partial blocks were read in full already.
+            small = [c for c in candidates if c[1][2] <= 2 * PARTIAL_BLOCK]
+            large = [c for c in candidates if c[1][2] > 2 * PARTIAL_BLOCK]
+            confirmed = small + self._stage(pool, large, "full")
+        return [pair for pair, _, _ in confirmed]
+
+
+def resolve_duplicates(duplicates: Iterable[Pair], action: str, duplicates_dir: str) -> int:
+    """Apply ``action`` to each duplicate source file. Returns how many were handled."""
+    handled = 0
+    for src, dst in duplicates:
+        name = os.path.basename(src)
+        if action == "delete":
+            os.unlink(src)
+        elif action == "hardlink":
+            tmp = f"{src}.{os.getpid()}.link"
+            try:
+                os.link(dst, tmp)
+            except OSError as exc:
+                logger.warning(f"Duplicate kept (cannot hardlink {name}: {exc})")
+                continue
+            os.replace(tmp, src)
+        elif action == "move":
+            os.makedirs(duplicates_dir, exist_ok=True)
+            target = os.path.join(duplicates_dir, name)
+            if os.path.lexists(target):
+                logger.warning(f"Duplicate kept (name taken in {DUPLICATES_FOLDER}/): {name}")
+                continue
+            os.rename(src, target)
+        logger.info("Duplicate (%s): %s = %s", action, src, dst,
+                    extra={"event": f"duplicate_{action}", "file": name,
+                           "folder": os.path.basename(os.path.dirname(dst))})
+        handled += 1
+    return handled
@@ -0,0 +1,34 @@
+"""
+Defaults shared by the engine modules and the CLI.
+
+Kept free of imports so that main.py can build its command-line options
+without loading the modules behind them; every module imports the
+defaults it uses from here.
+"""
+
+DEFAULT_COPY_WORKERS = 4
+DEFAULT_SCAN_WORKERS = 8
+DEFAULT_INDEX_PATH = "file_organizer_index.sqlite3"
+DEFAULT_SNIFF_CACHE = "file_organizer_sniff.sqlite3"
+DEFAULT_HASH_CACHE = "file_organizer_hashes.sqlite3"
+DEFAULT_JOURNAL_PATH = "file_organizer_journal.jsonl"
+DEFAULT_STATE_DIR = "file_organizer_state"
+DEFAULT_STATS_CACHE = DEFAULT_STATE_DIR + "/stats.sqlite3"
+DEFAULT_SHARD_PATTERN = "{hash:0:2}/{hash:2:4}"
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_MAX_DELAY = 5.0
+
+DUPLICATES_FOLDER = "Duplicates"
+DUPLICATE_ACTIONS = ("report", "delete", "hardlink", "move")
+
+SKIP_STRATEGY = "skip"
+COLLISION_STRATEGIES = (SKIP_STRATEGY, "overwrite", "overwrite-newer", "suffix", "timestamp", "hash")
+DEFAULT_COLLISION_STRATEGY = SKIP_STRATEGY
+
+OUTPUT_FORMATS = ("ndjson", "csv")
+
+RUN_ORDERS = ("directory", "oldest", "largest")
+DEFAULT_RUN_ORDER = "directory"
+
+STATS_FORMATS = ("table", "json")
+DEFAULT_STATS_TOP = 10
@@ -0,0 +1,492 @@
+"""
+Organize engine: config loading and the top-level organize run.
+
+Everything here is free of click and of logging setup, so the engine can
+be embedded in a long-running process (see organizer.api) as well as
+driven by the command line (organizer.cli). Log records go to module
+loggers only; configuring handlers is left to the application.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AbstractSet, Any, Callable, Dict, Optional, Tuple, Union
+
+from organizer.defaults import (DEFAULT_COLLISION_STRATEGY, DEFAULT_COPY_WORKERS, DEFAULT_RUN_ORDER,
+                                DEFAULT_SCAN_WORKERS, DEFAULT_SHARD_PATTERN, DUPLICATES_FOLDER)
+
+# Engine modules are imported where they are used, so that a short run
+# only pays for what it touches (see benchmarks/startup_bench.py).
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from organizer.jobs import Job, JobResult
+    from organizer.metrics import RunMetrics
+    from organizer.output import RecordWriter
+    from organizer.plan import MovePlan
+    from organizer.rules import RuleSet
+    from organizer.shard import ShardLayout
+    from organizer.slices import SliceBudget
+    from organizer.sniff import ContentSniffer
+    from organizer.throttle import IOBudget, ThrottleSettings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OrganizeResult:
+    """Outcome of organizing one target directory."""
+
+    target: str
+    ok: bool = True
+    dry_run: bool = False
+    files: int = 0  # plan entries: moves and skips
+    planned: int = 0  # moves in the plan
+    moved: int = 0  # moves executed (0 in a dry run)
+    skipped: int = 0
+    renamed: int = 0
+    replaced: int = 0
+    duplicates: int = 0
+    duration_s: float = 0.0
+    error: Optional[str] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    stopped: bool = False  # a max_files/max_seconds budget ran out
+    remaining: int = 0  # planned moves left for the next slice
+    remaining_s: Optional[float] = None  # estimated time for them at this slice's rate
+    linked: int = 0  # view links created (hard and symbolic)
+    pruned: int = 0  # stale view links removed
+
+    @property
+    def processed(self) -> int:
+        """Files this run handled: plan entries, or only the moves made when a budget stopped it."""
+        return self.moved if self.stopped else self.files
+
+
+def load_config(config_path: Union[str, Path] = "config.yaml") -> Dict:
+    """Load YAML config safely – returns empty dict if missing.
+
+    Served from the compiled-config cache when the file is unchanged
+    (organizer.configcache), so yaml is not even imported.
+    """
+    from organizer.configcache import load_compiled
+
+    return load_compiled(str(config_path)).config
+
+
+def load_compiled_config(config_path: Union[str, Path]) -> Tuple[Dict, RuleSet]:
+    """Load a config and its compiled rules, from the cache when unchanged."""
+    from organizer.configcache import load_compiled
+
+    return load_compiled(str(config_path))
+
+
+def build_extension_map(config: Dict) -> Dict[str, str]:
+    """Create lowercase extension → folder mapping from config groups."""
+    mapping: Dict[str, str] = {}
+    for folder, extensions in config.get("extension_groups", {}).items():
+        for ext in extensions:
+            mapping[ext.lower()] = folder
+    return mapping
+
+
+def build_rules(config: Dict) -> RuleSet:
+    """Compile the ``rules`` and ``extension_groups`` config sections into a RuleSet."""
+    from organizer.rules import RuleSet
+
+    return RuleSet.from_config(config)
+
+
+def build_shard_layout(config: Dict) -> Optional[ShardLayout]:
+    """Create the sharded-layout policy from the ``sharding`` config section, if any."""
+    sharding = config.get("sharding") or {}
+    thresholds = sharding.get("thresholds") or {}
+    if not thresholds:
+        return None
+    from organizer.shard import ShardLayout
+
+    return ShardLayout({folder: int(n) for folder, n in thresholds.items()},
+                       sharding.get("pattern", DEFAULT_SHARD_PATTERN))
+
+
+def collision_strategy(config: Dict, override: Optional[str] = None) -> str:
+    """Collision strategy from the command line, else the ``collisions`` config key."""
+    return override or config.get("collisions") or DEFAULT_COLLISION_STRATEGY
+
+
+def throttle_settings(config: Dict, **overrides) -> Optional[ThrottleSettings]:
+    """I/O budget and priority from the ``throttle`` config section and command-line overrides."""
+    section = config.get("throttle") or {}
+    if not section and all(value is None for value in overrides.values()):
+        return None
+    from organizer.throttle import ThrottleSettings
+
+    return ThrottleSettings.from_config(section, **overrides)
+
+
+def start_throttle(config: Dict, **overrides) -> Optional[IOBudget]:
+    """Apply the configured process priority and return the run's I/O budget, if any."""
+    settings = throttle_settings(config, **overrides)
+    if settings is None:
+        return None
+    settings.apply_priority()
+    return settings.budget()
+
+
+def entry_classifier(rules: Union[Dict[str, str], RuleSet],
+                     sniffer: Optional[ContentSniffer] = None) -> Callable[[os.DirEntry], str]:
+    """Build the per-file classifier: compiled rules, then content sniffing on a miss."""
+    from organizer.rules import RuleSet
+
+    if not isinstance(rules, RuleSet):
+        rules = RuleSet.from_mapping(rules)
+    rules.refresh()
+    if sniffer is None:
+        return rules.entry_classifier()
+
+    def classify_entry(entry: os.DirEntry) -> str:
+        rule = rules.match(entry)
+        if rule is not None:
+            return rule.folder
+        return sniffer.classify(entry) or rules.default
+
+    return classify_entry
+
+
+def organize_target(
+    target: Union[str, Path],
+    mapping: Union[Dict[str, str], RuleSet],
+    dry_run: bool = False,
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    flatten: bool = True,
+    scan_workers: int = DEFAULT_SCAN_WORKERS,
+    workers: int = 1,
+    copy_workers: int = DEFAULT_COPY_WORKERS,
+    index_path: Optional[str] = None,
+    full: bool = False,
+    only_names: Optional[AbstractSet[str]] = None,
+    sniff_cache: Optional[str] = None,
+    duplicates: Optional[str] = None,
+    hash_cache: Optional[str] = None,
+    metrics: Optional[RunMetrics] = None,
+    journal_path: Optional[str] = None,
+    sharding: Optional[ShardLayout] = None,
+    collisions: str = DEFAULT_COLLISION_STRATEGY,
+    output: Optional[RecordWriter] = None,
+    budget: Optional[IOBudget] = None,
+    fd_relative: bool = False,
+    max_files: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    order: str = DEFAULT_RUN_ORDER,
+    view_root: Optional[str] = None,
+) -> OrganizeResult:
+    """Core logic – moves files to correct folders. Returns an OrganizeResult.
+
+    Failures are raised, not folded into the result.
+
+    ``mapping`` is a compiled RuleSet (see build_rules) or a plain
+    ``extension → folder`` dict.
+    With ``recursive`` the whole tree is walked in parallel. ``flatten`` sends
+    every file to the root category folders; otherwise each directory gets
+    its own category folders. Category folders are never rescanned.
+
+    Work runs in two phases: a move plan is built first and then executed;
+    ``dry_run`` only logs the plan. ``workers`` keeps that many filesystem
+    operations in flight while executing; moves onto another mount are
+    copied by ``copy_workers`` parallel copies.
+
+    With ``index_path`` a persistent index lets re-runs skip directories
+    whose mtime is unchanged and files already classified; ``full`` forces
+    a complete rescan that rebuilds it. ``only_names`` restricts the run to
+    those top-level file names (used by the watcher for each batch).
+    ``sniff_cache`` enables content sniffing for files whose extension is
+    not mapped, caching results in that sqlite file.
+
+    ``duplicates`` (report/delete/hardlink/move) checks files skipped for a
+    name collision for byte-identical content and handles those; in a dry
+    run duplicates are only reported.
+
+    ``metrics`` collects per-phase timers and counters; without it metrics
+    are only gathered when a hook is registered (organizer.metrics).
+
+    ``journal_path`` records every planned move in a write-ahead journal
+    before executing, so an interrupted run can be resumed or undone
+    (organizer.journal). ``sharding`` spreads category folders past their
+    configured size over hashed subfolders (organizer.shard).
+
+    ``collisions`` picks what happens when a destination name is taken:
+    skip, overwrite, overwrite-newer, suffix, timestamp or hash (organizer.collisions).
+
+    ``output`` receives one record per file (organizer.output): the planned
+    action in a dry run, the outcome of each move otherwise.
+
+    ``budget`` caps the executor's metadata operations and copy bandwidth
+    (organizer.throttle); it may be shared by successive runs.
+
+    ``fd_relative`` moves files with renameat relative to directory fds
+    opened once per directory (organizer.fdops): no per-file path
+    resolution, immune to renames above the target and, on Linux, never
+    overwriting a file that appeared at the destination after planning.
+
+    ``max_files`` and ``max_seconds`` budget the run (organizer.slices): it
+    stops once either is spent and the journal (``journal_path``, else a
+    per-target file under DEFAULT_STATE_DIR) is left as a cursor that the
+    next budgeted run continues from before scanning again. ``order`` executes the plan
+    oldest-first, largest-first or in directory order; the result carries
+    the moves left and an estimate of the time they need.
+
+    ``view_root`` leaves ``target`` untouched and instead syncs a link view
+    of it there (organizer.view): hardlinks on the same device, symlinks
+    otherwise; new files are linked and links to vanished files pruned.
+    Journals, indexes, budgets, duplicates and output records do not apply.
+    """
+    from organizer.collisions import CollisionResolver
+    from organizer.fdops import fd_root
+    from organizer.metrics import metrics_for
+    from organizer.plan import SKIP, build_plan, execute_plan, log_plan
+    from organizer.rules import RuleSet
+    from organizer.slices import SliceBudget
+    from organizer.walker import walk_tree
+
+    start = time.perf_counter()
+    metrics = metrics_for("organize", metrics)
+    target = os.path.realpath(os.path.expanduser(target))
+    if not os.path.isdir(target):
+        raise NotADirectoryError(f"Target directory does not exist: {target}")
+
+    if view_root is not None and (journal_path or index_path or duplicates or output is not None
+                                  or max_files is not None or max_seconds is not None):
+        raise ValueError("A link view cannot be combined with journals, indexes, duplicates, "
+                         "output records or budgets")
+
+    rules = mapping if isinstance(mapping, RuleSet) else RuleSet.from_mapping(mapping)
+    resolver = CollisionResolver(collisions)
+    index = sniffer = journal = None
+    if sniff_cache:
+        from organizer.sniff import ContentSniffer
+
+        sniffer = ContentSniffer(set(rules.folders), sniff_cache)
+    if index_path:
+        from organizer.index import ScanIndex
+
+        settings = {"rules": rules.signature(), "flatten": flatten, "recursive": recursive,
+                    "sniff": bool(sniff_cache), "collisions": collisions,
+                    "sharding": sharding and [sharding.thresholds, sharding.pattern.pattern]}
+        index = ScanIndex(index_path, target, settings, full=full)
+
+    result = OrganizeResult(target, dry_run=dry_run)
+    limit = None if dry_run else SliceBudget.create(max_files, max_seconds)
+    executing = 0.0
+    reporter = None
+    if output is not None:
+        from organizer.output import RecordReporter
+
+        reporter = RecordReporter(output, rules, collisions)
+    try:
+        if view_root is not None:
+            from organizer.view import sync_view
+
+            synced = sync_view(target, view_root, entry_classifier(rules, sniffer), recursive, max_depth,
+                               flatten, scan_workers, dry_run, metrics)
+            result.files = result.planned = synced.files
+            result.skipped = synced.skipped
+            result.linked, result.pruned = synced.linked + synced.symlinked, synced.pruned
+            logger.info(f"View {view_root}: {synced.linked} hardlink(s), {synced.symlinked} symlink(s) "
+                        f"created, {synced.pruned} pruned, {synced.kept} up to date")
+            result.duration_s = round(time.perf_counter() - start, 6)
+            return result
+        if limit is not None:
+            from organizer.journal import continue_run
+            from organizer.slices import cursor_path
+
+            journal_path = journal_path or cursor_path(target)
+            begun = time.perf_counter()
+            with metrics.phase("execute"):
+                continued = continue_run(journal_path, target, limit, workers, copy_workers, metrics,
+                                         budget, reporter, fd_relative)
+            executing += time.perf_counter() - begun
+            if continued is not None:
+                result.moved, result.remaining = continued
+                result.files = result.planned = result.moved + result.remaining
+                if limit.stopped:
+                    return _slice_done(result, limit, journal_path, metrics, start, executing)
+        categories = {folder.split("/")[0] for folder in rules.folders}
+        categories |= {rules.default, DUPLICATES_FOLDER}
+        tree = walk_tree(target, categories, skip_nested=not flatten,
+                         max_depth=max_depth if recursive else 0,
+                         workers=scan_workers if recursive else 1, index=index, metrics=metrics)
+        if only_names is not None:
+            tree = ((folder, [e for e in files if e.name in only_names]) for folder, files in tree)
+
+        keys = None
+        if order != DEFAULT_RUN_ORDER:
+            from array import array
+
+            from organizer.slices import keyed_tree
+
+            keys = array("d")
+            tree = keyed_tree(tree, order, keys)
+
+        root = target if flatten else None
+        with metrics.phase("plan"):
+            plan = build_plan(tree, entry_classifier(rules, sniffer), root, metrics, sharding, resolver)
+            if keys is not None:
+                from organizer.slices import plan_order
+
+                plan.reorder(plan_order(keys))
+        if sniffer is not None:
+            sniffer.close()
+            logger.debug(f"Content sniffing read {sniffer.reads} file header(s)")
+        result.files += len(plan)
+        result.planned += plan.moves
+        result.skipped = plan.skips
+        result.renamed, result.replaced = resolver.renamed, resolver.replaced
+        log_plan(plan, entries=dry_run)
+        if reporter is not None and dry_run:
+            with metrics.phase("output"):
+                reporter.planned(plan)
+        if not dry_run:
+            if journal_path:
+                from organizer.journal import MoveJournal
+
+                with metrics.phase("journal"):
+                    journal = MoveJournal.create(journal_path, target)
+                    journal.record_plan(plan)
+            waited = 0.0 if budget is None else budget.waited
+            taken = 0 if limit is None else limit.taken
+            begun = time.perf_counter()
+            with metrics.phase("execute"):
+                result.moved += execute_plan(plan, workers=workers, copy_workers=copy_workers,
+                                             metrics=metrics, journal=journal, report=reporter,
+                                             budget=budget, fd_root=fd_root(target, fd_relative),
+                                             limit=limit)
+            executing += time.perf_counter() - begun
+            if budget is not None:
+                metrics.add_time("throttled", budget.waited - waited)
+            if limit is not None:
+                result.remaining = plan.moves - (limit.taken - taken)
+                if not limit.stopped:
+                    journal.finish(force=True)
+            elif journal is not None:
+                journal.finish()
+            if sharding is not None:
+                sharding.commit()
+        if duplicates and plan.skips:
+            with metrics.phase("dedupe"):
+                found = handle_duplicates(plan, "report" if dry_run else duplicates,
+                                          os.path.join(target, DUPLICATES_FOLDER), hash_cache)
+            metrics.count("duplicates", found)
+            result.duplicates = found
+        if limit is not None and limit.stopped:
+            # Files this slice never reached must not be recorded as handled.
+            return _slice_done(result, limit, journal_path, metrics, start, executing)
+        if not dry_run and index is not None:
+            with metrics.phase("index"):
+                for item in plan:
+                    if item.action == SKIP:
+                        index.note_file(item.src_dir, item.name)
+                index.commit()
+        result.duration_s = round(time.perf_counter() - start, 6)
+        return result
+    except Exception as exc:
+        metrics.error(exc)
+        raise
+    finally:
+        if sniffer is not None:
+            sniffer.close()
+        if index is not None:
+            index.close()
+        if journal is not None:
+            journal.close()
+        metrics.finish()
+
+
+def _slice_done(result: OrganizeResult, limit: SliceBudget, cursor: str, metrics: RunMetrics,
+                start: float, executing: float) -> OrganizeResult:
+    """Finish the result of a run whose budget ran out."""
+    from organizer.slices import estimate_seconds
+
+    metrics.count("remaining", result.remaining)
+    result.stopped = True
+    result.remaining_s = estimate_seconds(result.moved, executing, result.remaining)
+    eta = "" if result.remaining_s is None else f" (~{result.remaining_s:g}s at this rate)"
+    logger.info(f"Budget spent after {limit.taken} move(s): {result.remaining} move(s) left{eta}; "
+                f"the next run continues from {cursor}")
+    result.duration_s = round(time.perf_counter() - start, 6)
+    return result
+
+
+def organize_directory(target: Union[str, Path], mapping: Union[Dict[str, str], RuleSet],
+                       dry_run: bool = False, **options) -> int:
+    """organize_target returning only the number of files processed (see OrganizeResult.processed)."""
+    return organize_target(target, mapping, dry_run, **options).processed
+
+
+def handle_duplicates(plan: MovePlan, action: str, duplicates_dir: str,
+                      hash_cache: Optional[str] = None) -> int:
+    """Find byte-identical files among the plan's skipped entries and apply ``action``."""
+    from organizer.dedupe import DuplicateFinder, HashCache, resolve_duplicates
+    from organizer.plan import SKIP
+
+    cache = HashCache(hash_cache)
+    try:
+        finder = DuplicateFinder(cache)
+        pairs = [(item.source, item.destination) for item in plan if item.action == SKIP]
+        found = finder.find(pairs)
+        logger.info(f"Duplicates: {len(found)} of {len(pairs)} skipped file(s) "
+                     f"({finder.bytes_read} bytes hashed)")
+        return resolve_duplicates(found, action, duplicates_dir)
+    finally:
+        cache.close()
+
+
+def run_journal(journal_path: str, undo: bool = False, workers: int = 1,
+                copy_workers: int = DEFAULT_COPY_WORKERS,
+                metrics: Optional[RunMetrics] = None, budget: Optional[IOBudget] = None,
+                fd_relative: bool = False) -> int:
+    """Resume (or with ``undo`` reverse) the run recorded in ``journal_path``."""
+    from organizer.journal import resume_run, undo_run
+    from organizer.metrics import metrics_for
+
+    metrics = metrics_for("undo" if undo else "resume", metrics)
+    try:
+        if undo:
+            return undo_run(journal_path, metrics)
+        return resume_run(journal_path, workers, copy_workers, metrics, budget, fd_relative)
+    except Exception as exc:
+        metrics.error(exc)
+        raise
+    finally:
+        metrics.finish()
+
+
+def run_job(job: Job) -> JobResult:
+    """Organize one jobs-file target (runs in a job-runner worker process)."""
+    from organizer.metrics import RunMetrics
+
+    start = time.perf_counter()
+    cfg, rules = load_compiled_config(job.config)
+    options = job.options
+    budget = start_throttle(cfg, **(options.get("throttle") or {}))
+    metrics = RunMetrics(f"job:{job.name}")
+    count = organize_directory(
+        job.directory, rules, options.get("dry_run", False),
+        recursive=options.get("recursive", False), max_depth=options.get("max_depth"),
+        flatten=options.get("layout", "flatten") == "flatten",
+        scan_workers=options.get("scan_workers", DEFAULT_SCAN_WORKERS),
+        workers=options.get("workers", 1),
+        copy_workers=options.get("copy_workers", DEFAULT_COPY_WORKERS),
+        index_path=options.get("index"), full=options.get("full", False),
+        sniff_cache=options.get("sniff"), duplicates=options.get("duplicates"),
+        hash_cache=options.get("hash_cache"), metrics=metrics,
+        journal_path=options.get("journal"), sharding=build_shard_layout(cfg),
+        collisions=collision_strategy(cfg, options.get("collisions")),
+        budget=budget, fd_relative=options.get("fd_relative", False),
+        max_files=options.get("max_files"), max_seconds=options.get("max_seconds"),
+        order=options.get("order", DEFAULT_RUN_ORDER), view_root=options.get("view"))
+    return {"name": job.name, "directory": job.directory, "ok": True, "count": count,
+            "error": None, "duration_s": round(time.perf_counter() - start, 6),
+            "metrics": metrics.summary()}
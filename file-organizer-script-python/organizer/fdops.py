@@ -0,0 +1,233 @@
+"""
+Directory-fd-relative moves.
+
+In fd mode the executor opens the run's root directory once and every
+source and destination directory once (relative to it), then moves each
+file with ``renameat(src_fd, name, dst_fd, name)``. The kernel resolves one
+path component per file instead of the whole absolute path, which matters
+for deep trees on NFS, and a directory renamed higher up the tree during
+the run no longer redirects or breaks the moves below it.
+
+On Linux the rename uses ``renameat2(..., RENAME_NOREPLACE)``, so a file
+that appeared at the destination after the plan was built is never
+overwritten: the move fails with EEXIST instead of relying on a separate
+existence check. Where renameat2 or the flag is unavailable (other
+platforms, old kernels, some network filesystems) a plain renameat is used.
+
+Open descriptors are cached with a limit; idle ones are closed least
+recently used first, so sharded layouts with many thousands of folders do
+not exhaust the process's fd table.
+"""
+
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FD_CACHE = 256
+RENAME_NOREPLACE = 1
+_DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_CLOEXEC", 0)
+
+_FS_ENCODING, _FS_ERRORS = sys.getfilesystemencoding(), sys.getfilesystemencodeerrors()
+
+_renameat2: Optional[Callable[..., int]] = None
+_renameat2_loaded = False
+_lock = threading.Lock()
+
+
+def supported() -> bool:
+    """Whether this platform can rename and mkdir relative to directory fds."""
+    return os.rename in os.supports_dir_fd and os.mkdir in os.supports_dir_fd and os.open in os.supports_dir_fd
+
+
+def fd_root(target: str, fd_relative: bool) -> Optional[str]:
+    """``target`` as the executor's fd root when fd mode is requested and supported."""
+    if not fd_relative:
+        return None
+    if not supported():
+        logger.warning("Directory-fd moves are not supported on this platform; using paths")
+        return None
+    return target
+
+
+def _load_renameat2() -> Optional[Callable[..., int]]:
+    global _renameat2, _renameat2_loaded
+    with _lock:
+        if not _renameat2_loaded:
+            _renameat2_loaded = True
+            if sys.platform.startswith("linux"):
+                import ctypes
+
+                func = getattr(ctypes.CDLL(None, use_errno=True), "renameat2", None)
+                if func is not None:
+                    func.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+                    func.restype = ctypes.c_int
+                    _renameat2 = func
+        return _renameat2
+
+
+def _disable_noreplace(reason: str) -> None:
+    global _renameat2
+    if _renameat2 is not None:
+        logger.debug(f"RENAME_NOREPLACE unavailable ({reason}); using plain renameat")
+        _renameat2 = None
+
+
+def rename_at(src_fd: int, name: str, dst_fd: int, new_name: str, replace: bool = False) -> None:
+    """Rename ``name`` in ``src_fd`` to ``new_name`` in ``dst_fd``.
+
+    Unless ``replace`` is set an existing destination is never overwritten
+    where the platform supports it.
+
+    Raises:
+        FileExistsError: If ``new_name`` already exists (RENAME_NOREPLACE).
+        OSError: For any other failure, including EXDEV across devices.
+    """
+    func = None if replace else _load_renameat2()
+    if func is not None:
+        import ctypes
+
+        if func(src_fd, name.encode(_FS_ENCODING, _FS_ERRORS), dst_fd,
+                new_name.encode(_FS_ENCODING, _FS_ERRORS), RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(err, os.strerror(err), name, None, new_name)
+        _disable_noreplace(os.strerror(err))
+    os.rename(name, new_name, src_dir_fd=src_fd, dst_dir_fd=dst_fd)
+
+
+class DirFds:
+    """Reference-counted cache of directory fds opened relative to a root.
+
+    Thread-safe: the concurrent executor acquires a source and destination
+    fd per move and releases them afterwards; only unreferenced fds are
+    ever closed.
+    """
+
+    def __init__(self, root: str, limit: int = DEFAULT_FD_CACHE) -> None:
+        self.root = os.path.abspath(root)
+        self.limit = max(2, limit)
+        self.opened = 0
+        self._root_fd = os.open(self.root, _DIR_FLAGS)
+        self._fds: "OrderedDict[str, int]" = OrderedDict()
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _relative(self, path: str) -> Optional[str]:
+        if path == self.root:
+            return "."
+        prefix = self.root.rstrip(os.sep) + os.sep
+        return path[len(prefix):] if path.startswith(prefix) else None
+
+    def _open(self, path: str, create: bool) -> int:
+        rel = self._relative(path)
+        if rel is None:
+            # Outside the root (e.g. a journal entry from another tree).
+            if create:
+                os.makedirs(path, exist_ok=True)
+            return os.open(path, _DIR_FLAGS)
+        if not create:
+            return os.open(rel, _DIR_FLAGS, dir_fd=self._root_fd)
+        fd = os.dup(self._root_fd)
+        try:
+            for part in rel.split(os.sep):
+                if part in ("", "."):
+                    continue
+                try:
+                    os.mkdir(part, dir_fd=fd)
+                except FileExistsError:
+                    pass
+                child = os.open(part, _DIR_FLAGS, dir_fd=fd)
+                os.close(fd)
+                fd = child
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def acquire(self, path: str, create: bool = False) -> int:
+        """Fd for directory ``path``, creating it (and its parents) with ``create``."""
+        with self._lock:
+            fd = self._fds.get(path)
+            if fd is not None:
+                self._fds.move_to_end(path)
+                self._refs[path] += 1
+                return fd
+        fd = self._open(path, create)
+        with self._lock:
+            existing = self._fds.get(path)
+            if existing is not None:  # another thread opened it meanwhile
+                os.close(fd)
+                fd = existing
+                self._fds.move_to_end(path)
+                self._refs[path] += 1
+            else:
+                self._fds[path] = fd
+                self._refs[path] = 1
+                self.opened += 1
+                self._evict()
+            return fd
+
+    def release(self, path: str) -> None:
+        with self._lock:
+            self._refs[path] -= 1
+            self._evict()
+
+    def acquire_pair(self, src: str, dst: str) -> Tuple[int, int]:
+        """``(acquire(src), acquire(dst))`` under one lock when both are open (the per-file case)."""
+        with self._lock:
+            fds = self._fds
+            src_fd, dst_fd = fds.get(src), fds.get(dst)
+            if src_fd is not None and dst_fd is not None:
+                refs = self._refs
+                refs[src] += 1
+                refs[dst] += 1
+                fds.move_to_end(src)
+                fds.move_to_end(dst)
+                return src_fd, dst_fd
+        src_fd = self.acquire(src)
+        try:
+            return src_fd, self.acquire(dst)
+        except BaseException:
+            self.release(src)
+            raise
+
+    def release_pair(self, src: str, dst: str) -> None:
+        with self._lock:
+            self._refs[src] -= 1
+            self._refs[dst] -= 1
+            if len(self._fds) > self.limit:
+                self._evict()
+
+    def _evict(self) -> None:
+        if len(self._fds) <= self.limit:
+            return
+        for path in [p for p in self._fds if self._refs[p] == 0]:
+            os.close(self._fds.pop(path))
+            del self._refs[path]
+            if len(self._fds) <= self.limit:
+                break
+
+    def close(self) -> None:
+        with self._lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+            self._refs.clear()
+            if self._root_fd >= 0:
+                os.close(self._root_fd)
+                self._root_fd = -1
+
+    def __enter__(self) -> "DirFds":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
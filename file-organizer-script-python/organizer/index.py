@@ -0,0 +1,208 @@
+"""
+Persistent incremental scan index (stdlib sqlite3).
+
+Remembers, per directory, the mtime seen before it was last listed and the
+names of its subdirectories, plus the files that were classified but left
+in place (e.g. skipped because the destination name was taken). On the next
+run a directory whose mtime is unchanged is not listed at all – only stat'ed
+– and in a changed directory only files not already recorded are planned.
+
+All lookups are served from memory (loaded once at open) so walker threads
+never touch the database; updates are buffered and written in a single
+transaction by ``commit()`` after a successful run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = "1"
+
+# A directory modified this close to the moment it was stat'ed may change
+# again within the same mtime tick, so its mtime is not trusted ("racy").
+RACY_WINDOW_NS = 2_000_000_000
+
+FileStamp = Tuple[int, int]  # (size, mtime_ns)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    subdirs TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+"""
+
+
+def _signature(root: str, settings: Dict) -> str:
+    st = os.stat(root)
+    blob = json.dumps([root, st.st_dev, st.st_ino, settings], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ScanIndex:
+    """In-memory view of the sqlite index with buffered updates."""
+
+    def __init__(self, path: str, root: str, settings: Optional[Dict] = None, full: bool = False) -> None:
+        """
+        Args:
+            path: sqlite file to use (created if missing).
+            root: Resolved target directory the index belongs to.
+            settings: Anything that changes classification (mapping, layout…);
+                a different value invalidates the stored index.
+            full: Ignore stored state and rebuild the index from this run.
+        """
+        self.path = path
+        self.signature = _signature(root, settings or {})
+        self._dirs: Dict[str, Tuple[int, List[str]]] = {}
+        self._entries: Dict[str, Dict[str, FileStamp]] = {}
+        self._seen_dirs: Dict[str, Tuple[int, List[str]]] = {}
+        self._kept: Dict[str, Dict[str, FileStamp]] = {}
+        self._lock = threading.Lock()
+        self._rebuild = True
+
+        self._conn = self._connect()
+        if full:
+            logger.info("Full rescan requested – rebuilding index")
+        elif self._is_valid():
+            self._load()
+            self._rebuild = False
+        else:
+            logger.info(f"Index {path} is stale or missing – rebuilding")
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            conn = sqlite3.connect(self.path)
+            if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise sqlite3.DatabaseError("quick_check failed")
+            conn.executescript(_SCHEMA)
+        except sqlite3.DatabaseError as exc:
+            logger.warning(f"Index {self.path} is corrupt ({exc}) – recreating")
+            conn.close()
+            os.remove(self.path)
+            conn = sqlite3.connect(self.path)
+            conn.executescript(_SCHEMA)
+        return conn
+
+    def _is_valid(self) -> bool:
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        return meta.get("schema") == SCHEMA_VERSION and meta.get("signature") == self.signature
+
+    def _load(self) -> None:
+        for path, mtime_ns, subdirs in self._conn.execute("SELECT path, mtime_ns, subdirs FROM dirs"):
+            self._dirs[path] = (mtime_ns, subdirs.split("\0") if subdirs else [])
+        for directory, name, size, mtime_ns in self._conn.execute(
+                "SELECT dir, name, size, mtime_ns FROM entries"):
+            self._entries.setdefault(directory, {})[name] = (size, mtime_ns)
+
+    # -- lookups (thread-safe, memory only) ---------------------------------
+
+    def unchanged_subdirs(self, path: str, mtime_ns: int) -> Optional[List[str]]:
+        """Stored subdirectory names if ``path`` is unchanged since last run, else None."""
+        known = self._dirs.get(path)
+        if known is None or known[0] != mtime_ns or mtime_ns < 0:
+            return None
+        return known[1]
+
+    def new_files(self, path: str, files: Iterable[os.DirEntry]) -> List[os.DirEntry]:
+        """Drop files already recorded for ``path`` with the same size and mtime."""
+        known = self._entries.get(path)
+        if not known:
+            return list(files)
+        fresh: List[os.DirEntry] = []
+        kept: Dict[str, FileStamp] = {}
+        for entry in files:
+            stamp = known.get(entry.name)
+            if stamp is not None:
+                st = entry.stat()
+                if stamp == (st.st_size, st.st_mtime_ns):
+                    kept[entry.name] = stamp
+                    continue
+            fresh.append(entry)
+        with self._lock:
+            self._kept.setdefault(path, {}).update(kept)
+        return fresh
+
+    # -- buffered updates ---------------------------------------------------
+
+    def note_dir(self, path: str, mtime_ns: int, stat_time_ns: int, subdirs: List[str]) -> None:
+        """Record the pre-listing mtime and subdirectories of a directory just read."""
+        if stat_time_ns - mtime_ns < RACY_WINDOW_NS:
+            mtime_ns = -1
+        with self._lock:
+            self._seen_dirs[path] = (mtime_ns, subdirs)
+
+    def note_file(self, path: str, name: str) -> None:
+        """Record a file that was classified but left in ``path``."""
+        try:
+            st = os.stat(os.path.join(path, name))
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._kept.setdefault(path, {})[name] = (st.st_size, st.st_mtime_ns)
+
+    def _vanished(self) -> List[str]:
+        """Subdirectories stored for a rescanned directory that it no longer lists."""
+        gone: List[str] = []
+        for path, (_, subdirs) in self._seen_dirs.items():
+            known = self._dirs.get(path)
+            if known is not None:
+                listed = set(subdirs)
+                gone.extend(os.path.join(path, name) for name in known[1] if name not in listed)
+        return gone
+
+    def commit(self) -> None:
+        """Write buffered updates in one transaction.
+
+        Rows of subdirectories a rescanned parent no longer lists are
+        dropped with everything below them.
+        """
+        with self._lock, self._conn:
+            if self._rebuild:
+                self._conn.execute("DELETE FROM dirs")
+                self._conn.execute("DELETE FROM entries")
+            else:
+                # The subtree of each: the path itself and the range of paths below it.
+                subtrees = [(path, path + os.sep, path + chr(ord(os.sep) + 1)) for path in self._vanished()]
+                self._conn.executemany("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                                       subtrees)
+                self._conn.executemany("DELETE FROM entries WHERE dir = ? OR (dir >= ? AND dir < ?)",
+                                       subtrees)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dirs (path, mtime_ns, subdirs) VALUES (?, ?, ?)",
+                ((p, m, "\0".join(s)) for p, (m, s) in self._seen_dirs.items()))
+            self._conn.executemany("DELETE FROM entries WHERE dir = ?",
+                                   ((p,) for p in self._seen_dirs))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (dir, name, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                ((d, n, size, mtime) for d, names in self._kept.items()
+                 for n, (size, mtime) in names.items()))
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   [("schema", SCHEMA_VERSION), ("signature", self.signature),
+                                    ("updated", str(time.time()))])
+        logger.debug(f"Index updated: {len(self._seen_dirs)} director(y/ies) rescanned")
+        self._seen_dirs.clear()
+        self._kept.clear()
+        self._rebuild = False
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,280 @@
+"""
+Multi-target job runner.
+
+A jobs file lists many targets, each with its own config, and runs them
+from one process so interpreter, click, yaml and dotenv start-up is paid
+once. Jobs are spread over a process pool: each job runs in a worker
+process, so a crash or exception in one target is reported as that job's
+failure and the others carry on.
+
+Scheduling happens in the parent. A job is only handed to the pool when a
+worker is free (the global limit) and its target's device has fewer than
+its per-device limit of jobs running, so jobs that share a disk do not all
+hit it at once. Because nothing queues inside the pool, a worker that dies
+only fails the jobs that were running on it; the pool is then recreated.
+
+Worker processes forward their log records to the parent's logging
+pipeline over a multiprocessing queue, each message prefixed with the job
+name.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import yaml
+
+from organizer.defaults import DEFAULT_STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Per-job keys accepted in a jobs file, besides name/directory/config.
+JOB_OPTIONS = ("dry_run", "recursive", "max_depth", "layout", "scan_workers", "workers",
+               "copy_workers", "index", "full", "sniff", "duplicates", "hash_cache", "journal",
+               "collisions", "throttle", "fd_relative",
+               "max_files", "max_seconds", "order", "view")
+
+# Default file names for per-job state, under ``state_dir/<job name>/``.
+STATE_FILES = {"index": "index.sqlite3", "journal": "journal.jsonl",
+               "sniff": "sniff.sqlite3", "hash_cache": "hashes.sqlite3"}
+
+JobResult = Dict[str, Any]
+
+
+@dataclass
+class Job:
+    """One target directory to organize with its own config."""
+
+    name: str
+    directory: str
+    config: str = "config.yaml"
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_jobs(path: str) -> Tuple[List[Job], Dict[str, int]]:
+    """Read a jobs file. Returns ``(jobs, device_limits)``.
+
+    Relative paths are resolved against the jobs file's directory.
+    ``defaults`` apply to every job; ``device_limits`` maps a path on a
+    device to the number of jobs allowed to run on it at once. State files
+    (``index``, ``journal``, ``sniff``, ``hash_cache``) given as ``true``
+    are kept per job under ``state_dir`` (default ``file_organizer_state/``
+    next to the jobs file), never inside the target being organized.
+    Jobs with ``max_files`` or ``max_seconds`` always get a journal there,
+    which each run continues from. ``view`` syncs a link view under that
+    root instead of moving the job's files.
+
+    Raises:
+        ValueError: If a job has no directory, a duplicate name or an
+            unknown option.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    base = os.path.dirname(os.path.abspath(path))
+    state_dir = os.path.join(base, data.get("state_dir") or DEFAULT_STATE_DIR)
+    defaults = dict(data.get("defaults") or {})
+    jobs: List[Job] = []
+    names = set()
+    for i, spec in enumerate(data.get("jobs") or ()):
+        spec = {**defaults, **spec}
+        directory = spec.pop("directory", None)
+        if not directory:
+            raise ValueError(f"Job #{i + 1} has no directory")
+        name = str(spec.pop("name", None) or os.path.basename(os.path.normpath(directory)))
+        if name in names:
+            raise ValueError(f"Duplicate job name: {name}")
+        names.add(name)
+        config = spec.pop("config", "config.yaml")
+        unknown = set(spec) - set(JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"Job {name}: unknown option(s) {', '.join(sorted(unknown))}")
+        if (spec.get("max_files") or spec.get("max_seconds")) and not spec.get("journal"):
+            spec["journal"] = True  # a budgeted job's cursor
+        for key, filename in STATE_FILES.items():
+            if spec.get(key) is True:
+                spec[key] = os.path.join(state_dir, name, filename)
+            elif spec.get(key):
+                spec[key] = os.path.join(base, os.path.expanduser(spec[key]))
+        if spec.get("view"):
+            spec["view"] = os.path.join(base, os.path.expanduser(spec["view"]))
+        jobs.append(Job(name, os.path.join(base, os.path.expanduser(directory)),
+                        os.path.join(base, os.path.expanduser(config)), spec))
+    limits = {os.path.join(base, p): max(1, int(n)) for p, n in (data.get("device_limits") or {}).items()}
+    return jobs, limits
+
+
+def _device(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+def failed_result(job: Job, error: str, duration: float = 0.0) -> JobResult:
+    return {"name": job.name, "directory": job.directory, "ok": False, "count": 0,
+            "error": error, "duration_s": round(duration, 6), "metrics": None}
+
+
+class _JobPrefix(logging.Filter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.job = ""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = f"[{self.job}] {record.getMessage()}"
+        record.args = None
+        return True
+
+
+_prefix = _JobPrefix()
+
+
+def _init_worker(log_queue: Optional[multiprocessing.Queue], level: int) -> None:
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(level)
+    if log_queue is not None:
+        handler = QueueHandler(log_queue)
+        handler.addFilter(_prefix)
+        root.addHandler(handler)
+
+
+def _call(run_job: Callable[[Job], JobResult], job: Job) -> JobResult:
+    _prefix.job = job.name
+    start = time.perf_counter()
+    try:
+        return run_job(job)
+    except Exception as exc:  # keep the worker alive for the next job
+        return failed_result(job, f"{type(exc).__name__}: {exc}", time.perf_counter() - start)
+
+
+def run_jobs(
+    jobs: List[Job],
+    run_job: Callable[[Job], JobResult],
+    processes: Optional[int] = None,
+    per_device: Optional[int] = None,
+    device_limits: Optional[Dict[str, int]] = None,
+    log_handler: Optional[logging.Handler] = None,
+) -> List[JobResult]:
+    """Run every job on a process pool and return their results in job order.
+
+    Args:
+        run_job: Picklable top-level function doing one job in a worker.
+        processes: Global limit of jobs running at once (default: CPU count).
+        per_device: Default limit of jobs running at once per device.
+        device_limits: Path → limit overrides for the devices of those paths.
+        log_handler: Handler in this process that receives worker log records.
+    """
+    processes = processes or os.cpu_count() or 1
+    limits = {_device(p): n for p, n in (device_limits or {}).items() if _device(p) is not None}
+    results: Dict[str, JobResult] = {}
+    pending: Deque[Job] = deque()
+    devices: Dict[str, Optional[int]] = {}
+    for job in jobs:
+        devices[job.name] = _device(job.directory)
+        if devices[job.name] is None:
+            results[job.name] = failed_result(job, f"Target directory does not exist: {job.directory}")
+        else:
+            pending.append(job)
+
+    log_queue = multiprocessing.Queue() if log_handler is not None else None
+    forwarder = QueueListener(log_queue, log_handler) if log_queue is not None else None
+    if forwarder is not None:
+        forwarder.start()
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                   initargs=(log_queue, logging.getLogger().level))
+
+    def limit(device: Optional[int]) -> int:
+        return max(1, limits.get(device, per_device or processes))
+
+    running: Dict[Future, Job] = {}
+    active: Counter = Counter()
+    started: Dict[str, float] = {}
+    pool = new_pool()
+    try:
+        while pending or running:
+            waiting: Deque[Job] = deque()
+            while pending and len(running) < processes:
+                job = pending.popleft()
+                device = devices[job.name]
+                if active[device] >= limit(device):
+                    waiting.append(job)
+                    continue
+                active[device] += 1
+                started[job.name] = time.perf_counter()
+                running[pool.submit(_call, run_job, job)] = job
+            pending.extendleft(reversed(waiting))
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job = running.pop(future)
+                active[devices[job.name]] -= 1
+                try:
+                    results[job.name] = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    results[job.name] = failed_result(job, "Worker process died",
+                                                      time.perf_counter() - started[job.name])
+                except Exception as exc:
+                    results[job.name] = failed_result(job, f"{type(exc).__name__}: {exc}",
+                                                      time.perf_counter() - started[job.name])
+                logger.log(logging.INFO if results[job.name]["ok"] else logging.ERROR,
+                           _describe(results[job.name]))
+            if broken:
+                for job in running.values():
+                    results[job.name] = failed_result(job, "Worker process died",
+                                                      time.perf_counter() - started[job.name])
+                    logger.error(_describe(results[job.name]))
+                running.clear()
+                active.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = new_pool()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if forwarder is not None:
+            forwarder.stop()
+    return [results[job.name] for job in jobs]
+
+
+def _describe(result: JobResult) -> str:
+    if result["ok"]:
+        return f"Job {result['name']}: {result['count']} file(s) in {result['duration_s']:.2f}s"
+    return f"Job {result['name']} failed: {result['error']}"
+
+
+def summarize(results: List[JobResult], wall: float) -> Dict[str, Any]:
+    """Aggregate job results: totals, summed metrics and the list of failures."""
+    counters: Counter = Counter()
+    phases: Counter = Counter()
+    errors: Counter = Counter()
+    for result in results:
+        metrics = result.get("metrics") or {}
+        counters.update(metrics.get("counters", {}))
+        phases.update(metrics.get("phases_s", {}))
+        errors.update(metrics.get("errors", {}))
+    failed = [r for r in results if not r["ok"]]
+    return {
+        "jobs": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "files": sum(r["count"] for r in results),
+        "wall_s": round(wall, 6),
+        "job_seconds": round(sum(r["duration_s"] for r in results), 6),
+        "counters": dict(sorted(counters.items())),
+        "phases_s": {k: round(v, 6) for k, v in sorted(phases.items())},
+        "errors": dict(sorted(errors.items())),
+        "failures": [{"name": r["name"], "error": r["error"]} for r in failed],
+        "results": results,
+    }
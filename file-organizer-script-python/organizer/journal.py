@@ -0,0 +1,405 @@
+"""
+Write-ahead move journal for crash-safe, resumable and undoable runs.
+
+Before the first rename every planned move is appended to the journal and
+fsync'ed once. While the plan executes, each committed move appends a
+"done" record; those are group-committed – fsync'ed every
+``group_size`` records or ``group_interval`` seconds – so journaling costs
+one fsync per batch rather than one per file.
+
+Records are JSON arrays, one per line::
+
+    ["B", {"root": ..., "started": ...}]    run header
+    ["D", dir_id, path]                     interned directory
+    ["M", id, src_dir_id, dest_dir_id, name] planned move
+    ["M", id, src_dir_id, dest_dir_id, name, dest_name, replace]
+                                            renamed or replacing move
+    ["+", id]                               move committed
+    ["-", id]                               move undone
+    ["E"]                                   every move committed
+
+A torn last line (the process died mid-write) is ignored. Records that
+never reached the disk are harmless: on ``--resume`` each unfinished entry
+is reconciled against the filesystem, so a move whose "done" record was
+lost is recognised from the source being gone and the destination present,
+and a cross-device copy that died before its final rename is restarted
+after its temporary file is removed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple
+
+from organizer.crossdev import fsync_dir, remove_partial_copies
+from organizer.defaults import DEFAULT_COPY_WORKERS
+from organizer.metrics import NULL_METRICS, RunMetrics
+from organizer.plan import MOVE, REPLACE, SKIP, MovePlan, execute_plan
+from organizer.scanner import move_file
+
+if TYPE_CHECKING:
+    from organizer.plan import Report
+    from organizer.slices import SliceBudget
+    from organizer.throttle import IOBudget
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_SIZE = 1024
+DEFAULT_GROUP_INTERVAL = 0.5
+
+JournalEntry = Tuple[str, str, str, str, bool]  # (src_dir, name, dest_dir, dest_name, replace)
+
+
+class JournalError(RuntimeError):
+    """The journal cannot be used for the requested operation."""
+
+
+class MoveJournal:
+    """Append-only journal of planned and committed moves."""
+
+    def __init__(self, path: str, group_size: int = DEFAULT_GROUP_SIZE,
+                 group_interval: float = DEFAULT_GROUP_INTERVAL) -> None:
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.root: Optional[str] = None
+        self.entries: Dict[int, JournalEntry] = {}
+        self.done_order: List[int] = []
+        self.undone: Set[int] = set()
+        self.finished = False
+        self._dir_ids: Dict[str, int] = {}
+        self._ids: Optional[List[int]] = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # -- reading -----------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "MoveJournal":
+        """Read an existing journal and open it for appending."""
+        journal = cls(path, **kwargs)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            raise JournalError(f"No journal at {path}") from None
+        dirs: Dict[int, str] = {}
+        done: Set[int] = set()
+        good = 0
+        with f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring torn journal record in {path}")
+                    break
+                good += len(line)
+                kind = record[0]
+                if kind == "M":
+                    entry_id, src_id, dest_id, name = record[1:5]
+                    dest_name, replace = record[5:] or (name, False)
+                    journal.entries[entry_id] = (dirs[src_id], name, dirs[dest_id], dest_name, replace)
+                elif kind == "+":
+                    if record[1] not in done:
+                        done.add(record[1])
+                        journal.done_order.append(record[1])
+                elif kind == "-":
+                    journal.undone.add(record[1])
+                elif kind == "D":
+                    dirs[record[1]] = record[2]
+                    journal._dir_ids[record[2]] = record[1]
+                elif kind == "B":
+                    journal.root = record[1].get("root")
+                elif kind == "E":
+                    journal.finished = True
+        # Drop a torn tail so that new records start on a fresh line.
+        if good != os.path.getsize(path):
+            os.truncate(path, good)
+        journal._file = open(path, "a", encoding="utf-8")
+        return journal
+
+    def pending(self) -> Iterator[int]:
+        """Ids of planned moves without a "done" record, in plan order."""
+        done = set(self.done_order)
+        return (i for i in self.entries if i not in done)
+
+    # -- writing -----------------------------------------------------------
+
+    @classmethod
+    def create(cls, path: str, root: str, **kwargs) -> "MoveJournal":
+        """Start a new journal at ``path``.
+
+        Raises:
+            JournalError: If ``path`` holds a run that did not finish – it has
+                to be resumed (or removed) first.
+        """
+        if os.path.exists(path):
+            previous = cls.load(path)
+            previous.close()
+            if not (previous.finished or previous.undone) and any(True for _ in previous.pending()):
+                raise JournalError(f"Journal {path} belongs to an unfinished run; "
+                                   f"use --resume or --undo, or delete it")
+        journal = cls(path, **kwargs)
+        journal.root = root
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        journal._file = open(path, "w", encoding="utf-8")
+        journal._write(["B", {"root": root, "started": time.time()}])
+        return journal
+
+    def _write(self, record: list) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _dir(self, path: str) -> int:
+        dir_id = self._dir_ids.get(path)
+        if dir_id is None:
+            dir_id = self._dir_ids[path] = len(self._dir_ids)
+            self._write(["D", dir_id, path])
+        return dir_id
+
+    def record_plan(self, plan: MovePlan) -> None:
+        """Append every move in ``plan`` and make it durable before execution starts."""
+        for item in plan:
+            if item.action != SKIP:
+                entry = ["M", item.index, self._dir(item.src_dir), self._dir(item.dest_dir), item.name]
+                dest_name = item.dest_name or item.name
+                replace = item.action == REPLACE
+                if dest_name != item.name or replace:
+                    entry += [dest_name, replace]
+                self._write(entry)
+                self.entries[item.index] = (item.src_dir, item.name, item.dest_dir, dest_name, replace)
+        self.sync()
+        fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+
+    def _mark(self, kind: str, entry_id: int) -> None:
+        with self._lock:
+            self._write([kind, entry_id])
+            if kind == "+":
+                self.done_order.append(entry_id)
+            else:
+                self.undone.add(entry_id)
+            self._unsynced += 1
+            if (self._unsynced >= self.group_size
+                    or time.monotonic() - self._last_sync >= self.group_interval):
+                self._sync_locked()
+
+    def done(self, index: int) -> None:
+        """Mark plan entry ``index`` as committed (thread-safe, group-committed)."""
+        entry_id = index if self._ids is None else self._ids[index]
+        self._mark("+", entry_id)
+
+    def sync(self) -> None:
+        """Force buffered records to disk."""
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def finish(self, force: bool = False) -> bool:
+        """Record the run as complete if every planned move is committed.
+
+        With ``force`` it is recorded as complete regardless; moves still
+        pending are abandoned (they were reported when they failed).
+        """
+        if not force and any(True for _ in self.pending()):
+            self.sync()
+            return False
+        self._write(["E"])
+        self.finished = True
+        self.sync()
+        return True
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "MoveJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # -- recovery ----------------------------------------------------------
+
+    def recover_plan(self) -> MovePlan:
+        """Rebuild the unfinished part of the run as a plan, without rescanning.
+
+        Each unfinished entry is checked against the filesystem:
+
+        * source present, destination missing – moved again (stale
+          cross-device temporary files are removed first); the same for
+          overwrite entries whose destination is still the old file;
+        * source missing, destination present – already moved, marked done;
+        * both present – a cross-device move interrupted between its final
+          rename and unlinking the source; finished if the copy matches the
+          source's size and mtime, otherwise left alone. An overwrite entry
+          is only finished if both names are one inode: the file it replaces
+          may match the source's size and mtime, so it is replaced again;
+        * both missing – reported and dropped.
+        """
+        plan = MovePlan()
+        ids: List[int] = []
+        for entry_id in list(self.pending()):
+            src_dir, name, dest_dir, dest_name, replace = self.entries[entry_id]
+            src = os.path.join(src_dir, name)
+            dst = os.path.join(dest_dir, dest_name)
+            src_st = _lstat(src)
+            dst_st = _lstat(dst)
+            if src_st is None or dst_st is None:
+                same = False
+            elif replace:
+                same = (src_st.st_dev, src_st.st_ino) == (dst_st.st_dev, dst_st.st_ino)
+            else:
+                same = (src_st.st_size, src_st.st_mtime_ns) == (dst_st.st_size, dst_st.st_mtime_ns)
+            if src_st is not None and (dst_st is None or (replace and not same)):
+                if remove_partial_copies(dst):
+                    logger.info(f"Removed partial copy of {dst}")
+                plan.add(src_dir, name, dest_dir, REPLACE if replace else MOVE, dest_name=dest_name)
+                ids.append(entry_id)
+            elif src_st is None and dst_st is not None:
+                self._mark("+", entry_id)
+            elif src_st is not None:
+                if same:
+                    os.unlink(src)
+                    self._mark("+", entry_id)
+                    logger.info(f"Finished interrupted copy: {dst}")
+                else:
+                    logger.warning(f"Not resuming {src}: {dst} exists and differs")
+            else:
+                logger.warning(f"Not resuming {src}: neither it nor {dst} exists")
+        self._ids = ids
+        plan.reorder()  # keep the recorded (possibly prioritized) order
+        return plan
+
+
+def _lstat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.lstat(path)
+    except FileNotFoundError:
+        return None
+
+
+def resume_run(path: str, workers: int = 1, copy_workers: int = DEFAULT_COPY_WORKERS,
+               metrics: RunMetrics = NULL_METRICS, budget: Optional[IOBudget] = None,
+               fd_relative: bool = False) -> int:
+    """Finish the run recorded in the journal at ``path``. Returns files moved.
+
+    ``fd_relative`` executes the rest with directory fds opened relative to
+    the journal's root (see organize_target).
+    """
+    from organizer.fdops import fd_root
+
+    with MoveJournal.load(path) as journal:
+        if journal.finished:
+            logger.info(f"Journal {path}: run already complete")
+            return 0
+        with metrics.phase("recover"):
+            plan = journal.recover_plan()
+        logger.info(f"Resuming {journal.root}: {plan.moves} of {len(journal.entries)} move(s) left")
+        moved = execute_plan(plan, workers=workers, copy_workers=copy_workers,
+                             metrics=metrics, journal=journal, budget=budget,
+                             fd_root=fd_root(journal.root, fd_relative))
+        if not journal.finish():
+            logger.warning(f"Journal {path}: some moves could not be resumed")
+        return moved
+
+
+def continue_run(path: str, root: str, limit: SliceBudget, workers: int = 1,
+                 copy_workers: int = DEFAULT_COPY_WORKERS, metrics: RunMetrics = NULL_METRICS,
+                 budget: Optional[IOBudget] = None, report: Optional[Report] = None,
+                 fd_relative: bool = False) -> Optional[Tuple[int, int]]:
+    """Continue a budgeted run on ``root`` from its journal (the slice cursor).
+
+    Executes the recorded moves in their recorded order until ``limit`` is
+    spent. Returns ``(moved, remaining)``, or None when the journal holds no
+    unfinished run for ``root``. Once every resumable move has been
+    attempted the run is recorded as complete, so the next slice scans again.
+
+    Raises:
+        JournalError: If the journal holds an unfinished run on another
+            root (checked before anything is scanned).
+    """
+    from organizer.fdops import fd_root
+
+    if not os.path.exists(path):
+        return None
+    with MoveJournal.load(path) as journal:
+        if journal.finished or journal.undone:
+            return None
+        if journal.root != root:
+            if any(True for _ in journal.pending()):
+                raise JournalError(f"Journal {path} belongs to an unfinished run on {journal.root}; "
+                                   f"use --resume or --undo, or delete it")
+            return None
+        if not any(True for _ in journal.pending()):
+            journal.finish()
+            return None
+        with metrics.phase("recover"):
+            plan = journal.recover_plan()
+        logger.info(f"Continuing {root} from {path}: {plan.moves} move(s) left")
+        taken = limit.taken
+        moved = execute_plan(plan, workers=workers, copy_workers=copy_workers, metrics=metrics,
+                             journal=journal, report=report, budget=budget,
+                             fd_root=fd_root(root, fd_relative), limit=limit)
+        remaining = plan.moves - (limit.taken - taken)
+        if not remaining:
+            journal.finish(force=True)
+        return moved, remaining
+
+
+def undo_run(path: str, metrics: RunMetrics = NULL_METRICS) -> int:
+    """Move files recorded in the journal back, newest first. Returns files restored.
+
+    Also covers moves whose "done" record was lost in a crash. Entries whose
+    original location is occupied again are left alone. Files replaced by
+    overwrite moves are gone and cannot be brought back. Category folders
+    emptied by the undo are removed.
+    """
+    undone = 0
+    with MoveJournal.load(path) as journal:
+        done = set(journal.done_order)
+        order = journal.done_order[::-1] + [i for i in reversed(journal.entries) if i not in done]
+        dest_dirs: Set[str] = set()
+        for entry_id in order:
+            if entry_id in journal.undone:
+                continue
+            src_dir, name, dest_dir, dest_name, _ = journal.entries[entry_id]
+            src = os.path.join(src_dir, name)
+            dst = os.path.join(dest_dir, dest_name)
+            if not os.path.lexists(dst):
+                continue
+            if os.path.lexists(src):
+                logger.warning(f"Not restoring {dst}: {src} exists")
+                continue
+            try:
+                with metrics.phase("undo"):
+                    os.makedirs(src_dir, exist_ok=True)
+                    move_file(dst, src)
+            except OSError as exc:
+                metrics.error(exc)
+                logger.error(f"Could not restore {dst}: {exc}")
+                continue
+            journal._mark("-", entry_id)
+            logger.info("Restored: %s → %s", name, src_dir,
+                        extra={"event": "restored", "file": name, "folder": os.path.basename(dest_dir)})
+            dest_dirs.add(dest_dir)
+            undone += 1
+        for dest_dir in dest_dirs:
+            try:
+                os.rmdir(dest_dir)
+            except OSError:
+                pass
+    metrics.count("undone", undone)
+    return undone
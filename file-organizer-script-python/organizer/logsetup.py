@@ -0,0 +1,178 @@
+"""
+Non-blocking logging pipeline shared by main.py and the legacy logger.
+
+Records are handed to a queue on the hot path and formatted/written by a
+background QueueListener that drains them in batches and flushes each
+handler once per batch. Optional extras:
+
+- JSON-lines output via JsonLinesFormatter.
+- Summary-only mode: per-file records (those logged with an ``event`` extra)
+  are counted per event and folder instead of written, and the totals are
+  emitted when the pipeline stops.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BATCH_SIZE = 512
+
+# Extra attributes copied into JSON-lines output when present on a record.
+JSON_EXTRAS = ("event", "file", "folder", "count")
+
+
+class _DeferredFlushMixin:
+    """Lets the listener suppress per-record flushes while writing a batch."""
+
+    deferred = False
+
+    def flush(self) -> None:
+        if not self.deferred:
+            super().flush()
+
+
+class BatchStreamHandler(_DeferredFlushMixin, logging.StreamHandler):
+    """StreamHandler that flushes once per listener batch."""
+
+
+class BatchRotatingFileHandler(_DeferredFlushMixin, RotatingFileHandler):
+    """RotatingFileHandler that flushes once per listener batch."""
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format each record as one JSON object per line."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        import json  # only needed with --log-format json
+
+        super().__init__(*args, **kwargs)
+        self._dumps = json.dumps
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in JSON_EXTRAS:
+            if hasattr(record, key):
+                payload[key] = getattr(record, key)
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return self._dumps(payload, ensure_ascii=False)
+
+
+class SummaryFilter(logging.Filter):
+    """Swallow per-file records, counting them by (event, folder)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None:
+            return True
+        with self._lock:
+            self.counts[(event, getattr(record, "folder", ""))] += 1
+        return False
+
+    def records(self, name: str = "summary") -> List[logging.LogRecord]:
+        """Build one INFO record per (event, folder) total."""
+        with self._lock:
+            totals: Dict[Tuple[str, str], int] = dict(self.counts)
+            self.counts.clear()
+        return [
+            logging.makeLogRecord({
+                "name": name, "levelno": logging.INFO, "levelname": "INFO",
+                "msg": f"Summary: {count} file(s) {event} → {folder}/",
+                "event": f"{event}_total", "folder": folder, "count": count,
+            })
+            for (event, folder), count in sorted(totals.items())
+        ]
+
+
+class _ThreadQueueHandler(QueueHandler):
+    """QueueHandler for an in-process queue: formatting is left to the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class BatchingQueueListener(QueueListener):
+    """QueueListener that handles records in batches of up to ``batch_size``."""
+
+    def __init__(self, q: queue.SimpleQueue, *handlers: logging.Handler,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        super().__init__(q, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.write_seconds = 0.0
+
+    def _monitor(self) -> None:
+        q = self.queue
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            start = time.perf_counter()
+            for handler in self.handlers:
+                handler.deferred = True
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.deferred = False
+                handler.flush()
+            self.write_seconds += time.perf_counter() - start
+            if stop:
+                return
+
+
+class LogPipeline:
+    """Queue + background listener; attach ``handler`` to a logger."""
+
+    def __init__(self, handlers: Sequence[logging.Handler], summary_only: bool = False,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.handler = _ThreadQueueHandler(self.queue)
+        self.summary: Optional[SummaryFilter] = SummaryFilter() if summary_only else None
+        if self.summary is not None:
+            self.handler.addFilter(self.summary)
+        self.listener = BatchingQueueListener(self.queue, *handlers, batch_size=batch_size)
+        self._running = False
+
+    def start(self) -> "LogPipeline":
+        """Start the listener thread; it is also stopped automatically at exit."""
+        self.listener.start()
+        self._running = True
+        atexit.register(self.stop)
+        return self
+
+    def stop(self) -> None:
+        """Emit summary totals, drain the queue and close the handlers."""
+        if not self._running:
+            return
+        self._running = False
+        atexit.unregister(self.stop)
+        if self.summary is not None:
+            for record in self.summary.records():
+                self.queue.put(record)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
@@ -0,0 +1,204 @@
+"""
+Per-phase timers and counters for organizer runs.
+
+A RunMetrics object is threaded through the engine; each phase (scan,
+classify, mkdir, rename, copy, logging, …) accumulates wall time and each
+outcome increments a counter. Phases that run on worker threads accumulate
+the time of all threads, so they can exceed the run's wall time.
+
+When metrics are not requested the engine uses NULL_METRICS, whose methods
+do nothing, so instrumentation costs one no-op call per operation.
+
+Results can be exported as a JSON run summary, as a Prometheus
+textfile-collector ``.prom`` file, or delivered to Python hooks registered
+with ``register_hook`` – an embedding process gets every run's metrics.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+PROM_PREFIX = "file_organizer"
+
+MetricsHook = Callable[["RunMetrics"], None]
+_hooks: List[MetricsHook] = []
+
+
+def register_hook(hook: MetricsHook) -> None:
+    """Call ``hook(metrics)`` at the end of every organizer run in this process."""
+    _hooks.append(hook)
+
+
+def unregister_hook(hook: MetricsHook) -> None:
+    _hooks.remove(hook)
+
+
+class _Phase:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "RunMetrics", name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+
+
+class RunMetrics:
+    """Thread-safe timers, counters and error tallies for one run."""
+
+    enabled = True
+
+    def __init__(self, run: str = "organize") -> None:
+        self.run = run
+        self.started = time.time()
+        self.duration = 0.0
+        self.timers: Dict[str, float] = {}
+        self.counters: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def phase(self, name: str) -> _Phase:
+        """Context manager adding its duration to timer ``name``."""
+        return _Phase(self, name)
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """Wrap ``func`` so every call is timed under ``name``."""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_time(name, time.perf_counter() - start)
+        return wrapper
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def error(self, exc: BaseException) -> None:
+        with self._lock:
+            self.errors[type(exc).__name__] += 1
+
+    def finish(self) -> "RunMetrics":
+        """Stop the run clock and deliver the metrics to registered hooks."""
+        self.duration = time.perf_counter() - self._t0
+        for hook in list(_hooks):
+            hook(self)
+        return self
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "run": self.run,
+                "started": self.started,
+                "duration_s": round(self.duration, 6),
+                "phases_s": {k: round(v, 6) for k, v in sorted(self.timers.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "errors": dict(sorted(self.errors.items())),
+            }
+
+    def write_json(self, path: str) -> None:
+        import json
+
+        _atomic_write(path, json.dumps(self.summary(), indent=2) + "\n")
+
+    def prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        s = self.summary()
+        run = s["run"]
+        lines = [
+            f"# HELP {PROM_PREFIX}_run_duration_seconds Wall time of the last run.",
+            f"# TYPE {PROM_PREFIX}_run_duration_seconds gauge",
+            f'{PROM_PREFIX}_run_duration_seconds{{run="{run}"}} {s["duration_s"]}',
+            f"# HELP {PROM_PREFIX}_last_run_timestamp_seconds Start time of the last run.",
+            f"# TYPE {PROM_PREFIX}_last_run_timestamp_seconds gauge",
+            f'{PROM_PREFIX}_last_run_timestamp_seconds{{run="{run}"}} {s["started"]}',
+            f"# HELP {PROM_PREFIX}_phase_seconds Time spent per phase in the last run.",
+            f"# TYPE {PROM_PREFIX}_phase_seconds gauge",
+        ]
+        lines += [f'{PROM_PREFIX}_phase_seconds{{run="{run}",phase="{k}"}} {v}'
+                  for k, v in s["phases_s"].items()]
+        lines += [f"# HELP {PROM_PREFIX}_events Files and bytes processed in the last run.",
+                  f"# TYPE {PROM_PREFIX}_events gauge"]
+        lines += [f'{PROM_PREFIX}_events{{run="{run}",counter="{k}"}} {v}'
+                  for k, v in s["counters"].items()]
+        lines += [f"# HELP {PROM_PREFIX}_errors Errors by exception type in the last run.",
+                  f"# TYPE {PROM_PREFIX}_errors gauge"]
+        lines += [f'{PROM_PREFIX}_errors{{run="{run}",type="{k}"}} {v}'
+                  for k, v in s["errors"].items()]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write a textfile-collector file (atomically, as node_exporter expects)."""
+        _atomic_write(path, self.prometheus())
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class NullMetrics:
+    """Drop-in RunMetrics replacement that records nothing."""
+
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name: str) -> _NullPhase:
+        return self._phase
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        return func
+
+    def add_time(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def error(self, exc: BaseException) -> None:
+        pass
+
+    def finish(self) -> "NullMetrics":
+        return self
+
+    def summary(self) -> Dict:
+        return {}
+
+
+NULL_METRICS = NullMetrics()
+
+
+def metrics_for(run: str, metrics: Optional[RunMetrics] = None):
+    """Return ``metrics``, a fresh RunMetrics if hooks are registered, else NULL_METRICS."""
+    if metrics is not None:
+        return metrics
+    return RunMetrics(run) if _hooks else NULL_METRICS
+
+
+def _atomic_write(path: str, text: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,203 @@
+"""
+Per-file run records, streamed as NDJSON or CSV.
+
+``--output`` emits one record per file – source, destination, rule, size,
+action and reason – while the run is in progress. A dry run streams them
+from a generator over the array-backed plan; a real run has the executor
+report each entry as it is skipped or its move commits. Nothing per file
+is kept besides the plan itself, so memory stays flat however large the
+tree is. Formatted lines are collected in batches and written with one
+``write`` call per batch, so producing output costs far less than the
+renames it describes.
+
+Actions are what would happen in a dry run (``move``, ``replace``,
+``skip``) and what did happen in a real one (``moved``, ``replaced``,
+``skipped``, ``failed``). ``rule`` is the name of the matching rule (see
+organizer.rules), null/empty when none matched; ``reason`` explains skips,
+renames, replacements, failures and unmatched files.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import sys
+import threading
+from json.encoder import encode_basestring_ascii as _quote
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple, Optional, TextIO
+
+from organizer.defaults import DEFAULT_COLLISION_STRATEGY, OUTPUT_FORMATS
+from organizer.plan import MOVE, REPLACE, SKIP
+
+if TYPE_CHECKING:
+    from organizer.plan import MovePlan, PlannedMove
+    from organizer.rules import RuleSet
+
+FIELDS = ("source", "destination", "rule", "size", "action", "reason")
+DEFAULT_RECORD_BATCH = 4096
+OUTPUT_BUFFER = 1024 * 1024
+
+PLANNED_ACTIONS = {MOVE: "move", SKIP: "skip", REPLACE: "replace"}
+EXECUTED_ACTIONS = {MOVE: "moved", SKIP: "skipped", REPLACE: "replaced"}
+
+
+class Record(NamedTuple):
+    """One output line."""
+
+    source: str
+    destination: str
+    rule: Optional[str]
+    size: Optional[int]
+    action: str
+    reason: str
+
+
+class _Lines(list):
+    """Pending output lines; doubles as the file object csv.writer writes to."""
+
+    write = list.append
+
+
+class RecordWriter:
+    """Formats records as NDJSON or CSV and writes them in batches.
+
+    ``write`` is thread-safe: the executor's worker and copier threads
+    report moves concurrently.
+    """
+
+    def __init__(self, stream: TextIO, fmt: str = "ndjson", batch: int = DEFAULT_RECORD_BATCH,
+                 detach: bool = False) -> None:
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {fmt!r} (expected one of {', '.join(OUTPUT_FORMATS)})")
+        self.format = fmt
+        self.count = 0
+        self._stream = stream
+        self._batch = max(1, batch)
+        self._detach = detach
+        self._lock = threading.Lock()
+        self._pending = _Lines()
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.writer(self._pending, lineterminator="\n")
+            self._csv.writerow(FIELDS)
+
+    def write(self, record: Record) -> None:
+        with self._lock:
+            if self._csv is not None:
+                self._csv.writerow(record)
+            else:
+                source, destination, rule, size, action, reason = record
+                self._pending.append(
+                    '{"source": %s, "destination": %s, "rule": %s, "size": %s, "action": "%s", "reason": %s}\n'
+                    % (_quote(source), _quote(destination), "null" if rule is None else _quote(rule),
+                       "null" if size is None else size, action, _quote(reason)))
+            self.count += 1
+            if len(self._pending) >= self._batch:
+                self._flush()
+
+    def write_all(self, records: Iterable[Record]) -> int:
+        """Write every record from ``records``. Returns how many were written."""
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+
+    def _flush(self) -> None:
+        self._stream.write("".join(self._pending))
+        self._pending.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+            self._stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._detach:
+            self._stream.detach()
+        else:
+            self._stream.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def open_output(fmt: str, path: Optional[str] = None) -> RecordWriter:
+    """RecordWriter for ``path``, or for stdout when ``path`` is None or ``-``.
+
+    Undecodable file names are written back as their original bytes.
+    """
+    if path is None or path == "-":
+        sys.stdout.flush()
+        stream = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="surrogateescape",
+                                  newline="")
+        return RecordWriter(stream, fmt, detach=True)
+    stream = open(path, "w", encoding="utf-8", errors="surrogateescape", newline="",
+                  buffering=OUTPUT_BUFFER)
+    return RecordWriter(stream, fmt)
+
+
+def _lstat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.lstat(path)
+    except OSError:
+        return None
+
+
+class RecordReporter:
+    """Describes plan entries as Records and hands them to a RecordWriter.
+
+    The matching rule is looked up again per file (one lstat when output
+    is enabled) rather than carried through the plan, which keeps the plan
+    as compact as it is without ``--output``.
+    """
+
+    def __init__(self, writer: RecordWriter, rules: RuleSet,
+                 collisions: str = DEFAULT_COLLISION_STRATEGY) -> None:
+        self.writer = writer
+        self.rules = rules
+        self.collisions = collisions
+        self._default = os.path.basename(rules.default)
+
+    def describe(self, item: PlannedMove, action: str, moved: bool = False, reason: str = "") -> Record:
+        """Record for ``item``; size and rule come from the file where it is now (``moved``)."""
+        source, destination = item.source, item.destination
+        st = _lstat(destination if moved else source)
+        rule = self.rules.match_name(item.name, lambda: st)
+        if not reason:
+            if item.action == SKIP:
+                reason = ("same content already at destination" if self.collisions == "hash"
+                          else "destination exists")
+            elif item.action == REPLACE:
+                reason = "incoming file is newer" if self.collisions == "overwrite-newer" else "destination overwritten"
+            elif item.dest_name:
+                reason = f"name taken, renamed ({self.collisions})"
+            elif rule is None:
+                reason = "no rule matched" if item.folder == self._default else "content sniffed"
+        return Record(source, destination, None if rule is None else rule.name,
+                      None if st is None else st.st_size, action, reason)
+
+    def records(self, plan: MovePlan) -> Iterator[Record]:
+        """Yield a dry-run record for every plan entry."""
+        describe, actions = self.describe, PLANNED_ACTIONS
+        for item in plan:
+            yield describe(item, actions[item.action])
+
+    def planned(self, plan: MovePlan) -> int:
+        """Stream dry-run records for ``plan``. Returns how many were written."""
+        return self.writer.write_all(self.records(plan))
+
+    def __call__(self, item: PlannedMove, error: Optional[BaseException] = None) -> None:
+        """Executor hook: ``item`` was skipped or moved, or failed with ``error``."""
+        if error is not None:
+            record = self.describe(item, "failed", reason=str(error))
+        elif item.action == SKIP:
+            record = self.describe(item, "skipped")
+        else:
+            record = self.describe(item, EXECUTED_ACTIONS[item.action], moved=True)
+        self.writer.write(record)
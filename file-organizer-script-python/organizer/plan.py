@@ -0,0 +1,472 @@
+"""
+Two-phase organize engine: build a move plan, then execute it.
+
+The plan is array-backed so that millions of entries stay cheap: directory
+paths are interned once, file names live in a single packed byte buffer and
+no per-file Path or tuple objects are kept. Entries are grouped by
+destination directory as they are added, so the executor can create every
+destination once and run its renames back to back. The few entries that a
+collision strategy renames keep their new name in a side table.
+"""
+
+from __future__ import annotations
+
+import errno
+import logging
+import os
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from organizer.crossdev import CopyPool
+from organizer.defaults import DEFAULT_COPY_WORKERS
+from organizer.metrics import NULL_METRICS, RunMetrics
+from organizer.scanner import DirectoryCache, move_file
+
+if TYPE_CHECKING:
+    from organizer.collisions import CollisionResolver
+    from organizer.fdops import DirFds
+    from organizer.journal import MoveJournal
+    from organizer.shard import ShardLayout
+    from organizer.slices import SliceBudget
+    from organizer.throttle import IOBudget
+
+logger = logging.getLogger(__name__)
+
+MOVE = 0
+SKIP = 1
+REPLACE = 2  # move over an existing file (overwrite/overwrite-newer collisions)
+
+
+class PlannedMove(NamedTuple):
+    """One plan entry, materialized on demand while iterating a MovePlan."""
+
+    src_dir: str
+    name: str
+    dest_dir: str
+    action: int
+    index: int = -1
+    category_dir: str = ""
+    dest_name: str = ""
+
+    @property
+    def source(self) -> str:
+        return os.path.join(self.src_dir, self.name)
+
+    @property
+    def destination(self) -> str:
+        return os.path.join(self.dest_dir, self.dest_name or self.name)
+
+    @property
+    def target(self) -> str:
+        """Destination for log lines: ``folder/`` or ``folder/new name``."""
+        return f"{self.folder}/{self.dest_name}" if self.dest_name else f"{self.folder}/"
+
+    @property
+    def folder(self) -> str:
+        return os.path.basename(self.category_dir or self.dest_dir)
+
+
+# report(item, error=None): called by the executor for each finished entry.
+Report = Callable[..., None]
+
+
+class MovePlan:
+    """Compact, destination-grouped list of planned moves."""
+
+    def __init__(self) -> None:
+        self._dirs: List[str] = []
+        self._dir_ids: Dict[str, int] = {}
+        self._names = bytearray()
+        self._offsets = array("Q", [0])
+        self._src = array("I")
+        self._action = array("B")
+        self._groups: Dict[int, array] = {}
+        self._categories: Dict[int, int] = {}
+        self._renames: Dict[int, str] = {}
+        self._order: Optional[array] = None
+        self._dest: Optional[array] = None
+        self.skips = 0
+
+    def _intern(self, path: str) -> int:
+        index = self._dir_ids.get(path)
+        if index is None:
+            index = self._dir_ids[path] = len(self._dirs)
+            self._dirs.append(path)
+        return index
+
+    def add(self, src_dir: str, name: str, dest_dir: str, action: int = MOVE,
+            category_dir: Optional[str] = None, dest_name: Optional[str] = None) -> None:
+        """Append one entry moving ``src_dir/name`` into ``dest_dir``.
+
+        ``category_dir`` names the category folder when ``dest_dir`` is a shard
+        below it; totals and log lines are then reported per category.
+        ``dest_name`` renames the file on the way.
+        """
+        index = len(self._src)
+        if dest_name is not None and dest_name != name:
+            self._renames[index] = dest_name
+        self._names += os.fsencode(name)
+        self._offsets.append(len(self._names))
+        self._src.append(self._intern(src_dir))
+        self._action.append(action)
+        dest_id = self._intern(dest_dir)
+        group = self._groups.get(dest_id)
+        if group is None:
+            group = self._groups[dest_id] = array("I")
+            if category_dir is not None and category_dir != dest_dir:
+                self._categories[dest_id] = self._intern(category_dir)
+        group.append(index)
+        if action == SKIP:
+            self.skips += 1
+
+    def __len__(self) -> int:
+        return len(self._src)
+
+    @property
+    def moves(self) -> int:
+        return len(self) - self.skips
+
+    def _entry(self, index: int, dest_dir: str, category_dir: str = "") -> PlannedMove:
+        name = os.fsdecode(bytes(self._names[self._offsets[index]:self._offsets[index + 1]]))
+        return PlannedMove(self._dirs[self._src[index]], name, dest_dir, self._action[index], index,
+                           category_dir, self._renames.get(index, ""))
+
+    def groups(self) -> Iterator[Tuple[str, Iterator[PlannedMove]]]:
+        """Yield ``(dest_dir, entries)`` for every destination directory."""
+        for dest_id, indices in self._groups.items():
+            dest_dir = self._dirs[dest_id]
+            category_id = self._categories.get(dest_id)
+            category_dir = "" if category_id is None else self._dirs[category_id]
+            yield dest_dir, (self._entry(i, dest_dir, category_dir) for i in indices)
+
+    def __iter__(self) -> Iterator[PlannedMove]:
+        if self._order is None:
+            for _, entries in self.groups():
+                yield from entries
+            return
+        dirs, dest, categories = self._dirs, self._dest, self._categories
+        for index in self._order:
+            dest_id = dest[index]
+            category_id = categories.get(dest_id)
+            yield self._entry(index, dirs[dest_id], "" if category_id is None else dirs[category_id])
+
+    @property
+    def ordered(self) -> bool:
+        return self._order is not None
+
+    def reorder(self, order: Optional[Iterable[int]] = None) -> None:
+        """Iterate (and execute) entries in ``order`` instead of by destination.
+
+        ``order`` lists plan indices; None keeps insertion order. Call it once
+        the plan is complete. groups() is unaffected.
+        """
+        self._order = array("I", range(len(self)) if order is None else order)
+        dest = array("I", [0]) * len(self)
+        for dest_id, indices in self._groups.items():
+            for index in indices:
+                dest[index] = dest_id
+        self._dest = dest
+
+    def move_dirs(self) -> List[str]:
+        """Destination directories that receive at least one move."""
+        return [self._dirs[dest_id] for dest_id, indices in self._groups.items()
+                if any(self._action[i] != SKIP for i in indices)]
+
+    def totals(self) -> Dict[str, int]:
+        """Number of entries (moves and skips) per destination (category) directory."""
+        totals: Dict[str, int] = {}
+        for dest_id, indices in self._groups.items():
+            folder = self._dirs[self._categories.get(dest_id, dest_id)]
+            totals[folder] = totals.get(folder, 0) + len(indices)
+        return totals
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the per-entry arrays."""
+        arrays = [self._offsets, self._src, self._action, *self._groups.values()]
+        renamed = sum(len(name) for name in self._renames.values())
+        return len(self._names) + renamed + sum(a.itemsize * len(a) for a in arrays)
+
+
+def build_plan(
+    tree: Iterable[Tuple[str, Iterable[os.DirEntry]]],
+    classify: Callable[[os.DirEntry], str],
+    root: Optional[str] = None,
+    metrics: RunMetrics = NULL_METRICS,
+    layout: Optional[ShardLayout] = None,
+    collisions: Optional[CollisionResolver] = None,
+) -> MovePlan:
+    """Classify every file in ``tree`` into a MovePlan without touching the disk.
+
+    Args:
+        tree: ``(directory, files)`` pairs, e.g. from scan_files or walk_tree.
+        classify: Maps a file's DirEntry to its destination folder name.
+        root: Put every category folder under this directory; when None each
+            file's own directory gets the category folders.
+        layout: Spreads large category folders over shard subdirectories.
+        collisions: Decides what happens to names that already exist at the
+            destination, or that an earlier entry in the plan will occupy;
+            without it those are planned as SKIP.
+
+    Collisions are resolved against the names listed once per destination
+    directory and reserved as the plan grows, never by probing the disk.
+    """
+    plan = MovePlan()
+    dirs = DirectoryCache()
+    classify = metrics.timed("classify", classify)
+
+    def probe(category_dir: str, name: str) -> Tuple[str, bool]:
+        if layout is not None:
+            return layout.place(category_dir, name, dirs)
+        names = dirs.names(category_dir)
+        if name in names:
+            return category_dir, True
+        names.add(name)
+        return category_dir, False
+
+    for folder, files in tree:
+        base = root or folder
+        for entry in files:
+            category_dir = os.path.join(base, classify(entry))
+            if layout is not None:
+                dest_dir, taken = layout.place(category_dir, entry.name, dirs)
+            else:
+                dest_dir, names = category_dir, dirs.names(category_dir)
+                taken = entry.name in names
+                names.add(entry.name)
+            if not taken:
+                plan.add(folder, entry.name, dest_dir, MOVE, category_dir)
+                continue
+            resolved = None
+            if collisions is not None:
+                resolved = collisions.resolve(entry, dest_dir, category_dir, partial(probe, category_dir))
+            if resolved is None:
+                plan.add(folder, entry.name, dest_dir, SKIP, category_dir)
+            else:
+                dest_dir, dest_name, replace = resolved
+                plan.add(folder, entry.name, dest_dir, REPLACE if replace else MOVE, category_dir, dest_name)
+    metrics.count("files_seen", len(plan))
+    if collisions is not None:
+        metrics.count("renamed", collisions.renamed)
+        metrics.count("replaced", collisions.replaced)
+    return plan
+
+
+def log_plan(plan: MovePlan, entries: bool = True) -> None:
+    """Log plan totals and, optionally, one dry-run line per entry."""
+    logger.info(f"Plan: {plan.moves} move(s), {plan.skips} skip(s) "
+                f"into {len(plan.totals())} folder(s)")
+    for dest_dir, count in plan.totals().items():
+        logger.info(f"  {dest_dir}: {count} file(s)")
+    if not entries:
+        return
+    for item in plan:
+        if item.action == SKIP:
+            logger.info("[DRY-RUN] Skip (already exists): %s", item.name,
+                        extra={"event": "planned_skip", "file": item.name, "folder": item.folder})
+        else:
+            logger.info("[DRY-RUN] %s → %s", item.name, item.target,
+                        extra={"event": "planned", "file": item.name, "folder": item.folder})
+
+
+# Per-file records carry an ``event`` extra so that summary-only logging
+# (organizer.logsetup.SummaryFilter) can aggregate them per folder.
+def _move(item: PlannedMove, copier: CopyPool, metrics: RunMetrics = NULL_METRICS,
+          journal: Optional[MoveJournal] = None, report: Optional[Report] = None,
+          budget: Optional[IOBudget] = None, fds: Optional[DirFds] = None) -> bool:
+    """Move one entry. Returns False if it was skipped because its destination appeared."""
+    on_done = _completion(item, journal, report)
+    try:
+        with metrics.phase("rename"):
+            if fds is not None:
+                done = (_move_at(fds, item, copier, on_done, report) if budget is None
+                        else budget.op(_move_at, fds, item, copier, on_done, report))
+            elif budget is None:
+                done = move_file(item.source, item.destination, copier, on_done)
+            else:
+                done = budget.op(move_file, item.source, item.destination, copier, on_done)
+    except FileExistsError:
+        if fds is None:
+            raise
+        # RENAME_NOREPLACE: the name was taken after the plan was built.
+        metrics.count("skipped")
+        _skip(item._replace(action=SKIP), report, "appeared at destination")
+        return False
+    except OSError as exc:
+        if report is not None:
+            report(item, exc)
+        raise
+    if done:
+        if on_done is not None:
+            on_done()
+        logger.info("Moved: %s → %s", item.name, item.target,
+                    extra={"event": "moved", "file": item.name, "folder": item.folder})
+    else:
+        logger.debug("Queued cross-device copy: %s → %s", item.name, item.target)
+    return True
+
+
+def _move_at(fds: DirFds, item: PlannedMove, copier: CopyPool,
+             on_copied: Optional[Callable[[], None]] = None, report: Optional[Report] = None) -> bool:
+    """move_file through directory fds: renameat, never replacing unless planned to.
+
+    The cross-device fallback keeps that promise: a destination that appears
+    before the copy is committed is left alone and the move reported skipped.
+    """
+    from organizer.fdops import rename_at
+
+    src_fd, dst_fd = fds.acquire_pair(item.src_dir, item.dest_dir)
+    try:
+        rename_at(src_fd, item.name, dst_fd, item.dest_name or item.name, replace=item.action == REPLACE)
+        return True
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+    finally:
+        fds.release_pair(item.src_dir, item.dest_dir)
+    replace = item.action == REPLACE
+    copier.submit(item.source, item.destination, on_copied, replace,
+                  None if replace else partial(_skip, item._replace(action=SKIP), report, "appeared at destination"))
+    return False
+
+
+def _completion(item: PlannedMove, journal: Optional[MoveJournal],
+                report: Optional[Report]) -> Optional[Callable[[], None]]:
+    """Callback run once ``item``'s move is committed (possibly on a copier thread)."""
+    if report is None:
+        return None if journal is None else partial(journal.done, item.index)
+
+    def done() -> None:
+        if journal is not None:
+            journal.done(item.index)
+        report(item)
+
+    return done
+
+
+def _skip(item: PlannedMove, report: Optional[Report], reason: str = "already exists") -> None:
+    logger.warning("Skipped (%s): %s", reason, item.name,
+                   extra={"event": "skipped", "file": item.name, "folder": item.folder})
+    if report is not None:
+        report(item)
+
+
+def execute_plan(plan: MovePlan, workers: int = 1, copy_workers: int = DEFAULT_COPY_WORKERS,
+                 metrics: RunMetrics = NULL_METRICS, journal: Optional[MoveJournal] = None,
+                 report: Optional[Report] = None, budget: Optional[IOBudget] = None,
+                 fd_root: Optional[str] = None, limit: Optional[SliceBudget] = None) -> int:
+    """Run a plan, creating each destination once. Returns files moved.
+
+    With ``workers > 1`` up to that many mkdir/rename calls are kept in
+    flight at once, which hides per-operation latency on NFS/SMB mounts.
+    Moves onto another device are copied by a separate pool of
+    ``copy_workers`` threads; the run returns once every copy is committed.
+    With a ``journal`` (which must already hold the plan) every committed
+    move is marked done in it.
+
+    ``report(item, error=None)`` is called for every entry as it is skipped
+    or its move is committed, and with the exception when a move fails
+    (organizer.output uses it to stream per-file records).
+
+    A ``budget`` (organizer.throttle) paces every mkdir and rename and the
+    bytes of cross-device copies.
+
+    With ``fd_root`` every directory is opened once relative to that root
+    and files are moved with renameat (organizer.fdops); a file whose
+    destination name was taken after planning is skipped, not overwritten.
+
+    A ``limit`` (organizer.slices) is asked before every move; once it is
+    spent no further moves start, in-flight ones finish and the rest of
+    the plan is left for the next run.
+    """
+    if fd_root is None:
+        return _execute(plan, workers, copy_workers, metrics, journal, report, budget, limit=limit)
+    from organizer.fdops import DirFds
+
+    with DirFds(fd_root) as fds:
+        moved = _execute(plan, workers, copy_workers, metrics, journal, report, budget, fds, limit)
+        logger.debug(f"fd mode: opened {fds.opened} directory fd(s) for {moved} move(s)")
+        return moved
+
+
+def _execute(plan: MovePlan, workers: int, copy_workers: int, metrics: RunMetrics,
+             journal: Optional[MoveJournal], report: Optional[Report], budget: Optional[IOBudget],
+             fds: Optional[DirFds] = None, limit: Optional[SliceBudget] = None) -> int:
+    metrics.count("skipped", plan.skips)
+    makedirs = _makedirs(fds)
+    if budget is not None:
+        makedirs = partial(budget.op, makedirs)
+    with CopyPool(copy_workers, metrics, budget) as copier:
+        if workers > 1:
+            moved = _execute_concurrent(plan, workers, copier, metrics, journal, report, budget, fds,
+                                        makedirs, limit)
+        else:
+            moved = 0
+            created: Set[str] = set()
+            for item in plan:
+                if item.action == SKIP:
+                    _skip(item, report)
+                    continue
+                if limit is not None and not limit.take():
+                    break
+                if item.dest_dir not in created:
+                    with metrics.phase("mkdir"):
+                        makedirs(item.dest_dir, exist_ok=True)
+                    created.add(item.dest_dir)
+                moved += _move(item, copier, metrics, journal, report, budget, fds)
+    moved -= copier.skipped  # queued copies whose destination appeared meanwhile
+    metrics.count("moved", moved)
+    return moved
+
+
+def _makedirs(fds: Optional[DirFds]) -> Callable[..., None]:
+    """os.makedirs, or in fd mode mkdirat-and-open each missing component once."""
+    if fds is None:
+        return os.makedirs
+
+    def makedirs(path: str, exist_ok: bool = True) -> None:
+        fds.acquire(path, create=True)
+        fds.release(path)
+
+    return makedirs
+
+
+def _execute_concurrent(plan: MovePlan, workers: int, copier: CopyPool,
+                        metrics: RunMetrics = NULL_METRICS,
+                        journal: Optional[MoveJournal] = None,
+                        report: Optional[Report] = None, budget: Optional[IOBudget] = None,
+                        fds: Optional[DirFds] = None,
+                        makedirs: Callable[..., None] = os.makedirs,
+                        limit: Optional[SliceBudget] = None) -> int:
+    """Thread-pool variant of execute_plan.
+
+    Ordering guarantees: every destination directory is created before the
+    first rename is submitted, and the plan never holds two moves to the
+    same destination name, so concurrent renames cannot collide.
+    """
+    moved = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="executor") as pool:
+        makedirs = metrics.timed("mkdir", makedirs)
+        for future in [pool.submit(makedirs, d, exist_ok=True) for d in plan.move_dirs()]:
+            future.result()
+
+        pending: Set[Future] = set()
+        try:
+            for item in plan:
+                if item.action == SKIP:
+                    _skip(item, report)
+                    continue
+                if limit is not None and not limit.take():
+                    break
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        moved += future.result()
+                pending.add(pool.submit(_move, item, copier, metrics, journal, report, budget, fds))
+        finally:
+            # Let in-flight renames finish before reporting or raising.
+            done, _ = wait(pending)
+        for future in done:
+            moved += future.result()
+    return moved
@@ -0,0 +1,377 @@
+"""
+Compiled classification rules.
+
+``config.yaml`` rules are compiled once per run into a matcher that keeps
+the per-file cost to a few dictionary lookups:
+
+* plain and multi-part extensions (``jpg``, ``tar.gz``) go into one dict
+  keyed by the lower-cased suffix; a name is looked up once per suffix
+  length that occurs in the config;
+* every glob and regex on the name is folded into a single alternation, so
+  one ``re.match`` call finds the first pattern rule that applies;
+* size and age limits are parsed to numbers up front and ``stat`` is only
+  called when a rule that has them is reached, so plain extension rules
+  never cost a syscall.
+
+Rules are tried in configuration order – explicit ``rules:`` entries first,
+then ``extension_groups`` – and the first match wins. ``match`` returns the
+Rule itself so callers can report which rule placed a file.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+DEFAULT_FOLDER = "Others"
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?i?b?)?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "b": 1, "k": 10**3, "kb": 10**3, "m": 10**6, "mb": 10**6,
+               "g": 10**9, "gb": 10**9, "t": 10**12, "tb": 10**12,
+               "ki": 2**10, "kib": 2**10, "mi": 2**20, "mib": 2**20,
+               "gi": 2**30, "gib": 2**30, "ti": 2**40, "tib": 2**40}
+_AGE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$", re.IGNORECASE)
+_AGE_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+class Rule(NamedTuple):
+    """One classification rule; every condition given must hold."""
+
+    name: str
+    folder: str
+    extensions: Tuple[str, ...] = ()
+    globs: Tuple[str, ...] = ()
+    regexes: Tuple[str, ...] = ()
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    older_than: Optional[float] = None
+    newer_than: Optional[float] = None
+
+    @property
+    def needs_stat(self) -> bool:
+        return not (self.min_size is None and self.max_size is None
+                    and self.older_than is None and self.newer_than is None)
+
+
+def parse_size(value: Union[int, str]) -> int:
+    """Parse ``1048576``, ``"10MB"`` or ``"1.5 GiB"`` to bytes."""
+    if isinstance(value, int):
+        return value
+    match = _SIZE.match(str(value))
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[(match.group(2) or "").lower()])
+
+
+def parse_age(value: Union[int, float, str]) -> float:
+    """Parse ``3600``, ``"90m"``, ``"12h"``, ``"30d"`` or ``"2w"`` to seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _AGE.match(str(value))
+    if not match:
+        raise ValueError(f"Invalid age: {value!r}")
+    return float(match.group(1)) * _AGE_UNITS[match.group(2).lower()]
+
+
+def _as_tuple(value) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(str(v) for v in value)
+
+
+def rules_from_config(config: Dict) -> List[Rule]:
+    """Build the ordered rule list: ``rules:`` entries, then ``extension_groups``.
+
+    Raises:
+        ValueError: If a rule has no folder, no condition, or an invalid value.
+    """
+    rules: List[Rule] = []
+    for i, spec in enumerate(config.get("rules") or ()):
+        name = str(spec.get("name") or f"rules[{i}]")
+        if not spec.get("folder"):
+            raise ValueError(f"Rule {name!r} has no folder")
+        sizes = {key: parse_size(spec[key]) for key in ("min_size", "max_size") if key in spec}
+        ages = {key: parse_age(spec[key]) for key in ("older_than", "newer_than") if key in spec}
+        rule = Rule(name, str(spec["folder"]),
+                    extensions=tuple(e.lower().lstrip(".") for e in _as_tuple(spec.get("extensions"))),
+                    globs=_as_tuple(spec.get("glob")), regexes=_as_tuple(spec.get("regex")),
+                    **sizes, **ages)
+        if not (rule.extensions or rule.globs or rule.regexes or rule.needs_stat):
+            raise ValueError(f"Rule {name!r} has no condition")
+        rules.append(rule)
+    for folder, extensions in (config.get("extension_groups") or {}).items():
+        if extensions:
+            rules.append(Rule(f"extension_groups.{folder}", folder,
+                              extensions=tuple(e.lower().lstrip(".") for e in extensions)))
+    return rules
+
+
+class RuleSet:
+    """Rules compiled into a dict fast path plus one combined name regex."""
+
+    def __init__(self, rules: Iterable[Rule], default: str = DEFAULT_FOLDER) -> None:
+        self.rules = list(rules)
+        self.default = default
+        self._by_ext: Dict[str, Tuple[int, ...]] = {}
+        self._max_parts = 1
+        self._pattern_rules: List[int] = []
+        alternatives: List[str] = []
+        self._group_rule: Dict[str, int] = {}
+        self._patterns: Dict[int, "re.Pattern[str]"] = {}
+        self._stat_free: List[int] = []
+
+        for index, rule in enumerate(self.rules):
+            for ext in rule.extensions:
+                self._by_ext[ext] = self._by_ext.get(ext, ()) + (index,)
+                self._max_parts = max(self._max_parts, ext.count(".") + 1)
+            if rule.globs or rule.regexes:
+                parts = [f"(?i:{fnmatch.translate(g)})" for g in rule.globs]
+                for regex in rule.regexes:
+                    try:
+                        re.compile(regex)
+                    except re.error as exc:
+                        raise ValueError(f"Rule {rule.name!r}: invalid regex {regex!r}: {exc}") from None
+                    # re.search semantics under re.match, unless anchored already
+                    parts.append(f"(?:{regex})" if regex.startswith("^") else f"(?s:.*?)(?:{regex})")
+                body = "|".join(parts)
+                self._patterns[index] = re.compile(f"(?:{body})")
+                group = f"_rule{index}"
+                self._group_rule[group] = index
+                alternatives.append(f"(?P<{group}>{body})")
+                self._pattern_rules.append(index)
+            elif not rule.extensions:
+                self._stat_free.append(index)  # size/age only: applies to every name
+        try:
+            self._combined = re.compile("|".join(alternatives)) if alternatives else None
+        except re.error:
+            # e.g. two rules reuse a named group; match pattern rules one by one.
+            self._combined = None
+            self._stat_free = sorted(self._stat_free + self._pattern_rules)
+        self._first_pattern = self._pattern_rules[0] if self._pattern_rules else len(self.rules)
+        self._first_open = min(self._stat_free, default=len(self.rules))
+        self._build_fast_path()
+        self.refresh()
+
+    def _build_fast_path(self) -> None:
+        # Suffix → folder tables for names whose answer depends on nothing but
+        # the suffix: no size/age-only rule comes first and the first
+        # extension rule has no size/age limit. ``_fast`` applies when there
+        # are no pattern rules; ``_fast_unmatched`` once the combined pattern
+        # regex has failed, so pattern rules can be ignored. Suffixes ending
+        # a multi-part extension ("gz" of "tar.gz") take the full path.
+        tails = {ext.rsplit(".", 1)[1] for ext in self._by_ext if "." in ext}
+        self._fast = self._suffix_table(min(self._first_pattern, self._first_open), tails)
+        self._fast_unmatched = self._suffix_table(self._first_open, tails)
+        self._ext_only = self._first_open == len(self.rules)
+        self._slow_exts = set(self._by_ext) | tails
+
+    def _suffix_table(self, limit: int, tails: Set[str]) -> Dict[str, str]:
+        table: Dict[str, str] = {}
+        for ext, indices in self._by_ext.items():
+            if "." in ext or ext in tails:
+                continue
+            candidates = [i for i in indices if i not in self._patterns]
+            if candidates and candidates[0] < limit and not self.rules[candidates[0]].needs_stat:
+                table[ext] = self.rules[candidates[0]].folder
+        return table
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "RuleSet":
+        return cls(rules_from_config(config))
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, str]) -> "RuleSet":
+        """Wrap a plain ``extension → folder`` mapping."""
+        groups: Dict[str, List[str]] = {}
+        for ext, folder in mapping.items():
+            groups.setdefault(folder, []).append(ext)
+        return cls.from_config({"extension_groups": groups})
+
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Recompute age cut-offs (done once per run, not per file)."""
+        now = time.time() if now is None else now
+        self._cutoffs = {i: (None if r.older_than is None else now - r.older_than,
+                             None if r.newer_than is None else now - r.newer_than)
+                         for i, r in enumerate(self.rules) if r.needs_stat}
+
+    @property
+    def folders(self) -> List[str]:
+        """Every destination folder, in rule order, without duplicates."""
+        return list(dict.fromkeys(rule.folder for rule in self.rules))
+
+    def signature(self) -> List:
+        """JSON-able description of the rules (for cache/index invalidation)."""
+        return [list(rule) for rule in self.rules]
+
+    # -- matching ------------------------------------------------------------
+
+    def _suffix_rules(self, lower: str) -> Tuple[int, ...]:
+        """Indices of extension rules for every suffix of ``lower``, in rule order."""
+        dot = lower.rfind(".")
+        if dot <= 0 or (lower[0] == "." and not lower[:dot].strip(".")):
+            return ()
+        found = self._by_ext.get(lower[dot + 1:], ())
+        parts = 1
+        while parts < self._max_parts:
+            dot = lower.rfind(".", 0, dot)
+            if dot <= 0:
+                break
+            parts += 1
+            longer = self._by_ext.get(lower[dot + 1:])
+            if longer:
+                found = tuple(sorted(found + longer))
+        return found
+
+    def _passes(self, index: int, stat) -> bool:
+        rule = self.rules[index]
+        if not rule.needs_stat:
+            return True
+        if stat is None:
+            return False
+        st = stat()
+        if st is None:
+            return False
+        if rule.min_size is not None and st.st_size < rule.min_size:
+            return False
+        if rule.max_size is not None and st.st_size > rule.max_size:
+            return False
+        older, newer = self._cutoffs[index]
+        if older is not None and st.st_mtime > older:
+            return False
+        if newer is not None and st.st_mtime < newer:
+            return False
+        return True
+
+    def _matches(self, index: int, name: str, lower: str, stat) -> bool:
+        rule = self.rules[index]
+        if rule.extensions and index not in self._suffix_rules(lower):
+            return False
+        pattern = self._patterns.get(index)
+        if pattern is not None and pattern.match(name) is None:
+            return False
+        return self._passes(index, stat)
+
+    def match_name(self, name: str, stat=None) -> Optional[Rule]:
+        """First rule matching ``name``; ``stat`` is a callable returning os.stat_result.
+
+        Without ``stat`` rules with size/age limits never match.
+        """
+        lower = name.lower()
+        best = len(self.rules)
+        for index in self._suffix_rules(lower):
+            pattern = self._patterns.get(index)
+            if (pattern is None or pattern.match(name)) and self._passes(index, stat):
+                best = index
+                break
+        if self._combined is not None and self._first_pattern < best:
+            m = self._combined.match(name)
+            if m is not None:
+                index = self._group_rule[m.lastgroup]
+                if index < best and self._matches(index, name, lower, stat):
+                    best = index
+                else:
+                    # The first pattern hit was rejected by another condition;
+                    # try the later pattern rules one by one (rare).
+                    for later in self._pattern_rules:
+                        if later > index and later < best and self._matches(later, name, lower, stat):
+                            best = later
+                            break
+        if self._first_open < best:
+            for index in self._stat_free:
+                if index >= best:
+                    break
+                if self._matches(index, name, lower, stat):
+                    best = index
+                    break
+        return self.rules[best] if best < len(self.rules) else None
+
+    def match(self, entry: os.DirEntry) -> Optional[Rule]:
+        """First rule matching a directory entry (stat only when a rule needs it)."""
+        return self.match_name(entry.name, lambda: _entry_stat(entry))
+
+    def name_classifier(self) -> Callable[[str], str]:
+        """Compile ``name → folder`` into a closure (size/age rules are ignored).
+
+        Names are first resolved from the suffix tables with every lookup
+        bound to a local; only names those cannot decide run the full rules.
+        """
+        combined = self._combined.match if self._combined is not None else None
+        fast, fast_unmatched = self._fast.get, self._fast_unmatched.get
+        ext_only = self._ext_only and combined is None and not self._pattern_rules
+        ext_only_unmatched = self._ext_only
+        slow_exts = self._slow_exts
+        default = self.default
+        match_name = self.match_name
+
+        def slow(name: str) -> str:
+            rule = match_name(name)
+            return default if rule is None else rule.folder
+
+        def classify_name(name: str) -> str:
+            lookup, only = fast, ext_only
+            if combined is not None:
+                if combined(name) is not None:
+                    return slow(name)
+                lookup, only = fast_unmatched, ext_only_unmatched
+            dot = name.rfind(".")
+            if dot > 0 and name[0] != ".":
+                ext = name[dot + 1:].lower()
+                folder = lookup(ext)
+                if folder is not None:
+                    return folder
+                if only and ext not in slow_exts:
+                    return default
+            elif dot < 0 and only:
+                return default
+            return slow(name)
+
+        return classify_name
+
+    def entry_classifier(self) -> Callable[[os.DirEntry], str]:
+        """Compile ``DirEntry → folder``; stats the entry only when a rule needs it."""
+        classify_name = self.name_classifier()
+        if not any(rule.needs_stat for rule in self.rules):
+            return lambda entry: classify_name(entry.name)
+        default, match = self.default, self.match
+
+        def classify_entry(entry: os.DirEntry) -> str:
+            rule = match(entry)
+            return default if rule is None else rule.folder
+
+        return classify_entry
+
+    def suffix_classifier(self) -> Optional[Callable[[str], Optional[str]]]:
+        """Compile ``lower-cased last suffix → folder`` for plain extension rules, else None.
+
+        Only without glob/regex and size/age rules does the last suffix
+        decide a dotted name; callers may then classify each distinct
+        suffix once. The closure returns None for suffixes that end a
+        multi-part extension ("gz" of "tar.gz"); those names, and names
+        without a suffix or starting with a dot, go through name_classifier.
+        """
+        if self._patterns or not self._ext_only or self._cutoffs:
+            return None
+        lookup, default = self._fast.get, self.default
+        tails = {ext.rsplit(".", 1)[1] for ext in self._by_ext if "." in ext}
+        return lambda suffix: None if suffix in tails else lookup(suffix, default)
+
+    def classify(self, entry: os.DirEntry) -> str:
+        rule = self.match(entry)
+        return self.default if rule is None else rule.folder
+
+    def classify_name(self, name: str) -> str:
+        """Destination folder for a bare name (size/age rules are ignored)."""
+        rule = self.match_name(name)
+        return self.default if rule is None else rule.folder
+
+
+def _entry_stat(entry: os.DirEntry) -> Optional[os.stat_result]:
+    try:
+        return entry.stat(follow_symlinks=False)
+    except OSError:
+        return None
@@ -0,0 +1,86 @@
+"""
+Directory scanner built on os.scandir.
+
+Keeps the per-file syscall cost low: file detection reuses the d_type
+information returned by readdir, and destination directories are listed
+once per run so existence checks become set lookups instead of stat calls.
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+from typing import Callable, Dict, List, Optional, Set
+
+from organizer.crossdev import CopyPool, move_across_devices
+
+
+def scan_files(directory: str | os.PathLike) -> List[os.DirEntry]:
+    """Return the regular files directly inside ``directory`` as DirEntry objects.
+
+    The listing is materialized before any file is moved so renames made by
+    the caller cannot disturb the underlying readdir stream.
+    """
+    with os.scandir(directory) as entries:
+        return [entry for entry in entries if entry.is_file()]
+
+
+class DirectoryCache:
+    """Per-run record of destination directories and the names they contain."""
+
+    def __init__(self) -> None:
+        self._names: Dict[str, Set[str]] = {}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._names
+
+    def ensure_dir(self, path: str, create: bool = True) -> bool:
+        """Make sure ``path`` exists, listing it once. Returns True if it was missing.
+
+        With ``create=False`` a missing directory is only remembered as empty.
+        """
+        if path in self._names:
+            return False
+        try:
+            with os.scandir(path) as entries:
+                self._names[path] = {entry.name for entry in entries}
+            return False
+        except FileNotFoundError:
+            if create:
+                os.makedirs(path, exist_ok=True)
+            self._names[path] = set()
+            return True
+
+    def names(self, path: str) -> Set[str]:
+        """Names known to exist inside ``path`` (listed on first access, never created)."""
+        self.ensure_dir(path, create=False)
+        return self._names[path]
+
+    def has_entry(self, path: str, name: str) -> bool:
+        """Return True if ``name`` already exists inside ``path``."""
+        return name in self.names(path)
+
+    def add_entry(self, path: str, name: str) -> None:
+        """Record that ``name`` now exists inside ``path``."""
+        self.names(path).add(name)
+
+
+def move_file(src: str, dst: str, copier: Optional[CopyPool] = None,
+              on_copied: Optional[Callable[[], None]] = None) -> bool:
+    """Rename ``src`` to ``dst``, switching to a verified copy across devices.
+
+    Returns True when the file is in place, False when the cross-device copy
+    was handed to ``copier`` and will complete in the background; the copier
+    then calls ``on_copied`` once the copy is committed.
+    """
+    try:
+        os.rename(src, dst)
+        return True
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+    if copier is not None:
+        copier.submit(src, dst, on_copied)
+        return False
+    move_across_devices(src, dst)
+    return True
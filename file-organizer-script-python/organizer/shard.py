@@ -0,0 +1,228 @@
+"""
+Fan-out ("sharded") layout for very large category folders.
+
+A flat ``Images/`` folder with millions of entries makes every listing,
+existence check and backup of it slow. A sharded category spreads its
+files over small subdirectories chosen from the file name, e.g.
+``Images/3f/a1/name.jpg``, so no single directory grows unbounded and a
+collision check only has to look at one small shard.
+
+A category switches to the sharded layout once its flat folder holds at
+least the threshold configured for it; the choice (and pattern) is then
+recorded in a marker file inside the folder so it never flips back or
+changes shape. Files already in the flat folder are moved into their shards
+by ``reshard_folder``, which streams the directory and keeps memory bounded
+by the number of shards rather than the number of files.
+
+Patterns are path templates with ``{hash:START:END}`` (hex digest of the
+name), ``{name:START:END}`` (lower-cased file name) and ``{ext}`` fields;
+the default ``{hash:0:2}/{hash:2:4}`` gives 65,536 shards.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from organizer.defaults import DEFAULT_SHARD_PATTERN
+from organizer.metrics import NULL_METRICS, RunMetrics
+from organizer.scanner import DirectoryCache
+
+logger = logging.getLogger(__name__)
+
+MARKER = ".organizer-shards.json"
+
+_FIELD = re.compile(r"\{(hash|name|ext)(?::(\d+):(\d+))?\}")
+
+
+class ShardPattern:
+    """A compiled shard path template."""
+
+    def __init__(self, pattern: str = DEFAULT_SHARD_PATTERN) -> None:
+        self.pattern = pattern
+        self._parts: List[Callable[[str], str]] = []
+        pos = 0
+        for match in _FIELD.finditer(pattern):
+            self._literal(pattern[pos:match.start()])
+            field, start, end = match.group(1), match.group(2), match.group(3)
+            value = {"hash": _name_hash, "name": str.lower, "ext": _extension}[field]
+            if start is not None:
+                s, e = int(start), int(end)
+                self._parts.append(lambda name, value=value, s=s, e=e: _component(value(name)[s:e]))
+            else:
+                self._parts.append(lambda name, value=value: _component(value(name)))
+            pos = match.end()
+        self._literal(pattern[pos:])
+        if not _FIELD.search(pattern) or pattern.startswith("/") or ".." in pattern.split("/"):
+            raise ValueError(f"Invalid shard pattern: {pattern!r}")
+
+    def _literal(self, text: str) -> None:
+        if text:
+            self._parts.append(lambda name, text=text: text)
+
+    def subdir(self, name: str) -> str:
+        """Relative shard directory for file ``name``."""
+        return "".join(part(name) for part in self._parts)
+
+
+def _component(value: str) -> str:
+    # Keep every field a plain path component: no empties, separators or dot-dirs.
+    value = value.replace("/", "_")
+    return "_" if value in ("", ".", "..") else value
+
+
+def _name_hash(name: str) -> str:
+    return hashlib.blake2b(os.fsencode(name), digest_size=8).hexdigest()
+
+
+def _extension(name: str) -> str:
+    return os.path.splitext(name)[1][1:].lower()
+
+
+def read_marker(folder: str) -> Optional[Dict]:
+    """Return the sharding marker of a category folder, or None if it is flat."""
+    try:
+        with open(os.path.join(folder, MARKER), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_marker(folder: str, pattern: str, migrated: bool) -> None:
+    path = os.path.join(folder, MARKER)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"pattern": pattern, "migrated": migrated}, f)
+    os.replace(tmp, path)
+
+
+class _Category:
+    __slots__ = ("pattern", "migrated", "new")
+
+    def __init__(self, pattern: Optional[ShardPattern], migrated: bool = True, new: bool = False) -> None:
+        self.pattern = pattern
+        self.migrated = migrated
+        self.new = new
+
+
+class ShardLayout:
+    """Decides, per category folder, between the flat and the sharded layout.
+
+    Args:
+        thresholds: Category name → number of entries at which its folder
+            switches to the sharded layout (0 shards from the start).
+        pattern: Shard template for newly sharded folders; folders that are
+            already sharded keep the pattern recorded in their marker.
+    """
+
+    def __init__(self, thresholds: Dict[str, int], pattern: str = DEFAULT_SHARD_PATTERN) -> None:
+        self.thresholds = thresholds
+        self.pattern = ShardPattern(pattern)
+        self._categories: Dict[str, _Category] = {}
+
+    def _category(self, folder: str, dirs: DirectoryCache) -> _Category:
+        category = self._categories.get(folder)
+        if category is not None:
+            return category
+        marker = read_marker(folder)
+        if marker is not None:
+            category = _Category(ShardPattern(marker["pattern"]), marker.get("migrated", False))
+        else:
+            threshold = self.thresholds.get(os.path.basename(folder))
+            if threshold is not None and len(dirs.names(folder)) >= threshold:
+                logger.info(f"Sharding {folder} (threshold {threshold}); "
+                            f"run 'reshard' to move its existing files")
+                category = _Category(self.pattern, migrated=False, new=True)
+            else:
+                category = _Category(None)
+        self._categories[folder] = category
+        return category
+
+    def place(self, folder: str, name: str, dirs: DirectoryCache) -> Tuple[str, bool]:
+        """Return ``(dest_dir, taken)`` for file ``name`` going to category ``folder``.
+
+        ``taken`` is True if the name is already used in the category – in its
+        shard, or in the flat folder while that still holds unmigrated files.
+        Reserves the name, so a later file with the same name is reported taken.
+        """
+        category = self._category(folder, dirs)
+        if category.pattern is None:
+            dest_dir = folder
+        else:
+            dest_dir = os.path.join(folder, category.pattern.subdir(name))
+        taken = dirs.names(dest_dir)
+        if name in taken or (dest_dir != folder and not category.migrated
+                             and name in dirs.names(folder)):
+            return dest_dir, True
+        taken.add(name)
+        return dest_dir, False
+
+    def commit(self) -> None:
+        """Write markers for folders this run switched to the sharded layout."""
+        for folder, category in self._categories.items():
+            if category.new and os.path.isdir(folder):
+                write_marker(folder, category.pattern.pattern, migrated=False)
+                category.new = False
+
+
+def reshard_folder(folder: str, pattern: str = DEFAULT_SHARD_PATTERN, dry_run: bool = False,
+                   metrics: RunMetrics = NULL_METRICS) -> Tuple[int, int]:
+    """Move the files of a flat category folder into their shards, in place.
+
+    The folder is streamed with os.scandir and each file is renamed as it is
+    seen, so memory is bounded by the set of shard directories. Because
+    directory order is unspecified while entries are renamed, passes repeat
+    until one finds nothing left to move. Returns ``(moved, kept)`` where
+    ``kept`` counts files left flat because their shard already holds the name.
+
+    Raises:
+        ValueError: If the folder is already sharded with a different pattern.
+    """
+    marker = read_marker(folder)
+    if marker is not None and marker["pattern"] != pattern:
+        raise ValueError(f"{folder} is sharded with pattern {marker['pattern']!r}")
+    shards = ShardPattern(pattern)
+    created: set = set()
+    moved = 0
+    kept: set = set()
+    while True:
+        moved_this_pass = 0
+        with os.scandir(folder) as it:
+            for entry in it:
+                name = entry.name
+                if name == MARKER or name in kept or not entry.is_file(follow_symlinks=False):
+                    continue
+                dest_dir = os.path.join(folder, shards.subdir(name))
+                dest = os.path.join(dest_dir, name)
+                if dry_run:
+                    logger.info("[DRY-RUN] %s → %s/", name, os.path.relpath(dest_dir, folder),
+                                extra={"event": "planned", "file": name, "folder": os.path.basename(folder)})
+                    moved += 1
+                    continue
+                if dest_dir not in created:
+                    with metrics.phase("mkdir"):
+                        os.makedirs(dest_dir, exist_ok=True)
+                    created.add(dest_dir)
+                if os.path.lexists(dest):
+                    logger.warning("Skipped (already exists): %s", name,
+                                   extra={"event": "skipped", "file": name, "folder": os.path.basename(folder)})
+                    kept.add(name)
+                    continue
+                try:
+                    with metrics.phase("rename"):
+                        os.rename(entry.path, dest)
+                except FileNotFoundError:
+                    continue
+                moved_this_pass += 1
+        moved += moved_this_pass
+        if dry_run or not moved_this_pass:
+            break
+    if not dry_run:
+        write_marker(folder, pattern, migrated=not kept)
+    metrics.count("moved", moved)
+    metrics.count("skipped", len(kept))
+    return moved, len(kept)
@@ -0,0 +1,103 @@
+"""
+Budgeted runs ("slices") over large backlogs.
+
+A run with ``max_files`` or ``max_seconds`` stops submitting moves once
+either budget is spent, lets in-flight renames and copies finish, and
+leaves its write-ahead journal (organizer.journal) unfinished. That journal
+is the cursor – by default one per target, see cursor_path: the next
+budgeted run on the same target continues with the recorded moves instead
+of listing the tree again, and only scans for new work once the cursor is
+drained with budget to spare.
+
+The plan can be ordered so that every slice clears the most valuable work
+first: ``oldest`` (by mtime), ``largest`` (by size) or ``directory`` (the
+plan's own destination-grouped order, which needs no extra stat calls).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from organizer.defaults import DEFAULT_STATE_DIR
+
+
+def cursor_path(target: str) -> str:
+    """Default cursor journal of budgeted runs on ``target``: one per target, under DEFAULT_STATE_DIR."""
+    digest = hashlib.sha1(os.fsencode(os.path.realpath(target))).hexdigest()[:16]
+    return os.path.join(DEFAULT_STATE_DIR, "cursors", f"{digest}.jsonl")
+
+
+class SliceBudget:
+    """File-count and wall-clock limits for one run.
+
+    The clock starts when the budget is created, so planning counts
+    against ``max_seconds`` too.
+    """
+
+    def __init__(self, max_files: Optional[int] = None, max_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if max_files is not None and max_files < 0:
+            raise ValueError(f"max_files must not be negative: {max_files}")
+        if max_seconds is not None and max_seconds <= 0:
+            raise ValueError(f"max_seconds must be positive: {max_seconds}")
+        self.max_files = max_files
+        self.max_seconds = max_seconds
+        self.taken = 0
+        self.stopped = False
+        self._clock = clock
+        self._deadline = None if max_seconds is None else clock() + max_seconds
+
+    @classmethod
+    def create(cls, max_files: Optional[int] = None,
+               max_seconds: Optional[float] = None) -> Optional["SliceBudget"]:
+        """A budget, or None when neither limit is set."""
+        if max_files is None and max_seconds is None:
+            return None
+        return cls(max_files, max_seconds)
+
+    def take(self) -> bool:
+        """Claim one move. False once either budget is spent (and from then on)."""
+        if self.stopped:
+            return False
+        if ((self.max_files is not None and self.taken >= self.max_files)
+                or (self._deadline is not None and self._clock() >= self._deadline)):
+            self.stopped = True
+            return False
+        self.taken += 1
+        return True
+
+
+def keyed_tree(tree: Iterable[Tuple[str, List[os.DirEntry]]], order: str,
+               keys: array) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+    """Pass ``tree`` through, appending each file's sort key to ``keys``.
+
+    build_plan adds exactly one entry per file in tree order, so ``keys[i]``
+    belongs to plan entry ``i``. Files that vanish before they are stat'ed
+    sort last.
+    """
+    sign = -1.0 if order == "largest" else 1.0
+    for folder, files in tree:
+        for entry in files:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                keys.append(float("inf"))
+                continue
+            keys.append(sign * (st.st_size if order == "largest" else st.st_mtime))
+        yield folder, files
+
+
+def plan_order(keys: array) -> array:
+    """Plan indices sorted by ``keys`` (stable, so ties keep directory order)."""
+    return array("I", sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def estimate_seconds(done: int, elapsed: float, remaining: int) -> Optional[float]:
+    """Time to finish ``remaining`` moves at this slice's rate, if it moved anything."""
+    if not done or elapsed <= 0:
+        return None
+    return round(remaining * elapsed / done, 1)
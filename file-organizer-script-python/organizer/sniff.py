@@ -0,0 +1,136 @@
+"""
+Content-sniffing classifier for files whose extension is missing or unknown.
+
+Reads at most HEADER_SIZE bytes with a single os.pread – cost is bounded no
+matter how large the file is – and matches magic signatures for the
+configured groups. Results are cached persistently by
+(device, inode, size, mtime) so a file is never read twice across runs.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from typing import AbstractSet, Dict, List, Optional, Tuple
+
+from organizer.defaults import DEFAULT_SNIFF_CACHE
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIZE = 4096
+
+# (offset, magic bytes, group) – checked in order, first match wins.
+SIGNATURES: List[Tuple[int, bytes, str]] = [
+    (0, b"\xff\xd8\xff", "Images"),
+    (0, b"\x89PNG\r\n\x1a\n", "Images"),
+    (0, b"GIF87a", "Images"),
+    (0, b"GIF89a", "Images"),
+    (0, b"II*\x00", "Images"),
+    (0, b"MM\x00*", "Images"),
+    (0, b"\x00\x00\x01\x00", "Images"),
+    (8, b"WEBP", "Images"),
+    (4, b"ftypheic", "Images"),
+    (4, b"ftypmif1", "Images"),
+    (4, b"ftypavif", "Images"),
+    (4, b"ftypM4A", "Audio"),
+    (4, b"ftyp", "Videos"),
+    (0, b"\x1a\x45\xdf\xa3", "Videos"),
+    (8, b"AVI ", "Videos"),
+    (0, b"FLV\x01", "Videos"),
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11", "Videos"),
+    (0, b"ID3", "Audio"),
+    (0, b"fLaC", "Audio"),
+    (0, b"OggS", "Audio"),
+    (8, b"WAVE", "Audio"),
+    (0, b"%PDF-", "Documents"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "Documents"),
+    (0, b"{\\rtf", "Documents"),
+    (0, b"PK\x03\x04", "Archives"),
+    (0, b"7z\xbc\xaf\x27\x1c", "Archives"),
+    (0, b"Rar!\x1a\x07", "Archives"),
+    (0, b"\x1f\x8b", "Archives"),
+    (0, b"BZh", "Archives"),
+    (0, b"\xfd7zXZ\x00", "Archives"),
+    (257, b"ustar", "Archives"),
+    (0, b"MZ", "Executables"),
+    (0, b"\x7fELF", "Executables"),
+    (0, b"\xfe\xed\xfa\xce", "Executables"),
+    (0, b"\xfe\xed\xfa\xcf", "Executables"),
+    (0, b"\xce\xfa\xed\xfe", "Executables"),
+    (0, b"\xcf\xfa\xed\xfe", "Executables"),
+    (0, b"!<arch>\ndebian", "Executables"),
+    (0, b"\xed\xab\xee\xdb", "Executables"),
+]
+
+
+def match_signature(header: bytes, folders: Optional[AbstractSet[str]] = None) -> Optional[str]:
+    """Return the group whose magic bytes match ``header``, if it is a configured folder."""
+    for offset, magic, group in SIGNATURES:
+        if header.startswith(magic, offset) and (folders is None or group in folders):
+            return group
+    return None
+
+
+def read_header(path: str, size: int = HEADER_SIZE) -> bytes:
+    """Read the first ``size`` bytes of ``path`` with one pread call."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    try:
+        return os.pread(fd, size, 0)
+    finally:
+        os.close(fd)
+
+
+class ContentSniffer:
+    """Classify files by content, with a persistent (dev, inode, size, mtime) cache."""
+
+    def __init__(self, folders: AbstractSet[str], cache_path: Optional[str] = DEFAULT_SNIFF_CACHE) -> None:
+        self.folders = frozenset(folders)
+        self.reads = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._fresh: Dict[Tuple[int, int, int, int], str] = {}
+        if cache_path:
+            self._conn = sqlite3.connect(cache_path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sniff (dev INTEGER, ino INTEGER, size INTEGER, "
+                "mtime_ns INTEGER, folder TEXT NOT NULL, PRIMARY KEY (dev, ino, size, mtime_ns)) "
+                "WITHOUT ROWID")
+
+    def classify(self, entry: os.DirEntry) -> Optional[str]:
+        """Return the sniffed folder for ``entry`` or None if nothing matched."""
+        try:
+            st = entry.stat()
+        except OSError:
+            return None
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        folder = self._lookup(key)
+        if folder is None:
+            try:
+                header = read_header(entry.path)
+            except OSError as exc:
+                logger.debug(f"Could not read {entry.path}: {exc}")
+                return None
+            self.reads += 1
+            folder = match_signature(header, self.folders) or ""
+            self._fresh[key] = folder
+        return folder or None
+
+    def _lookup(self, key: Tuple[int, int, int, int]) -> Optional[str]:
+        folder = self._fresh.get(key)
+        if folder is None and self._conn is not None:
+            row = self._conn.execute(
+                "SELECT folder FROM sniff WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+                key).fetchone()
+            folder = row[0] if row else None
+        return folder
+
+    def close(self) -> None:
+        """Persist newly sniffed results and close the cache."""
+        if self._conn is None:
+            return
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO sniff VALUES (?, ?, ?, ?, ?)",
+                                   (key + (folder,) for key, folder in self._fresh.items()))
+        self._conn.close()
+        self._conn = None
+        self._fresh.clear()
@@ -0,0 +1,379 @@
+"""
+Inventory statistics: per-category file counts and bytes, the largest files
+and an age histogram, for capacity planning before and after organizing.
+
+The tree is read with the parallel walker (organizer.walker); each
+directory is summarized inside the walker thread that listed it, so the
+per-file stat calls overlap just like the directory reads. Files are
+classified with the same compiled rules as the organize command – once
+per distinct suffix where the rules allow it – and size/age rules reuse
+the summary's own stat. An uncached scan still costs one stat per file,
+like ``find -printf``; the cache is what makes repeat runs cheap
+(``python -m benchmarks.harness -m stats -m stats-cached -m find``).
+
+Summaries are kept per directory – totals per category, totals per mtime
+day and that directory's largest files – and cached in sqlite, keyed by
+root, so one cache file serves any number of trees. The cache plugs into
+walk_tree the way ScanIndex does: on the next run a directory
+whose mtime is unchanged is only stat'ed and its stored summary reused.
+A directory's mtime does not change when a file in it is rewritten in
+place, so sizes of modified files can lag until ``full`` rescans.
+Ages are bucketed at report time, so a cached summary never goes stale
+just because time passed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from organizer.defaults import DEFAULT_SCAN_WORKERS, DEFAULT_STATS_TOP
+from organizer.index import RACY_WINDOW_NS
+from organizer.metrics import NULL_METRICS, RunMetrics
+from organizer.walker import walk_tree
+
+if TYPE_CHECKING:
+    from organizer.rules import RuleSet
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = "2"
+DAY = 86400
+DAY_NS = DAY * 10 ** 9
+AGE_BUCKETS: Tuple[Tuple[Optional[int], str], ...] = (
+    (1, "< 1 day"), (7, "< 1 week"), (30, "< 1 month"), (90, "< 3 months"),
+    (365, "< 1 year"), (3 * 365, "< 3 years"), (None, ">= 3 years"))
+
+# Per-directory summary, stored as JSON:
+#   {"c": {folder: [files, bytes]}, "d": [[day, files, bytes], ...], "t": [[size, name], ...]}
+Summary = Dict[str, object]
+
+# One cache file holds any number of roots; each root's rows are replaced
+# on its own runs only.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    root TEXT PRIMARY KEY,
+    schema TEXT NOT NULL,
+    signature TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dirs (
+    root TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    subdirs TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    PRIMARY KEY (root, path)
+) WITHOUT ROWID;
+"""
+
+
+def stat_classifier(rules: RuleSet) -> Callable[[str, os.stat_result], str]:
+    """Compile ``(name, stat) → folder``; size/age rules reuse the stat summarize already made."""
+    if not any(rule.needs_stat for rule in rules.rules):
+        classify_name = rules.name_classifier()
+        return lambda name, st: classify_name(name)
+    default, match_name = rules.default, rules.match_name
+
+    def classify(name: str, st: os.stat_result) -> str:
+        rule = match_name(name, lambda: st)
+        return default if rule is None else rule.folder
+
+    return classify
+
+
+def summarize(files: Iterable[os.DirEntry], classify: Callable[[str, os.stat_result], str],
+              top: int = DEFAULT_STATS_TOP, path: Optional[str] = None,
+              by_suffix: Optional[Callable[[str], Optional[str]]] = None) -> Summary:
+    """Summarize one directory's files. Files that vanish meanwhile are left out.
+
+    With ``path`` (the files' directory) each file is stat'ed relative to
+    one directory fd, which saves resolving the full path per file. With
+    ``by_suffix`` (RuleSet.suffix_classifier) each distinct suffix is
+    classified once instead of each name. Files are totalled per
+    (category, day) – one dict update per file – and split afterwards.
+    """
+    totals: Dict[Tuple[str, int], List[int]] = {}
+    suffixes: Dict[str, str] = {}
+    largest: List[Tuple[int, str]] = []
+    floor = -1 if top else float("inf")  # sizes above it enter the top list
+    push, replace = heapq.heappush, heapq.heapreplace
+    dir_fd = None
+    if path is not None and os.stat in os.supports_dir_fd:
+        try:
+            dir_fd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        except OSError:
+            pass
+    stat = os.stat
+    try:
+        for entry in files:
+            name = entry.name
+            try:
+                st = (entry.stat(follow_symlinks=False) if dir_fd is None
+                      else stat(name, dir_fd=dir_fd, follow_symlinks=False))
+            except OSError:
+                continue
+            size = st.st_size
+            folder = ""
+            if by_suffix is not None:
+                dot = name.rfind(".")
+                if dot > 0 and name[0] != ".":
+                    suffix = name[dot + 1:]
+                    folder = suffixes.get(suffix)
+                    if folder is None:
+                        folder = suffixes[suffix] = by_suffix(suffix.lower()) or ""
+            if not folder:
+                folder = classify(name, st)
+            key = (folder, st.st_mtime_ns // DAY_NS)
+            counts = totals.get(key)
+            if counts is None:
+                totals[key] = [1, size]
+            else:
+                counts[0] += 1
+                counts[1] += size
+            if size > floor:
+                if len(largest) < top:
+                    push(largest, (size, name))
+                else:
+                    replace(largest, (size, name))
+                if len(largest) == top:
+                    floor = largest[0][0]
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    categories: Dict[str, List[int]] = {}
+    days: Dict[int, List[int]] = {}
+    for (folder, day), (n, size) in totals.items():
+        for table, key in ((categories, folder), (days, day)):
+            counts = table.get(key)
+            if counts is None:
+                table[key] = [n, size]
+            else:
+                counts[0] += n
+                counts[1] += size
+    return {"c": categories, "d": [[day, n, b] for day, (n, b) in days.items()],
+            "t": [list(item) for item in largest]}
+
+
+class StatsCache:
+    """Per-directory summaries for one root, optionally persisted in sqlite (keyed by root).
+
+    Implements the walker's index hooks (``unchanged_subdirs``, ``note_dir``,
+    ``new_files``); ``new_files`` summarizes the listing and yields nothing.
+    """
+
+    def __init__(self, path: Optional[str], root: str, rules: RuleSet,
+                 settings: Optional[Dict] = None, top: int = DEFAULT_STATS_TOP, full: bool = False) -> None:
+        self.path = path
+        self.root = root
+        self.classify = stat_classifier(rules)
+        self.by_suffix = rules.suffix_classifier()
+        self.top = top
+        self.rescanned = 0
+        self._stored: Dict[str, Tuple[int, List[str], str]] = {}
+        self._listing: Dict[str, Tuple[int, List[str]]] = {}
+        self._seen: Dict[str, Tuple[int, List[str], Summary]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is None:
+            return
+        st = os.stat(root)
+        blob = json.dumps([st.st_dev, st.st_ino, top, settings], sort_keys=True, default=str)
+        self.signature = hashlib.sha256(blob.encode()).hexdigest()
+        self._conn = self._connect()
+        stored = self._conn.execute("SELECT schema, signature FROM roots WHERE root = ?", (root,)).fetchone()
+        if full:
+            logger.info(f"Full rescan requested – rebuilding stats cache for {root}")
+        elif stored == (SCHEMA_VERSION, self.signature):
+            for row_path, mtime_ns, subdirs, summary in self._conn.execute(
+                    "SELECT path, mtime_ns, subdirs, summary FROM dirs WHERE root = ?", (root,)):
+                self._stored[row_path] = (mtime_ns, subdirs.split("\0") if subdirs else [], summary)
+        else:
+            logger.info(f"Stats cache {path} is stale or missing for {root} – rebuilding")
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            conn = sqlite3.connect(self.path)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(dirs)")]
+            if columns and "root" not in columns:  # single-root layout of schema 1
+                conn.executescript("DROP TABLE dirs; DROP TABLE IF EXISTS meta;")
+            conn.executescript(_SCHEMA)
+        except sqlite3.DatabaseError as exc:
+            logger.warning(f"Stats cache {self.path} is corrupt ({exc}) – recreating")
+            os.remove(self.path)
+            conn = sqlite3.connect(self.path)
+            conn.executescript(_SCHEMA)
+        return conn
+
+    # -- walker hooks (called from walker threads) ----------------------------
+
+    def unchanged_subdirs(self, path: str, mtime_ns: int) -> Optional[List[str]]:
+        stored = self._stored.get(path)
+        if stored is None or stored[0] != mtime_ns or mtime_ns < 0:
+            return None
+        summary = json.loads(stored[2])
+        with self._lock:
+            self._seen[path] = (mtime_ns, stored[1], summary)
+        return stored[1]
+
+    def note_dir(self, path: str, mtime_ns: int, stat_time_ns: int, subdirs: List[str]) -> None:
+        if stat_time_ns - mtime_ns < RACY_WINDOW_NS:
+            mtime_ns = -1
+        with self._lock:
+            self._listing[path] = (mtime_ns, subdirs)
+
+    def new_files(self, path: str, files: Iterable[os.DirEntry]) -> List[os.DirEntry]:
+        summary = summarize(files, self.classify, self.top, path, self.by_suffix)
+        with self._lock:
+            mtime_ns, subdirs = self._listing.pop(path)
+            self._seen[path] = (mtime_ns, subdirs, summary)
+            self.rescanned += 1
+        return []
+
+    # -- results ----------------------------------------------------------------
+
+    def summaries(self) -> Dict[str, Summary]:
+        """Summary of every directory reached by the walk, listed or cached."""
+        return {path: seen[2] for path, seen in self._seen.items()}
+
+    def commit(self) -> None:
+        """Replace this root's stored summaries with this walk's (directories gone since are dropped)."""
+        if self._conn is None:
+            return
+        root = self.root
+        with self._conn:
+            self._conn.execute("DELETE FROM dirs WHERE root = ?", (root,))
+            self._conn.executemany(
+                "INSERT INTO dirs (root, path, mtime_ns, subdirs, summary) VALUES (?, ?, ?, ?, ?)",
+                ((root, p, m, "\0".join(s), json.dumps(summary, separators=(",", ":")))
+                 for p, (m, s, summary) in self._seen.items()))
+            self._conn.execute("INSERT OR REPLACE INTO roots (root, schema, signature) VALUES (?, ?, ?)",
+                               (root, SCHEMA_VERSION, self.signature))
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+@dataclass
+class InventoryStats:
+    """Totals for one tree, merged from its directory summaries."""
+
+    root: str
+    files: int = 0
+    bytes: int = 0
+    directories: int = 0
+    rescanned: int = 0
+    categories: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    largest: List[Dict[str, object]] = field(default_factory=list)
+    ages: List[Dict[str, object]] = field(default_factory=list)
+    duration_s: float = 0.0
+
+    @classmethod
+    def merge(cls, root: str, summaries: Dict[str, Summary], top: int = DEFAULT_STATS_TOP,
+              now: Optional[float] = None) -> "InventoryStats":
+        stats = cls(root, directories=len(summaries))
+        categories: Dict[str, List[int]] = {}
+        ages = [[0, 0] for _ in AGE_BUCKETS]
+        today = int((time.time() if now is None else now) // DAY)
+        for summary in summaries.values():
+            for folder, (n, size) in summary["c"].items():
+                totals = categories.setdefault(folder, [0, 0])
+                totals[0] += n
+                totals[1] += size
+            for day, n, size in summary["d"]:
+                age = today - day
+                for i, (limit, _) in enumerate(AGE_BUCKETS):
+                    if limit is None or age < limit:
+                        ages[i][0] += n
+                        ages[i][1] += size
+                        break
+        for folder, (n, size) in sorted(categories.items(), key=lambda item: (-item[1][1], item[0])):
+            stats.categories[folder] = {"files": n, "bytes": size}
+            stats.files += n
+            stats.bytes += size
+        stats.largest = [{"path": os.path.join(directory, name), "bytes": size} for size, directory, name in
+                         heapq.nlargest(top, ((size, directory, name) for directory, summary in summaries.items()
+                                              for size, name in summary["t"]))]
+        stats.ages = [{"age": label, "files": n, "bytes": size}
+                      for (_, label), (n, size) in zip(AGE_BUCKETS, ages)]
+        return stats
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def format_table(self) -> str:
+        """Plain-text report."""
+        lines = [f"{self.root}: {self.files} file(s), {format_bytes(self.bytes)} in "
+                 f"{self.directories} directories ({self.rescanned} rescanned, {self.duration_s:.2f}s)", ""]
+        width = max([len("Category")] + [len(folder) for folder in self.categories])
+        lines.append(f"{'Category':<{width}}  {'Files':>10}  {'Bytes':>10}  {'Share':>6}")
+        for folder, totals in self.categories.items():
+            share = totals["bytes"] / self.bytes * 100 if self.bytes else 0.0
+            lines.append(f"{folder:<{width}}  {totals['files']:>10}  {format_bytes(totals['bytes']):>10}  "
+                         f"{share:>5.1f}%")
+        lines += ["", f"{'Age':<12}  {'Files':>10}  {'Bytes':>10}"]
+        lines += [f"{row['age']:<12}  {row['files']:>10}  {format_bytes(row['bytes']):>10}" for row in self.ages]
+        if self.largest:
+            lines += ["", "Largest files:"]
+            lines += [f"  {format_bytes(row['bytes']):>10}  {row['path']}" for row in self.largest]
+        return "\n".join(lines)
+
+
+def format_bytes(n: int) -> str:
+    """``1536`` → ``1.5 KiB``."""
+    size = float(n)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{n} B" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def collect_stats(
+    root: str,
+    rules: RuleSet,
+    max_depth: Optional[int] = None,
+    workers: int = DEFAULT_SCAN_WORKERS,
+    top: int = DEFAULT_STATS_TOP,
+    cache_path: Optional[str] = None,
+    full: bool = False,
+    metrics: RunMetrics = NULL_METRICS,
+) -> InventoryStats:
+    """Inventory the tree under ``root``.
+
+    ``cache_path`` keeps per-directory summaries between calls; ``full``
+    ignores what is stored there and rebuilds it.
+
+    Raises:
+        NotADirectoryError: If ``root`` is not a directory.
+    """
+    start = time.perf_counter()
+    root = os.path.realpath(os.path.expanduser(root))
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"Target directory does not exist: {root}")
+    rules.refresh()
+    settings = {"rules": rules.signature(), "max_depth": max_depth}
+    cache = StatsCache(cache_path, root, rules, settings, top, full)
+    try:
+        for _ in walk_tree(root, max_depth=max_depth, workers=workers, index=cache, metrics=metrics):
+            pass
+        stats = InventoryStats.merge(root, cache.summaries(), top)
+        stats.rescanned = cache.rescanned
+        with metrics.phase("index"):
+            cache.commit()
+    finally:
+        cache.close()
+    stats.duration_s = round(time.perf_counter() - start, 6)
+    return stats
@@ -0,0 +1,275 @@
+"""
+I/O budget for the move executor: token buckets, adaptive back-off and
+process priority.
+
+Organizing a busy share competes with the applications writing into it, so
+a run can be held to a budget:
+
+* ``max_bytes_per_sec`` – cross-device copy bandwidth, charged per copied
+  chunk;
+* ``max_ops_per_sec`` – metadata operations (mkdir and rename), charged
+  before each one.
+
+Each limit is a token bucket that goes into debt instead of rejecting work:
+a caller reserves its tokens and sleeps until the bucket is back in credit,
+so concurrent executor and copier threads share the rate fairly without
+polling.
+
+In adaptive mode every metadata operation's latency feeds an exponentially
+weighted average. Twice a second it is compared with the lowest average
+seen so far (the uncontended latency). When it has doubled, both rates
+are halved, and an unlimited bucket is first capped at the rate it was
+observed to run at. Once latency is back near the baseline, the rates grow
+by a quarter per interval up to their configured limit (or back to
+unlimited).
+
+``ionice`` (idle or best-effort) and ``nice`` lower the process's disk and
+CPU priority on Linux/Unix; threads started afterwards inherit both.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, TypeVar
+
+from organizer.rules import parse_size
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BURST_SECONDS = 0.25
+MIN_OPS_PER_SEC = 1.0
+MIN_BYTES_PER_SEC = 64 * 1024
+ADJUST_INTERVAL = 0.5
+LATENCY_ALPHA = 0.2
+WARMUP_SAMPLES = 8
+BACKOFF_LATENCY_RATIO = 2.0
+RECOVER_LATENCY_RATIO = 1.25
+BACKOFF_FACTOR = 0.5
+RECOVER_FACTOR = 1.25
+
+IONICE_CLASSES = {"best-effort": 2, "idle": 3}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+# ioprio_set has no libc wrapper; syscall numbers per architecture.
+_IOPRIO_SET = {"x86_64": 251, "amd64": 251, "i386": 289, "i686": 289, "aarch64": 30,
+               "arm64": 30, "armv7l": 314, "ppc64le": 273, "s390x": 282, "riscv64": 30}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``take`` blocks until the tokens are paid for.
+
+    ``rate`` None means unlimited. ``limit`` is the configured rate that
+    adaptive back-off lowers ``rate`` from and recovers towards.
+    """
+
+    def __init__(self, rate: Optional[float] = None, floor: float = MIN_OPS_PER_SEC,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError(f"Rate must be positive: {rate}")
+        self.limit = rate
+        self.rate = rate
+        self.floor = floor
+        self.taken = 0
+        self.waited = 0.0
+        self._clock, self._sleep = clock, sleep
+        self._lock = threading.Lock()
+        self._tokens = self._capacity()
+        self._stamp = clock()
+        self._mark = 0
+        self._ceiling: Optional[float] = None
+
+    def _capacity(self) -> float:
+        return 0.0 if self.rate is None else max(1.0, self.rate * BURST_SECONDS)
+
+    def take(self, n: float = 1) -> float:
+        """Charge ``n`` tokens, sleeping while the bucket is in debt. Returns seconds slept."""
+        with self._lock:
+            self.taken += n
+            if self.rate is None:
+                return 0.0
+            now = self._clock()
+            self._tokens = min(self._capacity(), self._tokens + (now - self._stamp) * self.rate) - n
+            self._stamp = now
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def back_off(self, elapsed: float) -> None:
+        """Cut the rate; an unlimited bucket is capped at its rate over the last ``elapsed`` seconds."""
+        with self._lock:
+            used, self._mark = self.taken - self._mark, self.taken
+            if self.rate is None:
+                if not used or elapsed <= 0:
+                    return
+                self._ceiling = used / elapsed
+                self.rate = self._ceiling
+                self._stamp = self._clock()
+                self._tokens = 0.0
+            self.rate = max(self.floor, self.rate * BACKOFF_FACTOR)
+
+    def recover(self) -> None:
+        """Raise a backed-off rate towards its limit (or back to unlimited)."""
+        with self._lock:
+            self._mark = self.taken
+            if self.rate is None or self.rate == self.limit:
+                return
+            self.rate *= RECOVER_FACTOR
+            ceiling = self.limit if self.limit is not None else self._ceiling
+            if ceiling is not None and self.rate >= ceiling:
+                self.rate = self.limit
+
+
+class IOBudget:
+    """Copy-bandwidth and metadata-operation limits shared by one run's threads."""
+
+    def __init__(self, bytes_per_sec: Optional[float] = None, ops_per_sec: Optional[float] = None,
+                 adaptive: bool = False, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.bytes = TokenBucket(bytes_per_sec, MIN_BYTES_PER_SEC, clock, sleep)
+        self.ops = TokenBucket(ops_per_sec, MIN_OPS_PER_SEC, clock, sleep)
+        self.adaptive = adaptive
+        self.backoffs = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latency: Optional[float] = None
+        self._baseline = float("inf")
+        self._samples = 0
+        self._adjusted = clock()
+
+    @property
+    def waited(self) -> float:
+        """Seconds threads spent sleeping on either bucket."""
+        return self.bytes.waited + self.ops.waited
+
+    def copied(self, n: int) -> None:
+        """Charge ``n`` copied bytes."""
+        self.bytes.take(n)
+
+    def op(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run one metadata operation within the budget, timing it in adaptive mode."""
+        self.ops.take(1)
+        if not self.adaptive:
+            return func(*args, **kwargs)
+        start = self._clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.observe(self._clock() - start)
+
+    def observe(self, seconds: float) -> None:
+        """Feed one operation latency to the adaptive controller."""
+        with self._lock:
+            latency = self._latency = (seconds if self._latency is None
+                                       else self._latency + LATENCY_ALPHA * (seconds - self._latency))
+            self._samples += 1
+            if self._samples < WARMUP_SAMPLES:
+                return
+            self._baseline = min(self._baseline, latency)
+            now = self._clock()
+            elapsed = now - self._adjusted
+            if elapsed < ADJUST_INTERVAL:
+                return
+            self._adjusted = now
+            backing_off = latency > self._baseline * BACKOFF_LATENCY_RATIO
+            recovering = latency < self._baseline * RECOVER_LATENCY_RATIO
+        if backing_off:
+            self.backoffs += 1
+            logger.debug(f"I/O latency {latency * 1000:.1f} ms (baseline {self._baseline * 1000:.1f} ms)"
+                         " – backing off")
+            self.ops.back_off(elapsed)
+            self.bytes.back_off(elapsed)
+        elif recovering:
+            self.ops.recover()
+            self.bytes.recover()
+
+
+class ThrottleSettings(NamedTuple):
+    """The ``throttle`` config section merged with command-line overrides."""
+
+    max_bytes_per_sec: Optional[int] = None
+    max_ops_per_sec: Optional[float] = None
+    adaptive: bool = False
+    ionice: Optional[str] = None
+    nice: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, section: Optional[Dict] = None, **overrides) -> "ThrottleSettings":
+        """Settings from a config section; overrides that are not None win.
+
+        Raises:
+            ValueError: If a rate, size or priority class is invalid.
+        """
+        merged = dict(section or {})
+        merged.update({key: value for key, value in overrides.items() if value is not None})
+        unknown = set(merged) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown throttle setting(s): {', '.join(sorted(unknown))}")
+        size = merged.get("max_bytes_per_sec")
+        ops = merged.get("max_ops_per_sec")
+        ionice = merged.get("ionice")
+        if ionice is not None and ionice not in IONICE_CLASSES:
+            raise ValueError(f"Unknown ionice class: {ionice!r} (expected one of {', '.join(IONICE_CLASSES)})")
+        nice = merged.get("nice")
+        settings = cls(None if size is None else parse_size(size), None if ops is None else float(ops),
+                       bool(merged.get("adaptive", False)), ionice, None if nice is None else int(nice))
+        if (settings.max_bytes_per_sec is not None and settings.max_bytes_per_sec <= 0) or \
+                (settings.max_ops_per_sec is not None and settings.max_ops_per_sec <= 0):
+            raise ValueError("Throttle rates must be positive")
+        return settings
+
+    def budget(self) -> Optional[IOBudget]:
+        """IOBudget for one run, or None when nothing is limited."""
+        if self.max_bytes_per_sec is None and self.max_ops_per_sec is None and not self.adaptive:
+            return None
+        return IOBudget(self.max_bytes_per_sec, self.max_ops_per_sec, self.adaptive)
+
+    def apply_priority(self) -> None:
+        """Lower this process's I/O and CPU priority as configured."""
+        if self.ionice is not None:
+            set_io_priority(self.ionice)
+        if self.nice is not None:
+            set_nice(self.nice)
+
+
+def set_io_priority(io_class: str) -> bool:
+    """ioprio_set the calling thread (and threads it starts) to ``io_class``. Linux only."""
+    import platform
+
+    number = _IOPRIO_SET.get(platform.machine().lower())
+    if not sys.platform.startswith("linux") or number is None:
+        logger.warning(f"ionice is not supported on {sys.platform}/{platform.machine()}; ignoring")
+        return False
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    level = 7 if io_class == "best-effort" else 0
+    value = (IONICE_CLASSES[io_class] << IOPRIO_CLASS_SHIFT) | level
+    if libc.syscall(number, IOPRIO_WHO_PROCESS, 0, value) != 0:
+        logger.warning(f"ioprio_set({io_class}) failed: {os.strerror(ctypes.get_errno())}")
+        return False
+    logger.debug(f"I/O priority set to {io_class}")
+    return True
+
+
+def set_nice(nice: int) -> bool:
+    """Raise the niceness to ``nice``; lowering it would need privileges and is skipped."""
+    if not hasattr(os, "nice"):
+        logger.warning("nice is not supported on this platform; ignoring")
+        return False
+    current = os.nice(0)
+    if nice <= current:
+        if nice < current:
+            logger.warning(f"Not lowering niceness from {current} to {nice}")
+        return False
+    os.nice(nice - current)
+    logger.debug(f"Niceness set to {nice}")
+    return True
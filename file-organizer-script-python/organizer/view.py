@@ -0,0 +1,304 @@
+"""
+Link views: the organized layout built from links, leaving the source alone.
+
+Instead of moving files, a view mirrors the category layout in a separate
+``view_root`` – ``Images/``, ``Documents/`` and so on – with one link per
+source file: a hardlink when the view is on the source's device, a symlink
+otherwise (or where the filesystem refuses hardlinks). No data is copied
+and nothing under the source tree is modified.
+
+Every run is an incremental sync with one scan of each side:
+
+* the source tree is walked in parallel; a file is identified by its path
+  and, from the directory entry alone, its inode – no per-file stat unless
+  a size/age rule needs one;
+* the view is listed once; each entry is identified by its own inode
+  (a hardlink shares the source's), a symlink also by its target.
+
+A marker file at the view root records the target and every link the
+organizer created there. A view is only created in an empty or missing
+directory, and only links the organizer owns are ever pruned – those in
+the marker, hardlinks of a scanned source and symlinks into the target –
+so files put there by hand are left alone. Owned entries whose source was
+deleted or replaced, or that the rules now put elsewhere, are pruned, then
+missing links are created. A hardlink shares its data with the source, so
+the view must be treated as read-only.
+
+Two source files that map to the same view name keep the one already
+linked (else the first found); the other is skipped, as is a source whose
+view name is taken by a file the organizer does not own.
+"""
+
+from __future__ import annotations
+
+import errno
+import json
+import logging
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from organizer.defaults import DEFAULT_SCAN_WORKERS
+from organizer.metrics import NULL_METRICS, RunMetrics
+from organizer.walker import walk_tree
+
+logger = logging.getLogger(__name__)
+
+MARKER = ".organizer-view.json"
+
+
+class Source(NamedTuple):
+    path: str
+    dev: int
+    ino: int
+
+
+class ViewEntry(NamedTuple):
+    ident: Tuple[int, int]  # (dev, ino) of the entry itself, not following symlinks
+    link: Optional[str]  # symlink target, None for anything else
+
+
+class ViewSync(NamedTuple):
+    """Outcome of one view sync."""
+
+    files: int  # source files seen
+    linked: int  # hardlinks created
+    symlinked: int  # symlinks created
+    pruned: int  # stale view entries removed
+    kept: int  # links already up to date
+    skipped: int  # source files whose view name was taken
+
+
+def _matches(entry: ViewEntry, source: Source) -> bool:
+    return entry.ident == (source.dev, source.ino) or (entry.link is not None and entry.link == source.path)
+
+
+def check_view_root(target: str, view_root: str) -> Set[str]:
+    """Validate ``view_root`` against ``target``; return names to skip in the source walk.
+
+    Raises:
+        ValueError: If the view would contain the target, or sits inside
+            it anywhere but directly below it.
+    """
+    if view_root == target or target.startswith(view_root.rstrip(os.sep) + os.sep):
+        raise ValueError(f"View root {view_root} must not contain the target {target}")
+    if view_root.startswith(target.rstrip(os.sep) + os.sep):
+        if os.path.dirname(view_root) != target:
+            raise ValueError(f"View root {view_root} inside the target must be a direct subdirectory")
+        return {os.path.basename(view_root)}
+    return set()
+
+
+def read_marker(view_root: str) -> Optional[Dict]:
+    """Return the marker of a view root, or None if the directory is not a view."""
+    try:
+        with open(os.path.join(view_root, MARKER), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_marker(view_root: str, target: str, links: Dict[str, Tuple[int, int]]) -> None:
+    """Record ``target`` and the links the organizer owns: view-relative path → (dev, ino)."""
+    path = os.path.join(view_root, MARKER)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"target": target, "links": links}, f)
+    os.replace(tmp, path)
+
+
+def claim_view_root(target: str, view_root: str) -> Dict[str, Tuple[int, int]]:
+    """The links recorded for an existing view, or none for a new one.
+
+    Raises:
+        ValueError: If ``view_root`` is a non-empty directory that is not a
+            view, or the view of another target.
+    """
+    marker = read_marker(view_root)
+    if marker is None:
+        if os.path.isdir(view_root) and os.listdir(view_root):
+            raise ValueError(f"View root {view_root} is not empty and was not created by the organizer")
+        return {}
+    if marker.get("target") != target:
+        raise ValueError(f"View root {view_root} is the view of {marker.get('target')}, not {target}")
+    return {rel: tuple(ident) for rel, ident in marker.get("links", {}).items()}
+
+
+def scan_view(view_root: str) -> Dict[str, ViewEntry]:
+    """Every file and symlink under ``view_root`` (dangling symlinks included), but the marker."""
+    entries: Dict[str, ViewEntry] = {}
+    if not os.path.isdir(view_root):
+        return entries
+    stack = [view_root]
+    while stack:
+        directory = stack.pop()
+        try:
+            dev = os.stat(directory).st_dev
+            with os.scandir(directory) as listing:
+                for entry in listing:
+                    if entry.is_symlink():
+                        entries[entry.path] = ViewEntry((dev, entry.inode()), os.readlink(entry.path))
+                    elif entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif directory != view_root or not entry.name.startswith(MARKER):
+                        entries[entry.path] = ViewEntry((dev, entry.inode()), None)
+        except OSError as exc:
+            logger.warning(f"Skipped unreadable view directory: {directory} ({exc})")
+    return entries
+
+
+def _link(source: Source, path: str, view_dev: int) -> bool:
+    """Create ``path`` for ``source``. Returns True for a hardlink, False for a symlink."""
+    if source.dev == view_dev:
+        try:
+            os.link(source.path, path, follow_symlinks=False)
+            return True
+        except OSError as exc:
+            if exc.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP):
+                raise
+    os.symlink(source.path, path)
+    return False
+
+
+def _prune_dirs(directories: Set[str], view_root: str) -> None:
+    """Remove directories emptied by pruning, up to (not including) the view root."""
+    for directory in sorted(directories, key=len, reverse=True):
+        while directory != view_root and directory.startswith(view_root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+
+def sync_view(
+    target: str,
+    view_root: str,
+    classify: Callable[[os.DirEntry], str],
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    flatten: bool = True,
+    workers: int = DEFAULT_SCAN_WORKERS,
+    dry_run: bool = False,
+    metrics: RunMetrics = NULL_METRICS,
+) -> ViewSync:
+    """Bring the link view of ``target`` at ``view_root`` up to date.
+
+    ``classify`` maps each source entry to its category folder, as for
+    build_plan. ``flatten`` puts every file in the view's top-level
+    category folders; otherwise each source directory gets its own
+    category folders at its relative path in the view. ``dry_run`` only
+    logs what would change.
+
+    Raises:
+        ValueError: If ``view_root`` overlaps ``target`` (see check_view_root)
+            or is a directory the organizer does not own (see claim_view_root).
+    """
+    target = os.path.realpath(target)
+    view_root = os.path.realpath(os.path.expanduser(view_root))
+    skip = check_view_root(target, view_root)
+    recorded = claim_view_root(target, view_root)
+    if not dry_run:
+        os.makedirs(view_root, exist_ok=True)
+        write_marker(view_root, target, recorded)
+    classify = metrics.timed("classify", classify)
+
+    desired: Dict[str, Source] = {}
+    contested: Dict[str, List[Source]] = {}
+    scanned: Set[Tuple[int, int]] = set()
+    files = 0
+    for folder, entries in walk_tree(target, skip, max_depth=max_depth if recursive else 0,
+                                     workers=workers if recursive else 1, metrics=metrics):
+        dev = os.stat(folder).st_dev
+        base = view_root if flatten else os.path.normpath(os.path.join(view_root, os.path.relpath(folder, target)))
+        for entry in entries:
+            files += 1
+            path = os.path.join(base, classify(entry), entry.name)
+            source = Source(entry.path, dev, entry.inode())
+            scanned.add((dev, source.ino))
+            if path in desired:
+                contested.setdefault(path, [desired[path]]).append(source)
+            else:
+                desired[path] = source
+
+    with metrics.phase("view_scan"):
+        existing = scan_view(view_root)
+    skipped = 0
+    for path, candidates in contested.items():
+        current = existing.get(path)
+        if current is not None:
+            desired[path] = next((s for s in candidates if _matches(current, s)), candidates[0])
+        skipped += len(candidates) - 1
+        logger.warning(f"View name {path} is wanted by {len(candidates)} files; linking {desired[path].path}")
+
+    inside = target.rstrip(os.sep) + os.sep
+    owned: Dict[str, Tuple[int, int]] = {}
+    foreign: Set[str] = set()
+    pruned = kept = linked = symlinked = 0
+    emptied: Set[str] = set()
+    view_dev = None
+    created: Set[str] = set()
+    try:
+        with metrics.phase("prune"):
+            for path, entry in existing.items():
+                rel = os.path.relpath(path, view_root)
+                source = desired.get(path)
+                if source is not None and _matches(entry, source):
+                    kept += 1
+                    owned[rel] = entry.ident
+                    continue
+                if not (recorded.get(rel) == entry.ident or entry.ident in scanned
+                        or (entry.link is not None and entry.link.startswith(inside))):
+                    foreign.add(path)  # not ours: never pruned, and its name is not linked over
+                    continue
+                pruned += 1
+                logger.info("%sPruned: %s", "[DRY-RUN] " if dry_run else "", path,
+                            extra={"event": "pruned", "file": os.path.basename(path),
+                                   "folder": os.path.basename(os.path.dirname(path))})
+                if not dry_run:
+                    os.unlink(path)
+                    emptied.add(os.path.dirname(path))
+        if not dry_run:
+            _prune_dirs(emptied, view_root)
+
+        with metrics.phase("link"):
+            for path, source in desired.items():
+                entry = existing.get(path)
+                if entry is not None and _matches(entry, source):
+                    continue
+                if path in foreign:
+                    skipped += 1
+                    logger.warning(f"View name {path} is taken by a file the organizer does not own; "
+                                   f"not linking {source.path}")
+                    continue
+                folder = os.path.basename(os.path.dirname(path))
+                if dry_run:
+                    linked += 1
+                    logger.info("[DRY-RUN] Link %s → %s/", os.path.basename(path), folder,
+                                extra={"event": "planned", "file": os.path.basename(path), "folder": folder})
+                    continue
+                directory = os.path.dirname(path)
+                if directory not in created:
+                    os.makedirs(directory, exist_ok=True)
+                    created.add(directory)
+                if view_dev is None:
+                    view_dev = os.stat(view_root).st_dev
+                if _link(source, path, view_dev):
+                    linked += 1
+                    ident = (source.dev, source.ino)
+                else:
+                    symlinked += 1
+                    ident = (view_dev, os.lstat(path).st_ino)
+                owned[os.path.relpath(path, view_root)] = ident
+                logger.info("Linked: %s → %s/", os.path.basename(path), folder,
+                            extra={"event": "linked", "file": os.path.basename(path), "folder": folder})
+    except BaseException:
+        if not dry_run:
+            # Keep what was recorded but not reached; stale entries no longer match any file.
+            write_marker(view_root, target, {**recorded, **owned})
+        raise
+    if not dry_run:
+        write_marker(view_root, target, owned)
+    metrics.count("files_seen", files)
+    metrics.count("linked", linked + symlinked)
+    metrics.count("pruned", pruned)
+    return ViewSync(files, linked, symlinked, pruned, kept, skipped)
@@ -0,0 +1,132 @@
+"""
+inotify-driven directory watcher (Linux, stdlib ctypes only).
+
+Only files that are complete are reported: the watch listens for
+IN_CLOSE_WRITE (a writer closed the file) and IN_MOVED_TO (a finished file
+was renamed in). Moves *out* of the directory – which is what organizing
+does – and directory creation are not subscribed to, so the organizer never
+reacts to its own work. Events are debounced into batches of names.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import AbstractSet, Iterator, List, Optional, Set, Tuple
+
+from organizer.defaults import DEFAULT_DEBOUNCE, DEFAULT_MAX_DELAY
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class InotifyWatch:
+    """Minimal inotify wrapper watching a single directory."""
+
+    def __init__(self, path: str, mask: int = IN_CLOSE_WRITE | IN_MOVED_TO) -> None:
+        libc_name = ctypes.util.find_library("c")
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            init1, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except (OSError, AttributeError) as exc:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform") from exc
+
+        self.fd = init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        if add_watch(self.fd, os.fsencode(path), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err), path)
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def read_events(self) -> List[Tuple[int, str]]:
+        """Return pending ``(mask, name)`` events without blocking."""
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    def __enter__(self) -> "InotifyWatch":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def watch_batches(
+    path: str,
+    ignore_names: AbstractSet[str] = frozenset(),
+    debounce: float = DEFAULT_DEBOUNCE,
+    max_delay: float = DEFAULT_MAX_DELAY,
+    stop: Optional[threading.Event] = None,
+) -> Iterator[Optional[Set[str]]]:
+    """Yield batches of completed file names landing in ``path``.
+
+    A batch is released once no event arrived for ``debounce`` seconds, or
+    ``max_delay`` seconds after its first event under a steady stream.
+    ``None`` is yielded when the kernel queue overflowed and events were
+    lost – the caller should rescan the whole directory. Returns when
+    ``stop`` is set.
+    """
+    stop = stop or threading.Event()
+    with InotifyWatch(path) as watch:
+        pending: Set[str] = set()
+        overflow = False
+        first = last = 0.0
+        while not stop.is_set():
+            timeout = debounce if (pending or overflow) else 1.0
+            ready, _, _ = select.select([watch], [], [], timeout)
+            now = time.monotonic()
+            if ready:
+                for mask, name in watch.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        logger.warning("inotify queue overflowed – rescanning directory")
+                        if not (pending or overflow):
+                            first = now  # the rescan is a batch of its own
+                        overflow = True
+                    elif mask & IN_IGNORED:
+                        logger.error(f"Watched directory went away: {path}")
+                        return
+                    elif not mask & IN_ISDIR and name and name not in ignore_names:
+                        if not (pending or overflow):
+                            first = now
+                        pending.add(name)
+                    last = now
+
+            if (pending or overflow) and (now - last >= debounce or now - first >= max_delay):
+                yield None if overflow else pending
+                pending = set()
+                overflow = False
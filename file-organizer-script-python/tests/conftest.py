@@ -0,0 +1,38 @@
+"""
+Shared fixtures: keep the compiled-config cache out of the user's home.
+
+``python -m pytest`` from the project root also collects the legacy suite
+(legacy/file_organizer/tests), which has a top-level ``main`` of its own;
+these tests always get the project's main.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if sys.path[0] != ROOT:
+    sys.path.insert(0, ROOT)
+loaded = getattr(sys.modules.get("main"), "__file__", None)
+if loaded and os.path.dirname(os.path.abspath(loaded)) != ROOT:
+    del sys.modules["main"]
+
+import main  # noqa: E402
+from organizer.configcache import CACHE_DIR_ENV  # noqa: E402
+
+
+def pytest_pycollect_makemodule(module_path, parent):
+    sys.modules["main"] = main  # for module-level imports; then default collection
+
+
+@pytest.fixture(autouse=True)
+def project_main(monkeypatch):
+    monkeypatch.setitem(sys.modules, "main", main)
+
+
+@pytest.fixture(autouse=True)
+def config_cache_dir(tmp_path_factory, monkeypatch):
+    directory = tmp_path_factory.mktemp("config-cache")
+    monkeypatch.setenv(CACHE_DIR_ENV, str(directory))
+    return directory
@@ -0,0 +1,73 @@
+"""
+Tests for the in-process API in organizer/api.py.
+"""
+
+import os
+import subprocess
+import sys
+
+from organizer import Organizer, OrganizerConfig
+
+CONFIG = {"extension_groups": {"Images": ["jpg"], "Documents": ["txt"], "Others": []},
+          "collisions": "suffix", "throttle": {"max_ops_per_sec": 10000}}
+
+
+def make_batch(root, name, files):
+    target = root / name
+    target.mkdir()
+    for file in files:
+        (target / file).parent.mkdir(parents=True, exist_ok=True)
+        (target / file).write_text(file)
+    return str(target)
+
+
+def test_run_returns_structured_result(tmp_path):
+    target = make_batch(tmp_path, "in", ["a.jpg", "b.txt", "c.txt", "Documents/c.txt"])
+    organizer = Organizer(OrganizerConfig.from_dict(CONFIG))
+
+    preview = organizer.run(target, dry_run=True)
+    result = organizer.run(target)
+
+    assert (preview.dry_run, preview.files, preview.planned, preview.moved) == (True, 3, 3, 0)
+    assert (result.ok, result.files, result.moved, result.renamed, result.skipped) == (True, 3, 3, 1, 0)
+    assert result.metrics["counters"]["moved"] == 3
+    assert organizer.budget is not None and organizer.budget.ops.taken == 5
+    assert os.path.exists(os.path.join(target, "Documents", "c (1).txt"))
+
+
+def test_run_many_reports_failures_and_continues(tmp_path):
+    first = make_batch(tmp_path, "one", ["a.jpg"])
+    second = make_batch(tmp_path, "two", ["b.txt"])
+    organizer = Organizer(OrganizerConfig({"jpg": "Images", "txt": "Documents"}))
+
+    results = organizer.run_many([first, str(tmp_path / "missing"), second])
+
+    assert [(r.ok, r.files) for r in results] == [(True, 1), (False, 0), (True, 1)]
+    assert "does not exist" in results[1].error
+    assert os.path.exists(os.path.join(second, "Documents", "b.txt"))
+
+
+def test_embedding_has_no_side_effects(tmp_path):
+    target = make_batch(tmp_path, "in", ["a.jpg"])
+    code = ("import logging, sys; from organizer import Organizer, OrganizerConfig; "
+            f"r = Organizer(OrganizerConfig({{'jpg': 'Images'}})).run({target!r}); "
+            "assert r.moved == 1; assert not logging.getLogger().handlers; "
+            "assert 'click' not in sys.modules; print('ok')")
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(__file__))))
+
+    assert result.stdout.strip() == "ok", result.stderr
+    assert result.stderr == ""
+    assert not os.path.exists(tmp_path / "logs")
+
+
+def test_missing_config_leaves_root_logging_alone(tmp_path):
+    code = ("import logging; from organizer import OrganizerConfig; "
+            "before = list(logging.getLogger().handlers); "
+            f"OrganizerConfig.from_file({str(tmp_path / 'missing.yaml')!r}); "
+            "assert logging.getLogger().handlers == before; print('ok')")
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(__file__)),
+                                     FILE_ORGANIZER_CACHE_DIR=""))
+
+    assert result.stdout.strip() == "ok", result.stderr
@@ -0,0 +1,61 @@
+"""
+Smoke tests for the benchmark tree generator and harness in benchmarks/.
+"""
+
+import os
+
+from benchmarks.harness import compare, run_benchmarks
+from benchmarks.startup_bench import PROJECT_ROOT, run_startup
+from benchmarks.treegen import TreeSpec, generate_tree
+
+GROUPS = {"Images": ["jpg", "png"], "Documents": ["pdf", "txt"], "Videos": ["mp4"]}
+
+
+def test_generate_tree_is_deterministic_and_realistic(tmp_path):
+    spec = TreeSpec(files=300, depth=2, fanout=3, collision_rate=0.1, seed=7)
+    first = generate_tree(str(tmp_path / "a"), GROUPS, spec)
+    second = generate_tree(str(tmp_path / "b"), GROUPS, spec)
+
+    assert first["files"] == second["files"] > 250
+    assert first["directories"] == 1 + 3 + 9
+    assert first["collisions"] > 0
+    names = [n for _, _, files in os.walk(tmp_path / "a") for n in files]
+    assert any(n.endswith(".jpg") or n.endswith(".png") for n in names)
+    assert os.path.isdir(tmp_path / "a" / "Images") or os.path.isdir(tmp_path / "a" / "Documents")
+
+
+def test_run_benchmarks_reports_json_metrics(tmp_path):
+    spec = TreeSpec(files=200, depth=1, fanout=2)
+    report = run_benchmarks(str(tmp_path), spec, ["organize-recursive"], GROUPS)
+    (result,) = report["results"]
+    assert result["mode"] == "organize-recursive"
+    assert result["files"] > 0
+    assert result["syscalls_per_file"] > 0
+    assert result["peak_rss_kb"] > 0
+    assert compare(report, report) == {"organize-recursive": 1.0}
+
+
+def test_every_feature_has_a_mode(tmp_path):
+    spec = TreeSpec(files=200, depth=1, fanout=2)
+    modes = ["index-rerun", "dedupe", "budget-1000", "fd-relative", "view-resync"]
+    report = run_benchmarks(str(tmp_path), spec, modes, GROUPS)
+    results = {result["mode"]: result for result in report["results"]}
+    assert results["index-rerun"]["files"] == 0
+    assert results["dedupe"]["files"] == results["fd-relative"]["files"] > 0
+    assert results["view-resync"]["files"] > 0
+    assert results["fd-relative"]["syscalls"] > 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_stats_modes_report_against_find(tmp_path):
+    spec = TreeSpec(files=200, depth=1, fanout=2)
+    report = run_benchmarks(str(tmp_path), spec, ["stats", "stats-cached", "find"], GROUPS)
+    files = {result["mode"]: result["files"] for result in report["results"]}
+    assert files["stats"] == files["stats-cached"] == files["find"] > 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_startup_benchmark_reports_cold_and_warm_cache():
+    report = run_startup(1, str(PROJECT_ROOT / "config.yaml"))
+    assert set(report) == {"cold_cache", "warm_cache", "cold_cache_in_process", "warm_cache_in_process"}
+    assert report["warm_cache"]["median_ms"] > report["warm_cache_in_process"]["median_ms"] > 0
@@ -0,0 +1,124 @@
+"""
+Tests for the name-collision strategies in organizer/collisions.py.
+"""
+
+import os
+import re
+
+import pytest
+
+import organizer.collisions as collisions_module
+from main import organize_directory
+from organizer.collisions import CollisionResolver, split_name
+from organizer.journal import undo_run
+from organizer.plan import REPLACE, build_plan
+from organizer.scanner import scan_files
+from organizer.shard import ShardLayout
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+def write(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def tree_of(*dirs):
+    return [(str(d), scan_files(d)) for d in dirs]
+
+
+def test_split_name():
+    assert split_name("a.tar.gz") == ("a.tar", ".gz")
+    assert split_name(".bashrc") == (".bashrc", "")
+    assert split_name("README") == ("README", "")
+
+
+def test_suffix_counter_is_resolved_in_memory(tmp_path, monkeypatch):
+    """Counters continue past names already on disk and in the plan, without stats."""
+    for name in ("a.txt", "a (1).txt", "a (3).txt"):
+        write(tmp_path / "Documents" / name, "old")
+    for i in range(4):
+        write(tmp_path / f"in{i}" / "a.txt", str(i))
+    monkeypatch.setattr(os.path, "exists", lambda p: pytest.fail(f"probed {p}"))
+    monkeypatch.setattr(os, "lstat", lambda p: pytest.fail(f"stat {p}"))
+
+    plan = build_plan(tree_of(*(tmp_path / f"in{i}" for i in range(4))), lambda e: "Documents",
+                      str(tmp_path), collisions=CollisionResolver("suffix"))
+
+    assert sorted(item.dest_name for item in plan) == ["a (2).txt", "a (4).txt", "a (5).txt", "a (6).txt"]
+    assert plan.skips == 0
+
+
+def test_strategies_end_to_end(tmp_path):
+    write(tmp_path / "Documents" / "old.txt", "existing", mtime=1_000_000)
+    write(tmp_path / "Documents" / "new.txt", "existing", mtime=1_000_000)
+    write(tmp_path / "old.txt", "incoming", mtime=500_000)
+    write(tmp_path / "new.txt", "incoming", mtime=2_000_000)
+
+    organize_directory(tmp_path, MAPPING, collisions="overwrite-newer")
+
+    assert (tmp_path / "Documents" / "new.txt").read_text() == "incoming"
+    assert (tmp_path / "Documents" / "old.txt").read_text() == "existing"
+    assert (tmp_path / "old.txt").exists()
+
+    organize_directory(tmp_path, MAPPING, collisions="timestamp")
+    stamped = [n for n in os.listdir(tmp_path / "Documents") if n.startswith("old-")]
+    assert len(stamped) == 1 and re.fullmatch(r"old-\d{8}-\d{6}\.txt", stamped[0])
+
+
+def test_hash_strategy_skips_identical_content(tmp_path):
+    write(tmp_path / "Images" / "p.jpg", "existing")
+    write(tmp_path / "a" / "p.jpg", "same")
+    write(tmp_path / "b" / "p.jpg", "same")
+    write(tmp_path / "c" / "p.jpg", "different")
+
+    plan = build_plan(tree_of(tmp_path / "a", tmp_path / "b", tmp_path / "c"), lambda e: "Images",
+                      str(tmp_path), collisions=CollisionResolver("hash"))
+
+    names = [(os.path.basename(item.src_dir), item.dest_name) for item in plan]
+    tag = collisions_module.content_tag(str(tmp_path / "a" / "p.jpg"))
+    assert (("a", f"p-{tag}.jpg") in names) and ("b", "") in names
+    assert plan.skips == 1
+
+
+def test_overwrite_replaces_each_existing_file_once(tmp_path):
+    write(tmp_path / "Images" / "p.jpg", "existing", mtime=1_000_000)
+    write(tmp_path / "a" / "p.jpg", "newer", mtime=2_000_000)
+    write(tmp_path / "b" / "p.jpg", "newest", mtime=3_000_000)
+
+    plan = build_plan(tree_of(tmp_path / "a", tmp_path / "b"), lambda e: "Images", str(tmp_path),
+                      collisions=CollisionResolver("overwrite-newer"))
+
+    assert [item.action for item in plan].count(REPLACE) == 1
+    assert plan.skips == 1
+
+    plan = build_plan(tree_of(tmp_path / "a", tmp_path / "b"), lambda e: "Images", str(tmp_path),
+                      collisions=CollisionResolver("overwrite"))
+    assert [item.action for item in plan].count(REPLACE) == 1
+
+    organize_directory(tmp_path / "a", {"jpg": "Images"}, collisions="overwrite")
+    assert (tmp_path / "a" / "Images" / "p.jpg").exists()
+    write(tmp_path / "a" / "p.jpg", "older", mtime=500_000)
+    organize_directory(tmp_path / "a", {"jpg": "Images"}, collisions="overwrite")
+    assert (tmp_path / "a" / "Images" / "p.jpg").read_text() == "older"
+
+
+def test_suffix_with_sharding_and_journal(tmp_path):
+    layout = ShardLayout({"Images": 0}, "{name:0:1}")
+    write(tmp_path / "x.jpg", "first")
+    organize_directory(tmp_path, MAPPING, sharding=layout)
+    write(tmp_path / "x.jpg", "second")
+
+    journal = str(tmp_path.parent / "journal.jsonl")
+    organize_directory(tmp_path, MAPPING, sharding=layout, collisions="suffix", journal_path=journal)
+
+    assert (tmp_path / "Images" / "x" / "x (1).jpg").read_text() == "second"
+    assert undo_run(journal) == 1
+    assert (tmp_path / "x.jpg").read_text() == "second"
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        CollisionResolver("rename")
@@ -0,0 +1,79 @@
+"""
+Tests for the compiled-config cache in organizer/configcache.py and the
+lazy start-up path of main.py.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+import organizer.configcache as configcache
+from main import cli
+from organizer.configcache import CACHE_DIR_ENV, load_compiled
+
+CONFIG = {"extension_groups": {"Images": ["jpg"], "Documents": ["txt"]}}
+
+
+def write_config(path, data):
+    path.write_text(yaml.safe_dump(data))
+    return str(path)
+
+
+def test_unchanged_config_is_served_from_cache(tmp_path, monkeypatch, config_cache_dir):
+    config = write_config(tmp_path / "config.yaml", CONFIG)
+    first = load_compiled(config)
+    assert os.listdir(config_cache_dir)
+
+    monkeypatch.setattr(configcache, "parse_config", lambda path: pytest.fail("config re-parsed"))
+    cached = load_compiled(config)
+
+    assert cached.config == first.config == CONFIG
+    assert cached.rules.classify_name("a.JPG") == "Images"
+
+
+def test_edited_config_is_reparsed(tmp_path):
+    config = write_config(tmp_path / "config.yaml", CONFIG)
+    load_compiled(config)
+    write_config(tmp_path / "config.yaml", {"extension_groups": {"Pictures": ["jpg"]}})
+
+    assert load_compiled(config).rules.classify_name("a.jpg") == "Pictures"
+
+
+def test_corrupt_or_disabled_cache_falls_back(tmp_path, monkeypatch, config_cache_dir):
+    config = write_config(tmp_path / "config.yaml", CONFIG)
+    load_compiled(config)
+    for name in os.listdir(config_cache_dir):
+        (config_cache_dir / name).write_bytes(b"not a pickle")
+    assert load_compiled(config).config == CONFIG
+
+    monkeypatch.setenv(CACHE_DIR_ENV, "")
+    assert load_compiled(config).config == CONFIG
+    assert load_compiled(str(tmp_path / "missing.yaml")).config == {}
+
+
+def test_default_command_runs_without_verbose(tmp_path, monkeypatch):
+    """LOG_LEVEL comes from the environment or .env without -v (used to crash)."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("LOG_LEVEL", raising=False)
+    config = write_config(tmp_path / "config.yaml", CONFIG)
+    (tmp_path / "t").mkdir()
+    (tmp_path / "t" / "a.jpg").write_text("x")
+
+    result = CliRunner().invoke(cli, ["-d", "t", "-c", config])
+
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "t" / "Images" / "a.jpg").exists()
+
+
+def test_startup_does_not_import_unused_modules():
+    project = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import sys; sys.argv = ['main.py', '--help']; import main; "
+            "print(sorted(m for m in ('yaml', 'dotenv', 'sqlite3', 'hashlib', 'pathlib', "
+            "'multiprocessing', 'organizer.plan') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=project, capture_output=True,
+                         text=True, check=True).stdout
+    assert out.strip() == "[]"
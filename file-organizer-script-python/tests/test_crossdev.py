@@ -0,0 +1,126 @@
+"""
+Tests for the cross-device move engine in organizer/crossdev.py.
+"""
+
+import errno
+import os
+
+import pytest
+
+import organizer.crossdev as crossdev
+from organizer.crossdev import CopyPool, move_across_devices
+from organizer.scanner import move_file
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 17)
+
+
+@pytest.fixture
+def source(tmp_path):
+    src = tmp_path / "clip.mp4"
+    src.write_bytes(PAYLOAD)
+    os.utime(src, (1_600_000_000, 1_600_000_000))
+    (tmp_path / "Videos").mkdir()
+    return src
+
+
+def unsupported(*args, **kwargs):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+def test_move_across_devices_copies_and_removes_source(source):
+    dst = source.parent / "Videos" / source.name
+    assert move_across_devices(str(source), str(dst)) == len(PAYLOAD)
+    assert dst.read_bytes() == PAYLOAD
+    assert dst.stat().st_mtime == 1_600_000_000
+    assert not source.exists()
+    assert os.listdir(dst.parent) == ["clip.mp4"]  # no temp file left behind
+
+
+@pytest.mark.parametrize("disabled", [("copy_file_range",), ("copy_file_range", "sendfile")])
+def test_move_across_devices_falls_back(source, monkeypatch, disabled):
+    """Unsupported zero-copy primitives fall through to the next strategy."""
+    for name in disabled:
+        monkeypatch.setattr(os, name, unsupported, raising=False)
+    dst = source.parent / "Videos" / source.name
+    move_across_devices(str(source), str(dst))
+    assert dst.read_bytes() == PAYLOAD
+
+
+def test_failed_copy_keeps_source_and_leaves_no_partial_file(source):
+    dst = source.parent / "Videos" / source.name
+
+    def interrupt(copied):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    with pytest.raises(OSError):
+        move_across_devices(str(source), str(dst), progress=interrupt)
+    assert source.read_bytes() == PAYLOAD
+    assert os.listdir(dst.parent) == []
+
+
+def test_move_file_uses_copy_pool_on_exdev(source, monkeypatch):
+    """An EXDEV rename is handed to the CopyPool and completes on join()."""
+    real_rename = os.rename
+
+    def rename(src, dst):
+        if not os.path.basename(src).endswith(".part"):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        real_rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", rename)
+    dst = source.parent / "Videos" / source.name
+    with CopyPool(workers=2) as pool:
+        assert move_file(str(source), str(dst), pool) is False
+    assert pool.bytes_copied == len(PAYLOAD)
+    assert dst.read_bytes() == PAYLOAD
+    assert not source.exists()
+
+
+def test_copy_pool_reraises_first_failure(tmp_path):
+    pool = CopyPool(workers=2)
+    pool.submit(str(tmp_path / "missing"), str(tmp_path / "dest"))
+    with pytest.raises(FileNotFoundError):
+        pool.join()
+
+
+def test_copy_chunking_reports_progress(source, monkeypatch):
+    monkeypatch.setattr(crossdev, "COPY_CHUNK", 1024 * 1024)
+    seen = []
+    move_across_devices(str(source), str(source.parent / "Videos" / source.name), seen.append)
+    assert seen[-1] == len(PAYLOAD)
+    assert len(seen) == 4
+
+
+def test_move_across_devices_never_replaces_unless_asked(source, monkeypatch):
+    dst = source.parent / "Videos" / source.name
+    dst.write_text("appeared meanwhile")
+
+    with pytest.raises(FileExistsError):
+        move_across_devices(str(source), str(dst), replace=False)
+    assert dst.read_text() == "appeared meanwhile"
+    assert source.read_bytes() == PAYLOAD
+    assert os.listdir(dst.parent) == ["clip.mp4"]
+
+    dst.unlink()
+    def no_links(*args, **kwargs):
+        raise OSError(errno.EPERM, "Operation not permitted")
+
+    monkeypatch.setattr(os, "link", no_links)
+    move_across_devices(str(source), str(dst), replace=False)  # no hardlinks: checked rename
+    assert dst.read_bytes() == PAYLOAD
+
+
+def test_fd_relative_fallback_skips_a_destination_that_appeared(source, monkeypatch):
+    from organizer import fdops
+    from organizer.engine import organize_target
+
+    def rename_at(src_fd, name, dst_fd, new_name, replace=False):
+        (source.parent / "Videos" / new_name).write_text("appeared meanwhile")
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(fdops, "rename_at", rename_at)
+    result = organize_target(source.parent, {"mp4": "Videos"}, fd_relative=True)
+
+    assert result.moved == 0
+    assert (source.parent / "Videos" / source.name).read_text() == "appeared meanwhile"
+    assert source.read_bytes() == PAYLOAD
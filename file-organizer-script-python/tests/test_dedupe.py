@@ -0,0 +1,70 @@
+"""
+Tests for staged duplicate detection in organizer/dedupe.py.
+"""
+
+import os
+
+import pytest
+
+from main import organize_directory
+from organizer.dedupe import PARTIAL_BLOCK, DuplicateFinder, HashCache
+
+MAPPING = {"bin": "Data", "txt": "Documents"}
+BIG = os.urandom(PARTIAL_BLOCK * 8)
+
+
+def write_pair(root, name, src_data, dst_data):
+    (root / "Data").mkdir(exist_ok=True)
+    (root / name).write_bytes(src_data)
+    (root / "Data" / name).write_bytes(dst_data)
+    return str(root / name), str(root / "Data" / name)
+
+
+def test_stages_only_fully_read_surviving_candidates(tmp_path):
+    identical = write_pair(tmp_path, "same.bin", BIG, BIG)
+    other_size = write_pair(tmp_path, "size.bin", BIG, BIG[:-1])
+    middle = bytearray(BIG)
+    middle[len(BIG) // 2] ^= 0xFF
+    same_ends = write_pair(tmp_path, "middle.bin", BIG, bytes(middle))
+
+    finder = DuplicateFinder()
+    assert finder.find([identical, other_size, same_ends]) == [identical]
+    # Partial hashes for 4 files, full hashes for the 4 that survived – never the size mismatch.
+    assert finder.bytes_read == 4 * 2 * PARTIAL_BLOCK + 4 * len(BIG)
+
+
+def test_hashes_are_cached_by_inode_and_mtime(tmp_path):
+    pair = write_pair(tmp_path, "same.bin", BIG, BIG)
+    cache_path = str(tmp_path.parent / "hashes.sqlite3")
+
+    cache = HashCache(cache_path)
+    assert DuplicateFinder(cache).find([pair]) == [pair]
+    cache.close()
+
+    again = DuplicateFinder(HashCache(cache_path))
+    assert again.find([pair]) == [pair]
+    assert again.bytes_read == 0
+
+
+@pytest.mark.parametrize("action", ["report", "delete", "hardlink", "move"])
+def test_duplicate_actions(tmp_path, action):
+    write_pair(tmp_path, "dup.bin", BIG, BIG)
+    write_pair(tmp_path, "diff.bin", b"a" * 10, b"b" * 10)
+
+    assert organize_directory(tmp_path, MAPPING, duplicates=action) == 2
+    assert (tmp_path / "diff.bin").exists()  # not a duplicate: left in place
+    if action == "report":
+        assert (tmp_path / "dup.bin").exists()
+    elif action == "delete":
+        assert not (tmp_path / "dup.bin").exists()
+    elif action == "hardlink":
+        assert os.path.samefile(tmp_path / "dup.bin", tmp_path / "Data" / "dup.bin")
+    else:
+        assert (tmp_path / "Duplicates" / "dup.bin").read_bytes() == BIG
+        assert not (tmp_path / "dup.bin").exists()
+
+
+def test_dry_run_only_reports_duplicates(tmp_path):
+    write_pair(tmp_path, "dup.bin", BIG, BIG)
+    organize_directory(tmp_path, MAPPING, dry_run=True, duplicates="delete")
+    assert (tmp_path / "dup.bin").exists()
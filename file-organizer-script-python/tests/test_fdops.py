@@ -0,0 +1,91 @@
+"""
+Tests for directory-fd-relative moves in organizer/fdops.py.
+"""
+
+import os
+
+import pytest
+
+from main import organize_directory
+from organizer import fdops
+from organizer.fdops import DirFds, rename_at, supported
+from organizer.plan import MovePlan, build_plan, execute_plan
+from organizer.walker import walk_tree
+
+pytestmark = pytest.mark.skipif(not supported(), reason="no dir_fd support")
+
+MAPPING = {"jpg": "Images", "txt": "Documents"}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_fd_mode_organizes_like_path_mode(tmp_path, workers):
+    for i in range(20):
+        (tmp_path / f"f{i}.{('jpg', 'txt')[i % 2]}").write_text(str(i))
+    (tmp_path / "Images").mkdir()
+    (tmp_path / "Images" / "f0.jpg").write_text("old")
+
+    assert organize_directory(tmp_path, MAPPING, workers=workers, fd_relative=True) == 20
+
+    assert len(os.listdir(tmp_path / "Images")) == 10
+    assert len(os.listdir(tmp_path / "Documents")) == 10
+    assert (tmp_path / "Images" / "f0.jpg").read_text() == "old"
+    assert (tmp_path / "f0.jpg").exists()
+
+
+def test_nested_layout_creates_folders_relative_to_root(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "x.txt").write_text("x")
+
+    organize_directory(tmp_path, MAPPING, recursive=True, flatten=False, fd_relative=True)
+
+    assert (tmp_path / "a" / "b" / "Documents" / "x.txt").exists()
+
+
+def test_file_created_after_planning_is_not_overwritten(tmp_path):
+    (tmp_path / "a.txt").write_text("incoming")
+    (tmp_path / "b.txt").write_text("b")
+    plan = build_plan(walk_tree(str(tmp_path), {"Documents", "Others"}),
+                      lambda entry: "Documents", str(tmp_path))
+    (tmp_path / "Documents").mkdir()
+    (tmp_path / "Documents" / "a.txt").write_text("racer")
+    reported = []
+
+    moved = execute_plan(plan, fd_root=str(tmp_path), report=lambda item, error=None: reported.append(item))
+
+    if fdops._load_renameat2() is not None:
+        assert moved == 1
+        assert (tmp_path / "Documents" / "a.txt").read_text() == "racer"
+        assert (tmp_path / "a.txt").read_text() == "incoming"
+        assert sorted(item.name for item in reported) == ["a.txt", "b.txt"]
+    assert (tmp_path / "Documents" / "b.txt").exists()
+
+
+def test_moves_survive_a_rename_above_the_root(tmp_path):
+    root = tmp_path / "share" / "inbox"
+    root.mkdir(parents=True)
+    (root / "x.jpg").write_text("x")
+
+    with DirFds(str(root)) as fds:
+        src_fd = fds.acquire(str(root))
+        dst_fd = fds.acquire(str(root / "Images"), create=True)
+        os.rename(tmp_path / "share", tmp_path / "moved")
+        rename_at(src_fd, "x.jpg", dst_fd, "x.jpg")
+
+    assert (tmp_path / "moved" / "inbox" / "Images" / "x.jpg").exists()
+
+
+def test_idle_fds_are_evicted_past_the_limit(tmp_path):
+    with DirFds(str(tmp_path), limit=2) as fds:
+        held = fds.acquire(str(tmp_path / "held"), create=True)
+        for i in range(5):
+            path = str(tmp_path / f"d{i}")
+            fds.acquire(path, create=True)
+            fds.release(path)
+            assert len(fds._fds) <= 2
+        os.fstat(held)
+        assert fds.opened == 6
+    assert sorted(os.listdir(tmp_path)) == ["d0", "d1", "d2", "d3", "d4", "held"]
+
+
+def test_empty_plan_needs_no_directories(tmp_path):
+    assert execute_plan(MovePlan(), fd_root=str(tmp_path)) == 0
@@ -0,0 +1,126 @@
+"""
+Tests for the persistent incremental index in organizer/index.py.
+"""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from main import organize_directory
+from organizer.index import ScanIndex
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+def age(root, stamp):
+    """Set every directory mtime below ``root`` to ``stamp`` (outside the racy window)."""
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (stamp, stamp))
+
+
+def run(root, index_path, **kwargs):
+    return organize_directory(root, MAPPING, recursive=True, flatten=False,
+                              index_path=str(index_path), **kwargs)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    for sub in ("a", "a/b", "c"):
+        (root / sub).mkdir(parents=True)
+        (root / sub / "photo.jpg").write_text("x")
+        (root / sub / "notes.txt").write_text("x")
+    age(root, 1_600_000_000)
+    return root
+
+
+def count_scandirs(monkeypatch):
+    calls = []
+    real = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: calls.append(path) or real(path))
+    return calls
+
+
+def test_unchanged_tree_is_not_relisted(tree, tmp_path, monkeypatch):
+    index_path = tmp_path / "index.sqlite3"
+    assert run(tree, index_path) == 6
+    age(tree, 1_600_000_100)
+    assert run(tree, index_path) == 0  # every directory changed once, nothing new
+
+    scandirs = count_scandirs(monkeypatch)
+    assert run(tree, index_path) == 0
+    assert scandirs == []
+
+
+def test_new_file_in_changed_directory_is_picked_up(tree, tmp_path):
+    index_path = tmp_path / "index.sqlite3"
+    run(tree, index_path)
+    age(tree, 1_600_000_100)
+    run(tree, index_path)
+
+    (tree / "a" / "b" / "new.txt").write_text("x")
+    age(tree / "a" / "b", 1_600_000_200)
+    assert run(tree, index_path) == 1
+    assert (tree / "a" / "b" / "Documents" / "new.txt").exists()
+
+
+def test_skipped_files_are_remembered(tree, tmp_path):
+    """A file left in place because its name is taken is not planned again."""
+    index_path = tmp_path / "index.sqlite3"
+    (tree / "c" / "Images").mkdir()
+    (tree / "c" / "Images" / "photo.jpg").write_text("old")
+    age(tree, 1_600_000_000)
+    assert run(tree, index_path) == 6
+
+    age(tree, 1_600_000_100)
+    assert run(tree, index_path) == 0
+    assert (tree / "c" / "photo.jpg").exists()
+
+
+def test_rows_of_deleted_directories_are_dropped(tree, tmp_path):
+    index_path = tmp_path / "index.sqlite3"
+    (tree / "a" / "b" / "Images").mkdir()
+    (tree / "a" / "b" / "Images" / "photo.jpg").write_text("old")  # leaves a kept entry
+    (tree / "ab").mkdir()
+    age(tree, 1_600_000_000)
+    run(tree, index_path)
+    age(tree, 1_600_000_100)
+    run(tree, index_path)
+
+    shutil.rmtree(tree / "a")
+    age(tree, 1_600_000_200)
+    run(tree, index_path)
+
+    with sqlite3.connect(index_path) as conn:
+        dirs = {os.path.relpath(path, tree) for (path,) in conn.execute("SELECT path FROM dirs")}
+        entries = {os.path.relpath(d, tree) for (d,) in conn.execute("SELECT dir FROM entries")}
+    assert not any(path == "a" or path.startswith("a" + os.sep) for path in dirs | entries)
+    assert {".", "ab", "c"} <= dirs
+
+
+def test_full_and_settings_change_force_rescan(tree, tmp_path, monkeypatch):
+    index_path = tmp_path / "index.sqlite3"
+    run(tree, index_path)
+    age(tree, 1_600_000_100)
+    run(tree, index_path)
+
+    scandirs = count_scandirs(monkeypatch)
+    run(tree, index_path, full=True)
+    assert len(scandirs) >= 3
+
+    scandirs.clear()
+    organize_directory(tree, {"jpg": "Pictures"}, recursive=True, flatten=False,
+                       index_path=str(index_path), dry_run=True)
+    assert len(scandirs) >= 3
+
+
+def test_corrupt_index_is_rebuilt(tree, tmp_path):
+    index_path = tmp_path / "index.sqlite3"
+    index_path.write_bytes(b"this is not a database" * 100)
+    index = ScanIndex(str(index_path), str(tree))
+    assert index.unchanged_subdirs(str(tree), 1_600_000_000) is None
+    index.commit()
+    index.close()
+    assert run(tree, index_path) == 6
@@ -0,0 +1,131 @@
+"""
+Tests for the multi-target job runner in organizer/jobs.py.
+"""
+
+import json
+import os
+import time
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from main import cli, run_job
+from organizer.jobs import Job, failed_result, load_jobs, run_jobs, summarize
+
+CONFIG = {"extension_groups": {"Images": ["jpg"], "Documents": ["txt"], "Others": []}}
+
+
+def write_yaml(path, data):
+    path.write_text(yaml.safe_dump(data))
+    return str(path)
+
+
+def make_target(root, names):
+    root.mkdir(parents=True)
+    for name in names:
+        (root / name).write_text(name)
+
+
+def sleepy_job(job):
+    """Records its start/end so tests can check concurrency."""
+    start = time.time()
+    time.sleep(0.2)
+    return {"name": job.name, "directory": job.directory, "ok": True, "count": 1, "error": None,
+            "duration_s": 0.2, "metrics": {"counters": {"moved": 1}}, "span": (start, time.time())}
+
+
+def test_load_jobs_resolves_paths_and_state_files(tmp_path):
+    jobs_file = write_yaml(tmp_path / "jobs.yaml", {
+        "defaults": {"recursive": True, "index": True, "config": "base.yaml"},
+        "jobs": [{"directory": "drops/acme"},
+                 {"name": "g", "directory": "/srv/globex", "journal": "g.jsonl", "index": False}],
+        "device_limits": {"drops": 2},
+    })
+
+    jobs, limits = load_jobs(jobs_file)
+
+    assert [(j.name, j.directory, j.config) for j in jobs] == [
+        ("acme", str(tmp_path / "drops/acme"), str(tmp_path / "base.yaml")),
+        ("g", "/srv/globex", str(tmp_path / "base.yaml")),
+    ]
+    assert jobs[0].options == {"recursive": True,
+                               "index": str(tmp_path / "file_organizer_state/acme/index.sqlite3")}
+    assert jobs[1].options["journal"] == str(tmp_path / "g.jsonl")
+    assert limits == {str(tmp_path / "drops"): 2}
+
+    for bad in ({"jobs": [{"name": "x"}]},
+                {"jobs": [{"directory": "a"}, {"directory": "b/a"}]},
+                {"jobs": [{"directory": "a", "colour": "red"}]}):
+        with pytest.raises(ValueError):
+            load_jobs(write_yaml(tmp_path / "bad.yaml", bad))
+
+
+def test_failing_targets_do_not_stop_the_others(tmp_path):
+    config = write_yaml(tmp_path / "config.yaml", CONFIG)
+    make_target(tmp_path / "a", ["x.jpg", "y.txt"])
+    make_target(tmp_path / "b", ["z.txt"])
+    make_target(tmp_path / "c", ["w.jpg"])
+    (tmp_path / "bad.yaml").write_text("rules: [{folder: X, regex: '('}]")
+    jobs = [Job("a", str(tmp_path / "a"), config),
+            Job("missing", str(tmp_path / "missing"), config),
+            Job("bad-config", str(tmp_path / "c"), str(tmp_path / "bad.yaml")),
+            Job("b", str(tmp_path / "b"), config, {"index": str(tmp_path / "b.sqlite3")})]
+
+    results = run_jobs(jobs, run_job, processes=2)
+
+    assert [(r["name"], r["ok"], r["count"]) for r in results] == [
+        ("a", True, 2), ("missing", False, 0), ("bad-config", False, 0), ("b", True, 1)]
+    assert (tmp_path / "a" / "Images" / "x.jpg").exists()
+    assert (tmp_path / "b" / "Documents" / "z.txt").exists()
+    assert (tmp_path / "c" / "w.jpg").exists()
+    summary = summarize(results, 1.0)
+    assert (summary["succeeded"], summary["failed"], summary["files"]) == (2, 2, 3)
+    assert summary["counters"]["moved"] == 3
+    assert [f["name"] for f in summary["failures"]] == ["missing", "bad-config"]
+
+
+def test_per_device_limit_serializes_jobs_on_one_device(tmp_path):
+    jobs = []
+    for name in "abc":
+        (tmp_path / name).mkdir()
+        jobs.append(Job(name, str(tmp_path / name)))
+
+    results = run_jobs(jobs, sleepy_job, processes=3, per_device=1)
+
+    spans = sorted(r["span"] for r in results)
+    assert all(prev[1] <= nxt[0] for prev, nxt in zip(spans, spans[1:]))
+
+    overlapping = run_jobs(jobs, sleepy_job, processes=3,
+                           device_limits={str(tmp_path): 3})
+    spans = sorted(r["span"] for r in overlapping)
+    assert any(prev[1] > nxt[0] for prev, nxt in zip(spans, spans[1:]))
+
+
+def test_summarize_sums_metrics():
+    job = Job("x", "/x")
+    ok = {"name": "ok", "directory": "/ok", "ok": True, "count": 4, "error": None, "duration_s": 1.5,
+          "metrics": {"counters": {"moved": 4}, "phases_s": {"scan": 0.5}, "errors": {"move": 1}}}
+    summary = summarize([ok, dict(ok, name="ok2"), failed_result(job, "boom")], 2.0)
+    assert summary["counters"] == {"moved": 8}
+    assert summary["phases_s"] == {"scan": 1.0}
+    assert summary["errors"] == {"move": 2}
+    assert summary["job_seconds"] == 3.0
+    assert summary["failures"] == [{"name": "x", "error": "boom"}]
+
+
+def test_jobs_command_exits_nonzero_after_running_all(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_yaml(tmp_path / "config.yaml", CONFIG)
+    make_target(tmp_path / "a", ["x.jpg"])
+    jobs_file = write_yaml(tmp_path / "jobs.yaml",
+                           {"jobs": [{"directory": "missing"}, {"directory": "a", "index": True}]})
+
+    result = CliRunner().invoke(cli, ["jobs", jobs_file, "-p", "1", "--summary-json", "s.json"])
+
+    assert result.exit_code == 1, result.output
+    assert (tmp_path / "a" / "Images" / "x.jpg").exists()
+    assert os.path.exists(tmp_path / "file_organizer_state" / "a" / "index.sqlite3")
+    with open(tmp_path / "s.json") as f:
+        summary = json.load(f)
+    assert (summary["succeeded"], summary["failed"]) == (1, 1)
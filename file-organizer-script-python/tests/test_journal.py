@@ -0,0 +1,162 @@
+"""
+Tests for the write-ahead move journal in organizer/journal.py.
+"""
+
+import os
+import shutil
+
+import pytest
+
+from main import organize_directory
+from organizer.collisions import CollisionResolver
+from organizer.journal import JournalError, MoveJournal, resume_run, undo_run
+from organizer.plan import build_plan, execute_plan
+from organizer.scanner import scan_files
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+def make_files(root, names):
+    for name in names:
+        (root / name).write_text(name)
+
+
+def plan_for(root):
+    return build_plan([(str(root), scan_files(str(root)))],
+                      lambda e: "Images" if e.name.endswith(".jpg") else "Documents")
+
+
+def test_run_is_journaled_and_finished(tmp_path):
+    target = tmp_path / "t"
+    target.mkdir()
+    make_files(target, ["a.txt", "b.jpg"])
+    path = str(tmp_path / "j.jsonl")
+
+    organize_directory(target, MAPPING, journal_path=path)
+
+    journal = MoveJournal.load(path)
+    journal.close()
+    assert journal.finished
+    assert journal.root == str(target)
+    assert sorted(entry[1] for entry in journal.entries.values()) == ["a.txt", "b.jpg"]
+    assert not list(journal.pending())
+
+
+def test_done_records_are_group_committed(tmp_path, monkeypatch):
+    """Marking moves done costs one fsync per group, not one per file."""
+    make_files(tmp_path, [f"f{i}.txt" for i in range(50)])
+    plan = plan_for(tmp_path)
+    journal = MoveJournal.create(str(tmp_path / "j.jsonl"), str(tmp_path),
+                                 group_size=20, group_interval=3600)
+    journal.record_plan(plan)
+
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    execute_plan(plan, journal=journal)
+
+    assert len(fsyncs) == 2
+    assert journal.finish()
+    journal.close()
+
+
+def test_resume_reconciles_interrupted_run(tmp_path):
+    """A killed run is finished from the journal without rescanning."""
+    make_files(tmp_path, ["moved.txt", "lost_record.txt", "copied.txt", "todo.jpg"])
+    plan = plan_for(tmp_path)
+    path = str(tmp_path / "j.jsonl")
+    journal = MoveJournal.create(path, str(tmp_path))
+    journal.record_plan(plan)
+    docs = tmp_path / "Documents"
+    docs.mkdir()
+    ids = {item.name: item.index for item in plan}
+    # Committed and recorded.
+    os.rename(tmp_path / "moved.txt", docs / "moved.txt")
+    journal.done(ids["moved.txt"])
+    # Committed, but the done record never reached the journal.
+    os.rename(tmp_path / "lost_record.txt", docs / "lost_record.txt")
+    # Cross-device copy renamed into place, source not yet unlinked.
+    shutil.copy2(tmp_path / "copied.txt", docs / "copied.txt")
+    # Cross-device copy that died mid-way.
+    (tmp_path / "Images").mkdir()
+    (tmp_path / "Images" / ".todo.jpg.999.part").write_text("half")
+    journal.close()
+    (tmp_path / "new.txt").write_text("not in the journal")
+
+    assert resume_run(path) == 1
+
+    assert sorted(os.listdir(docs)) == ["copied.txt", "lost_record.txt", "moved.txt"]
+    assert os.listdir(tmp_path / "Images") == ["todo.jpg"]
+    assert (tmp_path / "new.txt").exists()
+    assert not (tmp_path / "copied.txt").exists()
+    journal = MoveJournal.load(path)
+    journal.close()
+    assert journal.finished
+
+
+def test_resume_redoes_an_overwrite_of_a_lookalike_file(tmp_path):
+    """An overwrite's old destination with the source's size and mtime is not taken for its copy."""
+    (tmp_path / "Documents").mkdir()
+    (tmp_path / "a.txt").write_text("new")
+    (tmp_path / "Documents" / "a.txt").write_text("old")
+    for path in (tmp_path / "a.txt", tmp_path / "Documents" / "a.txt"):
+        os.utime(path, (1_600_000_000, 1_600_000_000))
+    plan = build_plan([(str(tmp_path), scan_files(str(tmp_path)))], lambda e: "Documents", str(tmp_path),
+                      collisions=CollisionResolver("overwrite"))
+    path = str(tmp_path / "j.jsonl")
+    journal = MoveJournal.create(path, str(tmp_path))
+    journal.record_plan(plan)
+    journal.close()
+
+    assert resume_run(path) == 1
+
+    assert (tmp_path / "Documents" / "a.txt").read_text() == "new"
+    assert not (tmp_path / "a.txt").exists()
+
+
+def test_undo_restores_files_and_removes_empty_folders(tmp_path):
+    target = tmp_path / "t"
+    target.mkdir()
+    make_files(target, ["a.txt", "b.jpg"])
+    (target / "Documents").mkdir()
+    (target / "Documents" / "old.txt").write_text("kept")
+    path = str(tmp_path / "j.jsonl")
+    organize_directory(target, MAPPING, journal_path=path)
+
+    assert undo_run(path) == 2
+
+    assert sorted(os.listdir(target)) == ["Documents", "a.txt", "b.jpg"]
+    assert os.listdir(target / "Documents") == ["old.txt"]
+    assert undo_run(path) == 0
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    """A record cut short by a crash is dropped and later appends stay readable."""
+    make_files(tmp_path, ["a.txt", "b.txt"])
+    plan = plan_for(tmp_path)
+    path = tmp_path / "j.jsonl"
+    journal = MoveJournal.create(str(path), str(tmp_path))
+    journal.record_plan(plan)
+    journal.close()
+    with open(path, "a") as f:
+        f.write('["+", ')
+
+    journal = MoveJournal.load(str(path))
+    assert list(journal.pending()) == [0, 1]
+    journal.done(1)
+    journal.close()
+    journal = MoveJournal.load(str(path))
+    journal.close()
+    assert list(journal.pending()) == [0]
+
+
+def test_unfinished_journal_is_not_overwritten(tmp_path):
+    make_files(tmp_path, ["a.txt"])
+    plan = plan_for(tmp_path)
+    path = str(tmp_path / "j.jsonl")
+    journal = MoveJournal.create(path, str(tmp_path))
+    journal.record_plan(plan)
+    journal.close()
+
+    with pytest.raises(JournalError):
+        MoveJournal.create(path, str(tmp_path))
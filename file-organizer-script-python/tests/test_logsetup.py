@@ -0,0 +1,74 @@
+"""
+Tests for the queued logging pipeline in organizer/logsetup.py and
+setup_logging() in main.py.
+"""
+
+import json
+import logging
+
+import pytest
+
+from main import setup_logging
+from organizer.logsetup import BatchRotatingFileHandler, JsonLinesFormatter, LogPipeline
+
+
+@pytest.fixture
+def file_logger(tmp_path):
+    """A private logger whose pipeline writes to a temporary file."""
+    def make(**kwargs):
+        handler = BatchRotatingFileHandler(tmp_path / "run.log")
+        handler.setFormatter(kwargs.pop("formatter", logging.Formatter("%(message)s")))
+        pipeline = LogPipeline([handler], **kwargs).start()
+        logger = logging.getLogger(f"test.logsetup.{id(pipeline)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(pipeline.handler)
+        return logger, pipeline, tmp_path / "run.log"
+    return make
+
+
+def test_pipeline_writes_all_records_on_stop(file_logger):
+    logger, pipeline, path = file_logger(batch_size=7)
+    for i in range(100):
+        logger.info("line %d", i)
+    pipeline.stop()
+    assert path.read_text().splitlines() == [f"line {i}" for i in range(100)]
+
+
+def test_json_lines_format_includes_extras(file_logger):
+    logger, pipeline, path = file_logger(formatter=JsonLinesFormatter())
+    logger.info("Moved: %s → %s/", "a.jpg", "Images",
+                extra={"event": "moved", "file": "a.jpg", "folder": "Images"})
+    pipeline.stop()
+    record = json.loads(path.read_text())
+    assert record["message"] == "Moved: a.jpg → Images/"
+    assert record["level"] == "INFO"
+    assert (record["event"], record["file"], record["folder"]) == ("moved", "a.jpg", "Images")
+
+
+def test_summary_only_aggregates_per_file_records(file_logger):
+    logger, pipeline, path = file_logger(summary_only=True)
+    logger.info("starting")
+    for i in range(5):
+        logger.info("Moved: %s", i, extra={"event": "moved", "folder": "Images"})
+    logger.info("Moved: x", extra={"event": "moved", "folder": "Documents"})
+    logger.warning("Skipped: y", extra={"event": "skipped", "folder": "Images"})
+    pipeline.stop()
+    assert path.read_text().splitlines() == [
+        "starting",
+        "Summary: 1 file(s) moved → Documents/",
+        "Summary: 5 file(s) moved → Images/",
+        "Summary: 1 file(s) skipped → Images/",
+    ]
+
+
+def test_setup_logging_flushes_on_stop(tmp_path):
+    log_file = tmp_path / "logs" / "organizer.log"
+    pipeline = setup_logging("INFO", str(log_file), log_format="json")
+    try:
+        logging.info("hello from main")
+    finally:
+        pipeline.stop()
+        logging.getLogger().handlers.clear()
+    assert json.loads(log_file.read_text())["message"] == "hello from main"
+    pipeline.stop()  # stopping twice is harmless
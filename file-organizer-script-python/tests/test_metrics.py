@@ -0,0 +1,84 @@
+"""
+Tests for run metrics in organizer/metrics.py.
+"""
+
+import json
+
+import pytest
+
+import organizer.plan as plan_module
+from main import organize_directory
+from organizer.metrics import NULL_METRICS, RunMetrics, metrics_for, register_hook, unregister_hook
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+def make_files(root, names):
+    for name in names:
+        (root / name).write_text("x")
+
+
+def test_organize_records_phases_and_counters(tmp_path):
+    """A run fills in per-phase timers and file counters."""
+    make_files(tmp_path, ["a.txt", "b.jpg", "c.bin"])
+    metrics = RunMetrics()
+
+    organize_directory(tmp_path, MAPPING, metrics=metrics)
+
+    summary = metrics.summary()
+    assert {"scan", "classify", "plan", "mkdir", "rename", "execute"} <= set(summary["phases_s"])
+    assert summary["counters"]["files_seen"] == 3
+    assert summary["counters"]["moved"] == 3
+    assert summary["errors"] == {}
+    assert summary["duration_s"] > 0
+
+
+def test_hooks_receive_every_run(tmp_path):
+    """Registered hooks get metrics even when the caller passed none."""
+    make_files(tmp_path, ["a.txt"])
+    seen = []
+    register_hook(seen.append)
+    try:
+        organize_directory(tmp_path, MAPPING)
+    finally:
+        unregister_hook(seen.append)
+
+    assert len(seen) == 1
+    assert seen[0].counters["moved"] == 1
+    assert metrics_for("organize") is NULL_METRICS
+
+
+def test_errors_are_counted_by_type(tmp_path, monkeypatch):
+    """A failing run still delivers metrics, with the error tallied once."""
+    make_files(tmp_path, ["a.txt"])
+
+    def failing_move(src, dst, copier=None, on_copied=None):
+        raise PermissionError(src)
+
+    monkeypatch.setattr(plan_module, "move_file", failing_move)
+    metrics = RunMetrics()
+    with pytest.raises(PermissionError):
+        organize_directory(tmp_path, MAPPING, metrics=metrics)
+
+    assert metrics.errors == {"PermissionError": 1}
+    assert metrics.duration > 0
+
+
+def test_exports_json_and_prometheus(tmp_path):
+    metrics = RunMetrics("organize")
+    metrics.add_time("scan", 0.25)
+    metrics.count("moved", 4)
+    metrics.error(PermissionError())
+    metrics.finish()
+
+    metrics.write_json(str(tmp_path / "run.json"))
+    metrics.write_prometheus(str(tmp_path / "out" / "organizer.prom"))
+
+    data = json.loads((tmp_path / "run.json").read_text())
+    assert data["phases_s"] == {"scan": 0.25}
+    assert data["counters"] == {"moved": 4}
+    prom = (tmp_path / "out" / "organizer.prom").read_text()
+    assert 'file_organizer_phase_seconds{run="organize",phase="scan"} 0.25' in prom
+    assert 'file_organizer_events{run="organize",counter="moved"} 4' in prom
+    assert 'file_organizer_errors{run="organize",type="PermissionError"} 1' in prom
+    assert not list((tmp_path / "out").glob("*.tmp"))
@@ -0,0 +1,123 @@
+"""
+Tests for the per-file NDJSON/CSV records in organizer/output.py.
+"""
+
+import csv
+import io
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from main import cli, organize_directory
+from organizer.output import FIELDS, RecordWriter
+from organizer.rules import RuleSet
+
+CONFIG = {"rules": [{"name": "big-images", "folder": "Images/Large", "extensions": ["jpg"], "min_size": 10}],
+          "extension_groups": {"Images": ["jpg"], "Documents": ["txt"], "Others": []}}
+
+
+def make_tree(root):
+    (root / "a.jpg").write_text("x" * 20)
+    (root / "b.jpg").write_text("x")
+    (root / "c.txt").write_text("old")
+    (root / "d.bin").write_text("")
+    (root / "Documents").mkdir()
+    (root / "Documents" / "c.txt").write_text("existing")
+
+
+def by_name(records):
+    return {os.path.basename(r["source"]): r for r in records}
+
+
+def test_dry_run_streams_planned_records(tmp_path):
+    make_tree(tmp_path)
+    stream = io.StringIO()
+    writer = RecordWriter(stream, "ndjson", batch=2)
+    organize_directory(tmp_path, RuleSet.from_config(CONFIG), dry_run=True, output=writer)
+    writer.flush()
+
+    records = by_name(json.loads(line) for line in stream.getvalue().splitlines())
+    assert records["a.jpg"] == {"source": str(tmp_path / "a.jpg"),
+                                "destination": str(tmp_path / "Images" / "Large" / "a.jpg"),
+                                "rule": "big-images", "size": 20, "action": "move", "reason": ""}
+    assert records["b.jpg"]["rule"] == "extension_groups.Images"
+    assert (records["c.txt"]["action"], records["c.txt"]["reason"]) == ("skip", "destination exists")
+    assert (records["d.bin"]["rule"], records["d.bin"]["reason"]) == (None, "no rule matched")
+    assert (tmp_path / "a.jpg").exists()
+
+
+def test_real_run_reports_outcomes_as_csv(tmp_path):
+    make_tree(tmp_path)
+    stream = io.StringIO(newline="")
+    writer = RecordWriter(stream, "csv")
+    organize_directory(tmp_path, RuleSet.from_config(CONFIG), workers=4, collisions="suffix", output=writer)
+    writer.flush()
+
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert tuple(rows[0]) == FIELDS
+    records = by_name(rows)
+    assert records["a.jpg"]["action"] == "moved" and records["a.jpg"]["size"] == "20"
+    assert records["c.txt"]["destination"] == str(tmp_path / "Documents" / "c (1).txt")
+    assert records["c.txt"]["reason"] == "name taken, renamed (suffix)"
+    assert writer.count == 4
+
+
+@pytest.mark.parametrize("strategy, reason", [("overwrite-newer", "incoming file is newer"),
+                                              ("overwrite", "destination overwritten")])
+def test_replace_records_name_the_strategy(tmp_path, strategy, reason):
+    make_tree(tmp_path)
+    os.utime(tmp_path / "Documents" / "c.txt", (1_000_000, 1_000_000))
+    stream = io.StringIO()
+    writer = RecordWriter(stream, "ndjson")
+    organize_directory(tmp_path, RuleSet.from_config(CONFIG), collisions=strategy, output=writer)
+    writer.flush()
+
+    records = by_name(json.loads(line) for line in stream.getvalue().splitlines())
+    assert (records["c.txt"]["action"], records["c.txt"]["reason"]) == ("replaced", reason)
+    assert (tmp_path / "Documents" / "c.txt").read_text() == "old"
+
+
+def test_failed_move_is_reported(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("a")
+    stream = io.StringIO()
+    writer = RecordWriter(stream, "ndjson")
+
+    def fail(src, dst, *args):
+        raise PermissionError(13, "Permission denied", src)
+
+    monkeypatch.setattr("organizer.plan.move_file", fail)
+    with pytest.raises(PermissionError):
+        organize_directory(tmp_path, {"txt": "Documents"}, output=writer)
+    writer.flush()
+
+    record = json.loads(stream.getvalue())
+    assert record["action"] == "failed" and "Permission denied" in record["reason"]
+
+
+def test_non_utf8_names_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    name = os.fsdecode(b"caf\xe9.txt")
+    (tmp_path / name).write_text("x")
+    out = tmp_path.parent / "records.ndjson"
+
+    result = CliRunner().invoke(cli, ["-d", str(tmp_path), "-c", str(tmp_path / "none.yaml"), "--dry-run",
+                                      "--output", "ndjson", "--output-file", str(out)])
+
+    assert result.exit_code == 0, result.output
+    record = json.loads(out.read_text())
+    assert os.fsencode(record["source"]).endswith(b"caf\xe9.txt")
+
+
+def test_cli_writes_records_to_stdout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.txt").write_text("a")
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli, ["-d", str(tmp_path), "-c", str(tmp_path / "none.yaml"), "--output", "csv"])
+
+    assert result.exit_code == 0, result.stderr
+    rows = list(csv.reader(io.StringIO(result.stdout)))
+    assert rows[0] == list(FIELDS) and rows[1][4] == "moved"
+    assert os.path.exists(rows[1][1]) and not (tmp_path / "a.txt").exists()
@@ -0,0 +1,130 @@
+"""
+Tests for the two-phase plan/execute engine in organizer/plan.py.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+import organizer.plan as plan_module
+from main import organize_directory
+from organizer.plan import MOVE, SKIP, MovePlan, build_plan, execute_plan
+from organizer.scanner import scan_files
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+def classify(entry):
+    return MAPPING.get(os.path.splitext(entry.name)[1][1:].lower(), "Others")
+
+
+def test_move_plan_groups_entries_by_destination():
+    """Entries come back grouped by destination with names intact."""
+    plan = MovePlan()
+    plan.add("/src", "a.jpg", "/dst/Images")
+    plan.add("/src", "b.txt", "/dst/Documents")
+    plan.add("/src/sub", "ünïcode.jpg", "/dst/Images", SKIP)
+
+    assert len(plan) == 3
+    assert plan.moves == 2 and plan.skips == 1
+    assert plan.totals() == {"/dst/Images": 2, "/dst/Documents": 1}
+    images = [item for dest, items in plan.groups() if dest == "/dst/Images" for item in items]
+    assert [(i.src_dir, i.name, i.action) for i in images] == [
+        ("/src", "a.jpg", MOVE),
+        ("/src/sub", "ünïcode.jpg", SKIP),
+    ]
+    assert images[0].source == "/src/a.jpg"
+    assert images[0].destination == "/dst/Images/a.jpg"
+
+
+def test_move_plan_stays_compact():
+    """Per-entry storage is a few dozen bytes, with directories interned."""
+    plan = MovePlan()
+    for i in range(10_000):
+        plan.add("/data/incoming", f"IMG_{i:06d}.jpg", "/data/incoming/Images")
+    assert plan.nbytes() / len(plan) < 40
+
+
+def test_build_plan_marks_existing_and_duplicate_names_as_skip(tmp_path):
+    (tmp_path / "Documents").mkdir()
+    (tmp_path / "Documents" / "old.txt").write_text("x")
+    (tmp_path / "old.txt").write_text("y")
+    (tmp_path / "new.jpg").write_text("z")
+
+    plan = build_plan([(str(tmp_path), scan_files(tmp_path))], classify, str(tmp_path))
+    actions = {item.name: item.action for item in plan}
+    assert actions == {"old.txt": SKIP, "new.jpg": MOVE}
+    assert not (tmp_path / "Images").exists()  # planning never touches the disk
+
+
+def test_execute_plan_moves_files(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.bin").write_text("b")
+    plan = build_plan([(str(tmp_path), scan_files(tmp_path))], classify, str(tmp_path))
+
+    assert execute_plan(plan) == 2
+    assert (tmp_path / "Documents" / "a.txt").exists()
+    assert (tmp_path / "Others" / "b.bin").exists()
+
+
+def test_dry_run_logs_the_plan(tmp_path, caplog):
+    """Dry-run prints totals and one line per planned entry."""
+    (tmp_path / "a.txt").write_text("a")
+    with caplog.at_level(logging.INFO):
+        assert organize_directory(tmp_path, MAPPING, dry_run=True) == 1
+    assert "Plan: 1 move(s), 0 skip(s) into 1 folder(s)" in caplog.text
+    assert "[DRY-RUN] a.txt → Documents/" in caplog.text
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+
+def test_concurrent_execute_matches_sequential(tmp_path):
+    """--workers N moves the same files and returns the same count."""
+    for i in range(50):
+        (tmp_path / f"f{i}.{('txt', 'jpg', 'bin')[i % 3]}").write_text("x")
+    (tmp_path / "Images").mkdir()
+    (tmp_path / "Images" / "f1.jpg").write_text("old")
+
+    assert organize_directory(tmp_path, MAPPING, workers=8) == 50
+    assert len(os.listdir(tmp_path / "Documents")) == 17
+    assert len(os.listdir(tmp_path / "Images")) == 17
+    assert len(os.listdir(tmp_path / "Others")) == 16
+    assert (tmp_path / "f1.jpg").exists()  # skipped, like the sequential path
+
+
+def test_concurrent_execute_keeps_operations_in_flight(tmp_path, monkeypatch):
+    """Renames overlap, but only after their destination directory exists."""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow_move(src, dst, copier=None, on_copied=None):
+        assert os.path.isdir(os.path.dirname(dst))
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.01)
+        os.rename(src, dst)
+        with lock:
+            state["active"] -= 1
+        return True
+
+    monkeypatch.setattr(plan_module, "move_file", slow_move)
+    for i in range(20):
+        (tmp_path / f"f{i}.txt").write_text("x")
+    plan = build_plan([(str(tmp_path), scan_files(tmp_path))], classify, str(tmp_path))
+
+    assert execute_plan(plan, workers=4) == 20
+    assert state["peak"] > 1
+
+
+def test_concurrent_execute_propagates_errors(tmp_path, monkeypatch):
+    def failing_move(src, dst, copier=None, on_copied=None):
+        raise PermissionError(src)
+
+    monkeypatch.setattr(plan_module, "move_file", failing_move)
+    (tmp_path / "a.txt").write_text("a")
+    plan = build_plan([(str(tmp_path), scan_files(tmp_path))], classify, str(tmp_path))
+    with pytest.raises(PermissionError):
+        execute_plan(plan, workers=4)
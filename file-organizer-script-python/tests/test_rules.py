@@ -0,0 +1,137 @@
+"""
+Tests for the compiled rule engine in organizer/rules.py.
+"""
+
+import os
+import time
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from benchmarks.rules_bench import PATTERN_RULES, make_names
+from main import build_rules, cli, organize_directory
+from organizer.rules import RuleSet, parse_age, parse_size
+
+CONFIG = {
+    "rules": [
+        {"name": "screenshots", "folder": "Screenshots", "glob": "screenshot*.png"},
+        {"name": "camera", "folder": "Camera", "regex": r"^IMG_\d+\.jpg$"},
+        {"name": "big-videos", "folder": "Videos/Large", "extensions": ["mp4"], "min_size": "1KiB"},
+        {"name": "stale-logs", "folder": "Old", "extensions": ["log"], "older_than": "30d"},
+        {"name": "tarballs", "folder": "Tarballs", "extensions": ["tar.gz"]},
+    ],
+    "extension_groups": {
+        "Images": ["jpg", "png"],
+        "Videos": ["mp4"],
+        "Archives": ["gz", "zip"],
+        "Executables": ["exe", "AppImage"],
+        "Logs": ["log"],
+        "Others": [],
+    },
+}
+
+
+def rule_name(rules, name, stat=None):
+    rule = rules.match_name(name, stat)
+    return rule.name if rule else None
+
+
+def test_extensions_are_case_insensitive_and_multi_part():
+    rules = RuleSet.from_config(CONFIG)
+    assert rules.classify_name("tool.AppImage") == "Executables"
+    assert rules.classify_name("TOOL.APPIMAGE") == "Executables"
+    assert rules.classify_name("src.tar.gz") == "Tarballs"
+    assert rules.classify_name("notes.gz") == "Archives"
+    assert rules.classify_name(".tar.gz") == "Archives"
+    assert rules.classify_name(".bashrc") == "Others"
+    assert rules.classify_name("README") == "Others"
+
+
+def test_patterns_and_first_match_wins():
+    rules = RuleSet.from_config(CONFIG)
+    assert rule_name(rules, "Screenshot 2024.PNG") == "screenshots"
+    assert rule_name(rules, "IMG_0042.jpg") == "camera"
+    assert rule_name(rules, "IMG_0042.jpg.bak") is None
+    assert rule_name(rules, "holiday.jpg") == "extension_groups.Images"
+
+
+def test_size_and_age_limits_use_stat_only_when_needed(tmp_path):
+    rules = RuleSet.from_config(CONFIG)
+    (tmp_path / "small.mp4").write_bytes(b"x" * 10)
+    (tmp_path / "big.mp4").write_bytes(b"x" * 2048)
+    (tmp_path / "old.log").write_text("x")
+    (tmp_path / "new.log").write_text("x")
+    (tmp_path / "a.png").write_text("x")
+    month_ago = time.time() - 40 * 86400
+    os.utime(tmp_path / "old.log", (month_ago, month_ago))
+
+    stats = []
+
+    def stat_of(path):
+        def stat():
+            stats.append(path.name)
+            return os.lstat(path)
+        return stat
+
+    folders = {}
+    for path in tmp_path.iterdir():
+        rule = rules.match_name(path.name, stat_of(path))
+        folders[path.name] = rule.folder if rule else rules.default
+    assert folders == {"small.mp4": "Videos", "big.mp4": "Videos/Large", "old.log": "Old",
+                       "new.log": "Logs", "a.png": "Images"}
+    assert "a.png" not in stats
+
+    classify = rules.entry_classifier()
+    with os.scandir(tmp_path) as it:
+        assert {e.name: classify(e) for e in it} == folders
+
+
+def test_compiled_classifier_agrees_with_full_matcher():
+    for config in (CONFIG, {**CONFIG, "rules": PATTERN_RULES}, {"extension_groups": CONFIG["extension_groups"]}):
+        rules = RuleSet.from_config(config)
+        classify = rules.name_classifier()
+        for name in make_names(config, 3000) + ["a.TAR.GZ", ".hidden.jpg", "x.", "noext"]:
+            assert classify(name) == rules.classify_name(name), name
+
+
+def test_suffix_classifier_only_where_the_suffix_decides():
+    assert RuleSet.from_config(CONFIG).suffix_classifier() is None
+    groups = {"Archives": ["tar.gz", "zip"], "Images": ["jpg"]}
+    rules = RuleSet.from_config({"extension_groups": groups})
+    by_suffix = rules.suffix_classifier()
+    assert [by_suffix(s) for s in ("jpg", "zip", "gz", "exe")] == ["Images", "Archives", None, "Others"]
+    for name in make_names({"extension_groups": groups}, 500):
+        dot = name.rfind(".")
+        if dot > 0 and name[0] != ".":
+            assert by_suffix(name[dot + 1:].lower()) in (None, rules.classify_name(name)), name
+
+
+def test_parsing_and_validation():
+    assert parse_size("1.5 GiB") == int(1.5 * 2**30)
+    assert parse_size("10MB") == 10_000_000
+    assert parse_age("2w") == 14 * 86400
+    with pytest.raises(ValueError):
+        parse_size("ten")
+    for bad in ({"folder": "X"}, {"glob": "*.x"}, {"folder": "X", "regex": "("}):
+        with pytest.raises(ValueError):
+            RuleSet.from_config({"rules": [bad]})
+
+
+def test_organize_and_explain_use_rules(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump(CONFIG))
+    target = tmp_path / "t"
+    target.mkdir()
+    for name in ("IMG_1.jpg", "pic.jpg", "src.tar.gz"):
+        (target / name).write_text("x")
+
+    organize_directory(target, build_rules(CONFIG))
+
+    assert sorted(os.listdir(target)) == ["Camera", "Images", "Tarballs"]
+    result = CliRunner().invoke(cli, ["explain", "-c", str(config), str(target / "Camera" / "IMG_1.jpg"),
+                                      "nothing.xyz"])
+    assert result.exit_code == 0, result.output
+    assert "Camera/ (rule: camera)" in result.output
+    assert "Others/ (no rule matched)" in result.output
@@ -0,0 +1,138 @@
+"""
+Tests for the os.scandir-based scanner in organizer/scanner.py and its use
+by organize_directory() in main.py.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from main import organize_directory
+from organizer.scanner import DirectoryCache, scan_files
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+FILE_COUNT = 200
+
+
+class SyscallCounter:
+    """Count calls to the os-level filesystem functions touched by a run."""
+
+    NAMES = ("stat", "lstat", "listdir", "scandir", "mkdir", "rename", "replace")
+
+    def __init__(self, monkeypatch):
+        self.calls = {name: 0 for name in self.NAMES}
+        for name in self.NAMES:
+            monkeypatch.setattr(os, name, self._wrap(name, getattr(os, name)))
+
+    def _wrap(self, name, func):
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return func(*args, **kwargs)
+        return counted
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+
+def naive_organize(target, mapping):
+    """Reference copy of the original iterdir/is_file/exists loop."""
+    import shutil
+    for file_path in target.iterdir():
+        if not file_path.is_file():
+            continue
+        dest_dir = target / mapping.get(file_path.suffix[1:].lower(), "Others")
+        dest_dir.mkdir(exist_ok=True)
+        dest_path = dest_dir / file_path.name
+        if not dest_path.exists():
+            shutil.move(str(file_path), str(dest_path))
+
+
+def make_tree(root: Path) -> Path:
+    root.mkdir()
+    for i in range(FILE_COUNT):
+        ext = ("txt", "jpg", "bin")[i % 3]
+        (root / f"file{i}.{ext}").write_text("x")
+    (root / "subdir").mkdir()
+    return root
+
+
+def test_scan_files_returns_only_files(tmp_path):
+    """Directories are skipped and DirEntry objects are returned."""
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "nested").mkdir()
+    entries = scan_files(tmp_path)
+    assert [e.name for e in entries] == ["a.txt"]
+    assert isinstance(entries[0], os.DirEntry)
+
+
+def test_directory_cache_lists_each_directory_once(tmp_path, monkeypatch):
+    """Existing names are loaded by one scandir and then answered from memory."""
+    dest = tmp_path / "Images"
+    dest.mkdir()
+    (dest / "old.jpg").write_text("x")
+    cache = DirectoryCache()
+    counter = SyscallCounter(monkeypatch)
+
+    assert cache.ensure_dir(str(dest)) is False
+    assert cache.has_entry(str(dest), "old.jpg")
+    assert not cache.has_entry(str(dest), "new.jpg")
+    cache.add_entry(str(dest), "new.jpg")
+    assert cache.has_entry(str(dest), "new.jpg")
+    assert counter.calls["scandir"] == 1
+    assert counter.total == 1
+
+
+def test_directory_cache_creates_missing_directory(tmp_path):
+    """A missing directory is created once and reported as new."""
+    cache = DirectoryCache()
+    target = str(tmp_path / "Docs")
+    assert cache.ensure_dir(target) is True
+    assert os.path.isdir(target)
+    assert cache.ensure_dir(target) is False
+
+
+def test_per_file_syscalls_reduced(tmp_path, monkeypatch):
+    """organize_directory needs about one syscall per file; the old loop needed several."""
+    naive_root = make_tree(tmp_path / "naive")
+    fast_root = make_tree(tmp_path / "fast")
+
+    with monkeypatch.context() as m:
+        naive = SyscallCounter(m)
+        naive_organize(naive_root, MAPPING)
+
+    with monkeypatch.context() as m:
+        fast = SyscallCounter(m)
+        assert organize_directory(fast_root, MAPPING) == FILE_COUNT
+
+    naive_per_file = naive.total / FILE_COUNT
+    fast_per_file = fast.total / FILE_COUNT
+    assert naive_per_file >= 4
+    assert fast_per_file < 1.1
+    # Only resolving the target stats anything; no per-file stat remains.
+    assert fast.calls["stat"] + fast.calls["lstat"] < FILE_COUNT / 10
+    assert sorted(os.listdir(fast_root)) == sorted(os.listdir(naive_root))
+
+
+def test_organize_directory_skips_existing_names(tmp_path):
+    """A file whose name already exists in the destination is left in place."""
+    (tmp_path / "Documents").mkdir()
+    (tmp_path / "Documents" / "a.txt").write_text("old")
+    (tmp_path / "a.txt").write_text("new")
+
+    assert organize_directory(tmp_path, MAPPING) == 1
+    assert (tmp_path / "a.txt").read_text() == "new"
+    assert (tmp_path / "Documents" / "a.txt").read_text() == "old"
+
+
+def test_organize_directory_dry_run_creates_nothing(tmp_path):
+    """Dry-run neither moves files nor creates category folders."""
+    (tmp_path / "a.jpg").write_text("x")
+    assert organize_directory(tmp_path, MAPPING, dry_run=True) == 1
+    assert os.listdir(tmp_path) == ["a.jpg"]
+
+
+def test_organize_directory_rejects_missing_target(tmp_path):
+    with pytest.raises(NotADirectoryError):
+        organize_directory(tmp_path / "missing", MAPPING)
@@ -0,0 +1,94 @@
+"""
+Tests for the sharded destination layout in organizer/shard.py.
+"""
+
+import os
+
+import pytest
+
+from main import organize_directory
+from organizer.plan import SKIP, build_plan
+from organizer.scanner import scan_files
+from organizer.shard import MARKER, ShardLayout, ShardPattern, read_marker, reshard_folder
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+def make_files(root, names):
+    root.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (root / name).write_text(name)
+
+
+def shard_files(folder):
+    return sorted(os.path.relpath(os.path.join(d, f), folder)
+                  for d, _, files in os.walk(folder) for f in files if f != MARKER)
+
+
+def test_pattern_is_stable_and_configurable():
+    default = ShardPattern()
+    assert default.subdir("a.jpg") == ShardPattern().subdir("a.jpg")
+    assert len(default.subdir("a.jpg").split("/")) == 2
+    assert ShardPattern("{ext}/{name:0:1}").subdir("Photo.JPG") == "jpg/p"
+    assert ShardPattern("{ext}/{name:0:1}").subdir(".bashrc") == "_/_"
+    for bad in ("static", "../{hash:0:2}", "/{hash:0:2}"):
+        with pytest.raises(ValueError):
+            ShardPattern(bad)
+
+
+def test_plan_places_files_in_shards_and_checks_flat_names(tmp_path):
+    """Newly sharded folders still see names left in the flat folder."""
+    make_files(tmp_path / "Images", ["old.jpg", "other.jpg"])
+    make_files(tmp_path / "in", ["old.jpg", "new.jpg", "notes.txt"])
+    layout = ShardLayout({"Images": 2}, "{name:0:1}")
+
+    plan = build_plan([(str(tmp_path / "in"), scan_files(tmp_path / "in"))],
+                      lambda e: MAPPING[e.name.rsplit(".", 1)[1]], str(tmp_path), layout=layout)
+
+    placed = {item.name: (os.path.relpath(item.dest_dir, tmp_path), item.action, item.folder)
+              for item in plan}
+    assert placed["new.jpg"] == ("Images/n", 0, "Images")
+    assert placed["old.jpg"] == ("Images/o", SKIP, "Images")
+    assert placed["notes.txt"] == ("Documents", 0, "Documents")
+    assert plan.totals() == {str(tmp_path / "Images"): 2, str(tmp_path / "Documents"): 1}
+
+
+def test_organize_records_layout_and_keeps_it(tmp_path):
+    make_files(tmp_path, ["a.jpg", "b.jpg"])
+    layout = ShardLayout({"Images": 0})
+
+    organize_directory(tmp_path, MAPPING, dry_run=True, sharding=layout)
+    assert not (tmp_path / "Images").exists()
+
+    organize_directory(tmp_path, MAPPING, sharding=layout)
+    assert read_marker(str(tmp_path / "Images"))["pattern"] == layout.pattern.pattern
+    assert len(shard_files(tmp_path / "Images")) == 2
+    assert all("/" in path for path in shard_files(tmp_path / "Images"))
+
+    # A later run with a different configured pattern keeps the recorded one.
+    make_files(tmp_path, ["c.jpg"])
+    organize_directory(tmp_path, MAPPING, sharding=ShardLayout({"Images": 0}, "{ext}"))
+    assert ShardPattern().subdir("c.jpg") + "/c.jpg" in shard_files(tmp_path / "Images")
+
+
+def test_reshard_migrates_flat_folder(tmp_path):
+    folder = tmp_path / "Images"
+    make_files(folder, [f"img{i}.jpg" for i in range(200)])
+    pattern = "{name:3:4}"
+    make_files(folder / "1", ["img1.jpg"])
+
+    assert reshard_folder(str(folder), pattern, dry_run=True) == (200, 0)
+    assert len(os.listdir(folder)) == 201
+
+    moved, kept = reshard_folder(str(folder), pattern)
+
+    assert (moved, kept) == (199, 1)
+    assert (folder / "img1.jpg").exists()
+    assert len(shard_files(folder)) == 201
+    assert read_marker(str(folder)) == {"pattern": pattern, "migrated": False}
+    with pytest.raises(ValueError):
+        reshard_folder(str(folder), "{hash:0:2}")
+
+    os.unlink(folder / "1" / "img1.jpg")
+    assert reshard_folder(str(folder), pattern) == (1, 0)
+    assert read_marker(str(folder))["migrated"] is True
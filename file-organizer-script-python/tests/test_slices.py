@@ -0,0 +1,134 @@
+"""
+Tests for budgeted, cursor-based runs (organizer/slices.py).
+"""
+
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from main import cli
+from organizer.api import Organizer, OrganizerConfig
+from organizer.engine import organize_target
+from organizer.journal import JournalError
+from organizer.slices import SliceBudget
+
+MAPPING = {"jpg": "Images", "txt": "Documents"}
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    target = tmp_path / "inbox"
+    target.mkdir()
+    return target
+
+
+def _files(target, count, start=0):
+    for i in range(start, start + count):
+        path = target / f"f{i:02}.{('jpg', 'txt')[i % 2]}"
+        path.write_text("x" * i)
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+
+
+def _loose(target):
+    return sorted(p.name for p in target.iterdir() if p.is_file())
+
+
+def test_slices_continue_from_the_cursor(tmp_path, inbox):
+    _files(inbox, 25)
+    cursor = str(tmp_path / "state" / "cursor.jsonl")
+
+    first = organize_target(inbox, MAPPING, journal_path=cursor, max_files=10)
+    assert (first.moved, first.remaining, first.stopped) == (10, 15, True)
+    assert first.remaining_s is not None
+    assert len(_loose(inbox)) == 15
+
+    _files(inbox, 1, start=25)  # arrives between slices
+    second = organize_target(inbox, MAPPING, journal_path=cursor, max_files=10)
+    assert (second.moved, second.remaining, second.stopped) == (10, 5, True)
+    assert "f25.txt" in _loose(inbox)  # the cursor is not rescanned mid-backlog
+
+    third = organize_target(inbox, MAPPING, journal_path=cursor, max_files=10)
+    assert (third.moved, third.remaining, third.stopped) == (6, 0, False)
+    assert _loose(inbox) == []
+    assert len(os.listdir(inbox / "Images")) + len(os.listdir(inbox / "Documents")) == 26
+
+
+@pytest.mark.parametrize("order, expected", [("oldest", ["f00.jpg", "f01.txt", "f02.jpg"]),
+                                             ("largest", ["f11.txt", "f10.jpg", "f09.txt"])])
+def test_order_picks_the_first_slice(tmp_path, inbox, order, expected):
+    _files(inbox, 12)
+    organize_target(inbox, MAPPING, journal_path=str(tmp_path / "j.jsonl"), max_files=3, order=order)
+
+    moved = sorted(os.listdir(inbox / "Images") + os.listdir(inbox / "Documents"))
+    assert moved == sorted(expected)
+
+
+def test_unbudgeted_order_moves_everything(inbox):
+    _files(inbox, 6)
+    result = organize_target(inbox, MAPPING, order="largest", workers=3)
+    assert (result.moved, result.stopped) == (6, False)
+
+
+def test_time_budget_stops_taking_moves():
+    now = [0.0]
+    budget = SliceBudget(max_seconds=5, clock=lambda: now[0])
+    assert budget.take() and budget.take()
+    now[0] = 5.0
+    assert not budget.take()
+    now[0] = 0.0
+    assert not budget.take() and budget.stopped and budget.taken == 2
+    assert SliceBudget.create() is None
+
+
+def test_api_runs_slices_until_done(tmp_path, inbox):
+    _files(inbox, 7)
+    organizer = Organizer(OrganizerConfig(MAPPING, journal_path=str(tmp_path / "j.jsonl"), max_files=3))
+
+    results = [organizer.run(str(inbox))]
+    while results[-1].stopped:
+        results.append(organizer.run(str(inbox)))
+
+    assert [r.moved for r in results] == [3, 3, 1]
+    assert _loose(inbox) == []
+
+
+def test_default_cursor_is_per_target(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first, second = tmp_path / "a", tmp_path / "b"
+    for target in (first, second):
+        target.mkdir()
+        _files(target, 4)
+
+    results = [organize_target(target, MAPPING, max_files=3) for target in (first, second)]
+
+    assert [(r.moved, r.remaining, r.processed) for r in results] == [(3, 1, 3), (3, 1, 3)]
+    assert organize_target(first, MAPPING, max_files=3).moved == 1
+    assert len(os.listdir(tmp_path / "file_organizer_state" / "cursors")) == 2
+
+
+def test_foreign_unfinished_journal_fails_before_scanning(tmp_path, inbox):
+    _files(inbox, 4)
+    journal = str(tmp_path / "shared.jsonl")
+    organize_target(inbox, MAPPING, journal_path=journal, max_files=1)
+    other = tmp_path / "other"
+    other.mkdir()
+
+    with pytest.raises(JournalError, match="unfinished run on"):
+        organize_target(other, MAPPING, journal_path=journal, max_files=1)
+
+
+def test_cli_reports_the_moves_of_a_stopped_slice(tmp_path, inbox, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _files(inbox, 8)
+    result = CliRunner().invoke(cli, ["-d", str(inbox), "--max-files", "5"])
+
+    assert result.exit_code == 0, result.output
+    log = (tmp_path / "logs" / "file_organizer.log").read_text()
+    assert "5 file(s) processed successfully; 3 move(s) left" in log
+
+
+def test_cli_rejects_budgets_with_resume():
+    result = CliRunner().invoke(cli, ["--resume", "--max-files", "5"])
+    assert result.exit_code != 0
+    assert "--max-files/--max-seconds" in result.output
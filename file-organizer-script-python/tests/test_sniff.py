@@ -0,0 +1,69 @@
+"""
+Tests for the content-sniffing classifier in organizer/sniff.py.
+"""
+
+import os
+
+import pytest
+
+import organizer.sniff as sniff
+from main import organize_directory
+from organizer.sniff import ContentSniffer, match_signature
+
+MAPPING = {"jpg": "Images", "txt": "Documents", "zip": "Archives"}
+FOLDERS = {"Images", "Documents", "Archives", "Videos"}
+
+
+@pytest.mark.parametrize("header, group", [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", "Images"),
+    (b"\x89PNG\r\n\x1a\n....", "Images"),
+    (b"\x00\x00\x00\x18ftypmp42", "Videos"),
+    (b"%PDF-1.7\n", "Documents"),
+    (b"PK\x03\x04\x14\x00", "Archives"),
+    (b"\x00" * 257 + b"ustar\x0000", "Archives"),
+    (b"plain text", None),
+])
+def test_match_signature(header, group):
+    assert match_signature(header) == group
+
+
+def test_unconfigured_groups_are_ignored():
+    assert match_signature(b"\x7fELF\x02\x01", {"Images"}) is None
+
+
+def entries(path):
+    return {entry.name: entry for entry in os.scandir(path)}
+
+
+def test_sniffer_reads_bounded_header_once(tmp_path, monkeypatch):
+    """Only HEADER_SIZE bytes are read, and a cached result is reused across runs."""
+    (tmp_path / "scan0001").write_bytes(b"%PDF-1.4\n" + b"x" * 100_000)
+    cache = str(tmp_path / "sniff.sqlite3")
+    requested = []
+    real_pread = os.pread
+    monkeypatch.setattr(os, "pread", lambda fd, n, off: requested.append(n) or real_pread(fd, n, off))
+
+    first = ContentSniffer(FOLDERS, cache)
+    assert first.classify(entries(tmp_path)["scan0001"]) == "Documents"
+    first.close()
+    assert requested == [sniff.HEADER_SIZE]
+
+    second = ContentSniffer(FOLDERS, cache)
+    assert second.classify(entries(tmp_path)["scan0001"]) == "Documents"
+    assert second.reads == 0
+    second.close()
+    assert requested == [sniff.HEADER_SIZE]
+
+
+def test_organize_sniffs_only_on_extension_miss(tmp_path):
+    (tmp_path / "IMG_0001").write_bytes(b"\xff\xd8\xff\xe1" + b"\x00" * 64)
+    (tmp_path / "archive.bin").write_bytes(b"PK\x03\x04" + b"\x00" * 64)
+    (tmp_path / "notes.txt").write_bytes(b"\x89PNG\r\n\x1a\n")  # extension wins
+    (tmp_path / "mystery").write_bytes(b"nothing to see")
+
+    cache = str(tmp_path.parent / "sniff.sqlite3")
+    assert organize_directory(tmp_path, MAPPING, sniff_cache=cache) == 4
+    assert (tmp_path / "Images" / "IMG_0001").exists()
+    assert (tmp_path / "Archives" / "archive.bin").exists()
+    assert (tmp_path / "Documents" / "notes.txt").exists()
+    assert (tmp_path / "Others" / "mystery").exists()
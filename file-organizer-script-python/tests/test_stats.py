@@ -0,0 +1,114 @@
+"""
+Tests for the stats inventory in organizer/stats.py.
+"""
+
+import json
+import os
+import time
+
+from click.testing import CliRunner
+
+from main import cli
+from organizer.rules import RuleSet
+from organizer.stats import collect_stats, format_bytes
+
+RULES = RuleSet.from_mapping({"jpg": "Images", "txt": "Documents"})
+DAY = 86400
+SETTLED = time.time() - 3600
+
+
+def _tree(root):
+    now = time.time()
+    files = {"a.jpg": (100, 0), "b.jpg": (300, 10), "sub/c.txt": (50, 40), "sub/deep/d.bin": (7, 2000)}
+    for rel, (size, age_days) in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+        os.utime(path, (now - age_days * DAY, now - age_days * DAY))
+    _settle(root)
+
+
+def _settle(root):
+    # Directories modified within the last seconds are never trusted by the cache.
+    for path, _, _ in os.walk(root):
+        os.utime(path, (SETTLED, SETTLED))
+
+
+def test_inventory_totals_largest_and_ages(tmp_path):
+    _tree(tmp_path)
+
+    stats = collect_stats(str(tmp_path), RULES, top=2)
+
+    assert (stats.files, stats.bytes, stats.directories) == (4, 457, 3)
+    assert stats.categories == {"Images": {"files": 2, "bytes": 400}, "Documents": {"files": 1, "bytes": 50},
+                                "Others": {"files": 1, "bytes": 7}}
+    assert [row["path"] for row in stats.largest] == [str(tmp_path / "b.jpg"), str(tmp_path / "a.jpg")]
+    ages = {row["age"]: row["files"] for row in stats.ages}
+    assert ages["< 1 day"] == 1 and ages["< 1 month"] == 1 and ages["< 3 months"] == 1
+    assert ages[">= 3 years"] == 1
+
+
+def test_cache_rescans_only_changed_directories(tmp_path):
+    target = tmp_path / "tree"
+    target.mkdir()
+    _tree(target)
+    cache = str(tmp_path / "stats.sqlite3")
+
+    first = collect_stats(str(target), RULES, cache_path=cache)
+    second = collect_stats(str(target), RULES, cache_path=cache)
+    assert (first.rescanned, second.rescanned) == (3, 0)
+    assert second.categories == first.categories
+
+    (target / "sub" / "e.txt").write_bytes(b"y" * 1000)
+    os.utime(target, (SETTLED, SETTLED))
+    os.utime(target / "sub", (SETTLED + 60, SETTLED + 60))
+    third = collect_stats(str(target), RULES, cache_path=cache)
+    assert third.rescanned == 1
+    assert third.categories["Documents"] == {"files": 2, "bytes": 1050}
+
+    assert collect_stats(str(target), RULES, cache_path=cache, full=True).rescanned == 3
+
+
+def test_one_cache_file_serves_several_roots(tmp_path):
+    first, second = tmp_path / "a", tmp_path / "b"
+    for root in (first, second):
+        root.mkdir()
+        _tree(root)
+    cache = str(tmp_path / "stats.sqlite3")
+
+    for root in (first, second):
+        assert collect_stats(str(root), RULES, cache_path=cache).rescanned == 3
+    again = [collect_stats(str(root), RULES, cache_path=cache) for root in (first, second)]
+
+    assert [stats.rescanned for stats in again] == [0, 0]
+    assert again[0].categories == again[1].categories
+
+
+def test_size_rules_reuse_the_summary_stat(tmp_path):
+    _tree(tmp_path)
+    rules = RuleSet.from_config({"rules": [{"name": "big", "folder": "Big", "extensions": ["jpg"],
+                                            "min_size": 200}],
+                                 "extension_groups": {"Images": ["jpg"]}})
+
+    stats = collect_stats(str(tmp_path), rules)
+
+    assert stats.categories["Big"] == {"files": 1, "bytes": 300}
+    assert stats.categories["Images"] == {"files": 1, "bytes": 100}
+
+
+def test_stats_command_json(tmp_path):
+    _tree(tmp_path)
+    config = tmp_path / "config.yaml"
+    config.write_text("extension_groups:\n  Images: [jpg]\n")
+
+    result = CliRunner().invoke(cli, ["stats", "-d", str(tmp_path), "-c", str(config), "--no-cache",
+                                      "--format", "json", "--max-depth", "0"])
+
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+    assert data["files"] == 3  # a.jpg, b.jpg and config.yaml
+    assert data["categories"]["Images"]["bytes"] == 400
+
+
+def test_format_bytes():
+    assert [format_bytes(n) for n in (0, 1536, 5 * 1024 ** 3)] == ["0 B", "1.5 KiB", "5.0 GiB"]
@@ -0,0 +1,99 @@
+"""
+Tests for the I/O budget in organizer/throttle.py.
+"""
+
+import os
+import time
+
+import pytest
+
+from main import organize_directory
+from organizer.crossdev import CopyPool
+from organizer.throttle import IOBudget, ThrottleSettings, TokenBucket, set_nice
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_bucket_paces_takers_after_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+
+    waits = [bucket.take() for _ in range(125)]
+
+    assert waits[:25] == [0.0] * 25
+    assert clock.now == pytest.approx(1.0)
+    assert bucket.waited == pytest.approx(1.0)
+    assert TokenBucket(None).take(10 ** 9) == 0.0
+
+
+def test_adaptive_backs_off_on_latency_and_recovers():
+    clock = FakeClock()
+    budget = IOBudget(ops_per_sec=None, adaptive=True, clock=clock, sleep=clock.sleep)
+
+    def run(latency, seconds):
+        end = clock.now + seconds
+        while clock.now < end:
+            budget.op(clock.sleep, latency)
+
+    run(0.001, 1.0)
+    assert budget.ops.rate is None
+    run(0.01, 1.0)
+    assert budget.backoffs >= 1
+    slowed = budget.ops.rate
+    assert slowed is not None and slowed < 1000
+    run(0.001, 20.0)
+    assert budget.ops.rate is None
+
+
+def test_settings_merge_config_and_overrides():
+    settings = ThrottleSettings.from_config({"max_bytes_per_sec": "10MB", "adaptive": True, "nice": 5},
+                                            max_ops_per_sec=200, adaptive=None)
+    assert settings == ThrottleSettings(10 * 1000 ** 2, 200.0, True, None, 5)
+    assert settings.budget().bytes.rate == 10 * 1000 ** 2
+    assert ThrottleSettings.from_config({"ionice": "idle"}).budget() is None
+
+    for bad in ({"max_ops_per_sec": 0}, {"ionice": "realtime"}, {"max_iops": 5}):
+        with pytest.raises(ValueError):
+            ThrottleSettings.from_config(bad)
+
+
+def test_executor_charges_every_mkdir_and_rename(tmp_path):
+    for i in range(30):
+        (tmp_path / f"f{i}.{('jpg', 'txt')[i % 2]}").write_text("x")
+    budget = IOBudget(ops_per_sec=40)
+
+    start = time.monotonic()
+    organize_directory(tmp_path, {"jpg": "Images", "txt": "Documents"}, workers=4, budget=budget)
+
+    # 10 operations fit in the initial burst, the other 22 are paced.
+    assert time.monotonic() - start >= (32 - 10) / 40 * 0.9
+    assert budget.ops.taken == 32
+    assert len(os.listdir(tmp_path / "Images")) == 15
+
+
+def test_copies_are_charged_per_byte(tmp_path):
+    src = tmp_path / "big.bin"
+    src.write_bytes(os.urandom(300_000))
+    budget = IOBudget(bytes_per_sec=10 ** 9)
+
+    with CopyPool(1, budget=budget) as pool:
+        pool.submit(str(src), str(tmp_path / "copy.bin"))
+
+    assert budget.bytes.taken == 300_000
+
+
+def test_nice_is_only_ever_raised(monkeypatch):
+    calls = []
+    monkeypatch.setattr(os, "nice", lambda inc: calls.append(inc) or 3)
+
+    assert set_nice(10) is True and calls == [0, 7]
+    assert set_nice(1) is False and calls == [0, 7, 0]
@@ -0,0 +1,152 @@
+"""
+Tests for link views (organizer/view.py).
+"""
+
+import errno
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from main import cli
+from organizer import view
+from organizer.api import Organizer, OrganizerConfig
+from organizer.engine import organize_target
+
+MAPPING = {"jpg": "Images", "txt": "Documents"}
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "share"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.jpg").write_text("a")
+    (root / "b.txt").write_text("b")
+    (root / "sub" / "c.jpg").write_text("c")
+    return root
+
+
+def _tree(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, files in os.walk(root)
+                  for f in files if f != view.MARKER)
+
+
+def test_view_hardlinks_and_leaves_the_source_alone(tmp_path, source):
+    before = _tree(source)
+    result = organize_target(source, MAPPING, recursive=True, view_root=str(tmp_path / "view"))
+
+    assert (result.files, result.linked, result.pruned) == (3, 3, 0)
+    assert _tree(source) == before
+    assert _tree(tmp_path / "view") == ["Documents/b.txt", "Images/a.jpg", "Images/c.jpg"]
+    assert os.path.samefile(tmp_path / "view" / "Images" / "c.jpg", source / "sub" / "c.jpg")
+
+
+def test_resync_adds_new_files_and_prunes_vanished_ones(tmp_path, source):
+    target = str(tmp_path / "view")
+    organize_target(source, MAPPING, view_root=target)
+    (source / "a.jpg").unlink()
+    (source / "d.txt").write_text("d")
+
+    result = organize_target(source, MAPPING, view_root=target)
+
+    assert (result.linked, result.pruned) == (1, 1)
+    assert _tree(target) == ["Documents/b.txt", "Documents/d.txt"]
+    assert not (tmp_path / "view" / "Images").exists()
+    assert organize_target(source, MAPPING, view_root=target).linked == 0
+
+
+def test_replaced_source_is_relinked(tmp_path, source):
+    target = tmp_path / "view"
+    organize_target(source, MAPPING, view_root=str(target))
+    (source / "b.txt").unlink()
+    (source / "b.txt").write_text("new")
+
+    result = organize_target(source, MAPPING, view_root=str(target))
+
+    assert (result.linked, result.pruned) == (1, 1)
+    assert (target / "Documents" / "b.txt").read_text() == "new"
+
+
+def test_symlinks_when_hardlinks_are_refused(tmp_path, source, monkeypatch):
+    def refuse(*args, **kwargs):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(view.os, "link", refuse)
+    target = tmp_path / "view"
+    synced = view.sync_view(str(source), str(target), lambda entry: "Files")
+
+    assert (synced.linked, synced.symlinked) == (0, 2)
+    assert os.readlink(target / "Files" / "a.jpg") == str(source / "a.jpg")
+
+    (source / "a.jpg").unlink()
+    again = view.sync_view(str(source), str(target), lambda entry: "Files")
+    assert (again.pruned, again.kept) == (1, 1)
+    assert not os.path.lexists(target / "Files" / "a.jpg")
+
+
+def test_nested_layout_and_dry_run(tmp_path, source):
+    target = tmp_path / "view"
+    dry = organize_target(source, MAPPING, dry_run=True, recursive=True, flatten=False, view_root=str(target))
+    assert dry.linked == 3 and not target.exists()
+
+    organize_target(source, MAPPING, recursive=True, flatten=False, view_root=str(target))
+    assert (target / "sub" / "Images" / "c.jpg").exists()
+
+
+def test_view_inside_the_source_is_not_scanned(source):
+    organize_target(source, MAPPING, view_root=str(source / "view"))
+    again = organize_target(source, MAPPING, view_root=str(source / "view"))
+
+    assert (again.files, again.linked) == (2, 0)
+    with pytest.raises(ValueError):
+        organize_target(source, MAPPING, view_root=str(source / "sub" / "view"))
+    with pytest.raises(ValueError):
+        organize_target(source / "sub", MAPPING, view_root=str(source))
+
+
+def test_refuses_a_populated_directory_it_does_not_own(tmp_path, source):
+    existing = tmp_path / "existing"
+    (existing / "notes").mkdir(parents=True)
+    (existing / "notes" / "todo.txt").write_text("keep")
+    (existing / "report.pdf").write_text("keep")
+
+    with pytest.raises(ValueError, match="not empty"):
+        organize_target(source, MAPPING, view_root=str(existing))
+    assert _tree(existing) == ["notes/todo.txt", "report.pdf"]
+    organize_target(source, MAPPING, view_root=str(tmp_path / "v"))
+    with pytest.raises(ValueError, match="view of"):
+        organize_target(source / "sub", MAPPING, view_root=str(tmp_path / "v"))
+
+
+def test_files_added_by_hand_are_never_pruned(tmp_path, source):
+    target = tmp_path / "view"
+    organize_target(source, MAPPING, view_root=str(target))
+    (target / "Images" / "mine.jpg").write_text("mine")
+    (target / "Documents" / "b.txt").unlink()
+    (target / "Documents" / "b.txt").write_text("mine too")
+
+    result = organize_target(source, MAPPING, view_root=str(target))
+
+    assert (result.pruned, result.linked, result.skipped) == (0, 0, 1)
+    assert (target / "Images" / "mine.jpg").read_text() == "mine"
+    assert (target / "Documents" / "b.txt").read_text() == "mine too"
+
+
+def test_symlinked_sources_stay_linked(tmp_path, source):
+    (source / "alias.jpg").symlink_to(source / "a.jpg")
+    target = str(tmp_path / "view")
+    assert organize_target(source, MAPPING, view_root=target).linked == 3
+
+    again = organize_target(source, MAPPING, view_root=target)
+
+    assert (again.linked, again.pruned) == (0, 0)
+
+
+def test_api_and_cli(tmp_path, source, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    organizer = Organizer(OrganizerConfig(MAPPING, view_root=str(tmp_path / "api")))
+    assert organizer.run(str(source)).linked == 2
+
+    result = CliRunner().invoke(cli, ["--view", str(tmp_path / "v"), "--journal"])
+    assert result.exit_code != 0
+    assert "--view cannot be combined" in result.output
@@ -0,0 +1,64 @@
+"""
+Tests for the parallel tree walker in organizer/walker.py and the recursive
+mode of organize_directory().
+"""
+
+import os
+
+from main import organize_directory
+from organizer.walker import walk_tree
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+def build_tree(root):
+    """root/{a.txt, one/{b.jpg, two/{c.txt, three/d.jpg}}, Images/old.jpg}"""
+    (root / "one" / "two" / "three").mkdir(parents=True)
+    (root / "Images").mkdir()
+    (root / "a.txt").write_text("a")
+    (root / "one" / "b.jpg").write_text("b")
+    (root / "one" / "two" / "c.txt").write_text("c")
+    (root / "one" / "two" / "three" / "d.jpg").write_text("d")
+    (root / "Images" / "old.jpg").write_text("old")
+
+
+def walked_names(root, **kwargs):
+    return sorted(entry.name for _, files in walk_tree(root, **kwargs) for entry in files)
+
+
+def test_walk_tree_visits_every_level(tmp_path):
+    build_tree(tmp_path)
+    assert walked_names(tmp_path, workers=3) == ["a.txt", "b.jpg", "c.txt", "d.jpg", "old.jpg"]
+
+
+def test_walk_tree_skips_category_folders_and_respects_depth(tmp_path):
+    build_tree(tmp_path)
+    assert walked_names(tmp_path, skip_names={"Images"}) == ["a.txt", "b.jpg", "c.txt", "d.jpg"]
+    assert walked_names(tmp_path, skip_names={"Images"}, max_depth=1) == ["a.txt", "b.jpg"]
+
+
+def test_walk_tree_does_not_follow_directory_symlinks(tmp_path):
+    (tmp_path / "real").mkdir()
+    (tmp_path / "real" / "x.txt").write_text("x")
+    os.symlink(tmp_path, tmp_path / "real" / "loop")
+    assert walked_names(tmp_path) == ["x.txt"]
+
+
+def test_recursive_flatten_moves_into_root_categories(tmp_path):
+    """Flatten mode sends every file to the root category folders."""
+    build_tree(tmp_path)
+    assert organize_directory(tmp_path, MAPPING, recursive=True) == 4
+    assert sorted(os.listdir(tmp_path / "Images")) == ["b.jpg", "d.jpg", "old.jpg"]
+    assert sorted(os.listdir(tmp_path / "Documents")) == ["a.txt", "c.txt"]
+
+
+def test_recursive_in_place_organizes_each_subtree(tmp_path):
+    """In-place mode creates category folders inside every directory."""
+    build_tree(tmp_path)
+    count = organize_directory(tmp_path, MAPPING, recursive=True, flatten=False, max_depth=2)
+    assert count == 3
+    assert (tmp_path / "one" / "Images" / "b.jpg").exists()
+    assert (tmp_path / "one" / "two" / "Documents" / "c.txt").exists()
+    assert (tmp_path / "one" / "two" / "three" / "d.jpg").exists()
+    # A second run finds nothing new: category folders are never rescanned.
+    assert organize_directory(tmp_path, MAPPING, recursive=True, flatten=False, max_depth=2) == 0
@@ -0,0 +1,117 @@
+"""
+Tests for the inotify watcher in organizer/watcher.py.
+"""
+
+import os
+import queue
+import sys
+import threading
+
+import pytest
+
+from main import organize_directory
+from organizer import watcher
+from organizer.watcher import IN_CLOSE_WRITE, IN_Q_OVERFLOW, watch_batches
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+
+MAPPING = {"txt": "Documents", "jpg": "Images"}
+
+
+@pytest.fixture
+def batches(tmp_path):
+    """Run watch_batches in a thread and collect its batches on a queue."""
+    out = queue.Queue()
+    stop = threading.Event()
+    ready = threading.Event()
+
+    def run():
+        gen = watch_batches(str(tmp_path), {"Images", "Documents"}, debounce=0.1, stop=stop)
+        ready.set()
+        for batch in gen:
+            out.put(batch)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+    # watch_batches registers the watch lazily on first next(); give it a moment.
+    threading.Event().wait(0.2)
+    yield out
+    stop.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_completed_files_are_batched(tmp_path, batches):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.jpg").write_text("b")
+    assert batches.get(timeout=5) == {"a.txt", "b.jpg"}
+
+
+def test_partially_written_file_waits_for_close(tmp_path, batches):
+    with open(tmp_path / "big.jpg", "w") as handle:
+        handle.write("partial")
+        handle.flush()
+        with pytest.raises(queue.Empty):
+            batches.get(timeout=0.5)
+    assert batches.get(timeout=5) == {"big.jpg"}
+
+
+def test_renamed_in_files_are_reported_and_own_moves_ignored(tmp_path, batches):
+    staging = tmp_path / "Images"
+    staging.mkdir()
+    (tmp_path / "x.tmp").write_text("x")
+    assert batches.get(timeout=5) == {"x.tmp"}
+
+    os.rename(tmp_path / "x.tmp", tmp_path / "x.jpg")
+    assert batches.get(timeout=5) == {"x.jpg"}
+
+    # Organizing moves the file out into a category folder: no new batch.
+    organize_directory(tmp_path, MAPPING, only_names={"x.jpg"})
+    assert (staging / "x.jpg").exists()
+    with pytest.raises(queue.Empty):
+        batches.get(timeout=0.5)
+
+
+def test_only_names_limits_the_run(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    assert organize_directory(tmp_path, MAPPING, only_names={"b.txt"}) == 1
+    assert sorted(os.listdir(tmp_path)) == ["Documents", "a.txt"]
+
+
+def test_overflow_rescan_is_debounced_from_the_overflow(monkeypatch):
+    """A lone overflow starts its own batch instead of inheriting an old batch's start."""
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"x")  # always readable: the script below decides what arrives
+    stop = threading.Event()
+    clock = [0.0]
+    # (events read at the current time, seconds until the next read)
+    script = [([(IN_CLOSE_WRITE, "a")], 5), ([], 95), ([(IN_Q_OVERFLOW, "")], 0.5),
+              ([(IN_CLOSE_WRITE, "b")], 5), ([], 0)]
+
+    class ScriptedWatch:
+        def __init__(self, path):
+            pass
+
+        def fileno(self):
+            return read_fd
+
+        def read_events(self):
+            events, gap = script.pop(0)
+            clock[0] += gap
+            if not script:
+                stop.set()
+            return events
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            os.close(read_fd)
+            os.close(write_fd)
+
+    monkeypatch.setattr(watcher, "InotifyWatch", ScriptedWatch)
+    monkeypatch.setattr(watcher.time, "monotonic", lambda: clock[0])
+
+    assert list(watch_batches("unused", debounce=1, max_delay=10, stop=stop)) == [{"a"}, None]